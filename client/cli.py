@@ -1,9 +1,14 @@
 import argparse
 import base64
+import glob
+import json
 import requests
+import threading
 import time
 import os
 import math
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 from ollama import pull
 
 # Default API base URL - can be overridden with API_BASE_URL environment variable
@@ -115,6 +120,176 @@ def get_result(task_id, print_progress = False):
                 return None
         time.sleep(2)  # Wait for 2 seconds before checking again
 
+# Completed results are returned as markdown right away, other results (e.g. LLM transformed JSON) as JSON
+BATCH_ACCEPT = 'text/markdown, application/json;q=0.9'
+BATCH_MANIFEST = '.batch_manifest.json'
+
+
+def create_session(concurrency):
+    """
+    Shared session keeping `concurrency` connections alive - instead of a new connection per request.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def batch_files(source):
+    """
+    Files of a directory (recursively) or matching a glob pattern, with their paths relative to the source -
+    used for the output paths and as the manifest keys.
+    """
+    if os.path.isdir(source):
+        root = source
+        files = [os.path.join(dirpath, filename) for dirpath, _, filenames in os.walk(source) for filename in filenames]
+    else:
+        files = [path for path in glob.glob(source, recursive=True) if os.path.isfile(path)]
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files]) if files else '.'
+    files = [path for path in files if os.path.basename(path) != BATCH_MANIFEST]
+    return sorted((os.path.relpath(os.path.abspath(path), os.path.abspath(root)), path) for path in files)
+
+
+def load_manifest(manifest_path):
+    if not os.path.isfile(manifest_path):
+        return {}
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest_path, manifest):
+    temp_path = manifest_path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, manifest_path)
+
+
+def poll_result(session, task_id, output_path, poll_interval=0.5, max_poll_interval=10, timeout=3600, wait=0):
+    """
+    Polls the task with exponential backoff until it ends and writes its result to `output_path`.
+    With `wait`, every request is held by the API for up to `wait` seconds until the task ends.
+    Returns the final state.
+    """
+    started = time.time()
+    while time.time() - started < timeout:
+        requested = time.time()
+        with session.get(f'{API_BASE_URL}/ocr/result/{task_id}', headers={'Accept': BATCH_ACCEPT},
+                         params={'wait': wait} if wait else None, stream=True) as response:
+            response.raise_for_status()
+            if response.headers.get('content-type', '').startswith('text/markdown'):
+                with open(output_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        f.write(chunk)
+                return 'SUCCESS'
+            result = response.json()
+        if result['state'] == 'SUCCESS':
+            with open(output_path, 'w') as f:
+                output = result.get('result')
+                f.write(output if isinstance(output, str) else json.dumps(output, indent=2))
+            return 'SUCCESS'
+        if result['state'] in ('FAILURE', 'REVOKED'):
+            return result['state']
+        if wait and time.time() - requested >= wait:
+            continue  # the API held the request, yet the task did not end
+        time.sleep(poll_interval)
+        poll_interval = min(poll_interval * 2, max_poll_interval)
+    return 'TIMEOUT'
+
+
+def batch_process_file(session, file_path, output_path, entry, options):
+    """
+    Uploads the file (unless an earlier run did already) and waits for its result. Returns the manifest entry.
+    """
+    if not entry.get('task_id'):
+        data = {'ocr_cache': options['ocr_cache'], 'model': options['model'], 'strategy': options['strategy'],
+                'storage_profile': options['storage_profile'], 'language': options['language']}
+        if options.get('prompt'):
+            data['prompt'] = options['prompt']
+        with open(file_path, 'rb') as f:
+            response = session.post(f'{API_BASE_URL}/ocr/upload', files={'file': f}, data=data)
+        if response.status_code != 200:
+            return dict(entry, status='failed', error=f"Upload failed: {response.status_code} - {response.text}")
+        entry = dict(entry, task_id=response.json().get('task_id'), status='submitted')
+        options['on_submitted'](entry)
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    state = poll_result(session, entry['task_id'], output_path, options['poll_interval'],
+                        options['max_poll_interval'], options['task_timeout'], options.get('wait', 0))
+    if state == 'SUCCESS':
+        return dict(entry, status='done', output=output_path, error=None)
+    # A failed or timed out task is uploaded again by the next run
+    return dict(entry, status='failed', task_id=None, error=f"Task ended with state {state}")
+
+
+def batch(source, output_dir, concurrency=4, manifest_path=None, **options):
+    """
+    Processes all files of `source` (a directory or a glob pattern) with up to `concurrency` tasks at once,
+    writing the results to `output_dir`. The progress is kept in a manifest - an interrupted run is resumed
+    by running it again: completed files are skipped and submitted tasks are polled instead of uploaded again.
+    """
+    manifest_path = manifest_path or os.path.join(output_dir, BATCH_MANIFEST)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(manifest_path)
+    manifest_lock = threading.Lock()
+
+    submitted = {}
+
+    def update_manifest(relative_path, entry):
+        with manifest_lock:
+            manifest[relative_path] = entry
+            save_manifest(manifest_path, manifest)
+
+    def mark_submitted(relative_path, entry):
+        submitted[relative_path] = entry
+        update_manifest(relative_path, entry)
+
+    files = batch_files(source)
+    pending = []
+    for relative_path, file_path in files:
+        stat = os.stat(file_path)
+        entry = manifest.get(relative_path, {})
+        if entry.get('size') != stat.st_size or entry.get('mtime') != stat.st_mtime:
+            entry = {'size': stat.st_size, 'mtime': stat.st_mtime}  # a new or changed file
+        if entry.get('status') == 'done' and os.path.isfile(entry.get('output', '')):
+            continue
+        pending.append((relative_path, file_path, entry))
+
+    print(f"Processing {len(pending)} of {len(files)} files ({len(files) - len(pending)} already done)")
+    started = time.time()
+    summary = {'done': 0, 'failed': 0, 'skipped': len(files) - len(pending), 'bytes': 0}
+    with create_session(concurrency) as session, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {}
+        for relative_path, file_path, entry in pending:
+            file_options = dict(options, on_submitted=lambda entry, path=relative_path: mark_submitted(path, entry))
+            # The source extension is kept - `scan.pdf` and `scan.png` must not share a result
+            output_path = os.path.join(output_dir, relative_path + '.md')
+            futures[executor.submit(batch_process_file, session, file_path, output_path, entry, file_options)] = \
+                (relative_path, entry)
+
+        for future in as_completed(futures):
+            relative_path, entry = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                # Keeps the task id of a submitted file - the next run polls it again
+                entry = dict(submitted.get(relative_path, entry), status='failed', error=str(e))
+            update_manifest(relative_path, entry)
+            if entry['status'] == 'done':
+                summary['done'] += 1
+                summary['bytes'] += entry['size']
+                print(f"Done: {relative_path} -> {entry['output']}")
+            else:
+                summary['failed'] += 1
+                print(f"Failed: {relative_path} - {entry.get('error')}")
+
+    summary['elapsed'] = time.time() - started
+    print(f"Processed {summary['done']} files ({summary['bytes'] / 1024 / 1024:.1f} MB) in {summary['elapsed']:.1f}s - "
+          f"{summary['done'] / summary['elapsed'] if summary['elapsed'] else 0:.2f} files/s, "
+          f"{summary['bytes'] / 1024 / 1024 / summary['elapsed'] if summary['elapsed'] else 0:.2f} MB/s; "
+          f"{summary['skipped']} skipped, {summary['failed']} failed")
+    return summary
+
 def clear_cache():
     clear_cache_url = f'{API_BASE_URL}/ocr/clear_cache'
     response = requests.post(clear_cache_url)
@@ -215,6 +390,24 @@ def main():
     ocr_request_parser.add_argument('--storage_filename', type=str, default=None, help='Storage filename to use')
     ocr_request_parser.add_argument('--language', type=str, default='en', help='Language to use for the OCR task')
 
+    # Sub-command for processing many files
+    batch_parser = subparsers.add_parser('batch', help='Process all files of a directory or matching a glob pattern; run it again to resume.')
+    batch_parser.add_argument('--source', type=str, required=True, help='Directory or glob pattern (e.g. "scans/**/*.pdf") of the files to process')
+    batch_parser.add_argument('--output_dir', type=str, required=True, help='Directory the results are written to')
+    batch_parser.add_argument('--concurrency', type=int, default=4, help='Number of files processed at once')
+    batch_parser.add_argument('--manifest', type=str, default=None, help='Resume manifest path (default: .batch_manifest.json in the output directory)')
+    batch_parser.add_argument('--disable_ocr_cache', default=False, action='store_true', help='Disable OCR result caching')
+    batch_parser.add_argument('--prompt', type=str, default=None, help='Prompt used for the Ollama model to fix or transform the files')
+    batch_parser.add_argument('--prompt_file', default=None, type=str, help='Prompt file name used for the Ollama model to fix or transform the files')
+    batch_parser.add_argument('--model', type=str, default='llama3.1', help='Model to use for the Ollama endpoint')
+    batch_parser.add_argument('--strategy', type=str, default='llama_vision', help='OCR strategy to use for the files')
+    batch_parser.add_argument('--storage_profile', type=str, default='default', help='Storage profile to use for the files')
+    batch_parser.add_argument('--language', type=str, default='en', help='Language to use for the OCR tasks')
+    batch_parser.add_argument('--poll_interval', type=float, default=0.5, help='First result polling interval in seconds - doubled up to --max_poll_interval')
+    batch_parser.add_argument('--max_poll_interval', type=float, default=10, help='Maximum result polling interval in seconds')
+    batch_parser.add_argument('--task_timeout', type=float, default=3600, help='Seconds to wait for a result')
+    batch_parser.add_argument('--wait', type=float, default=0, help='Seconds every result request is held by the API until the task ends (long polling)')
+
     # Sub-command for getting the result
     result_parser = subparsers.add_parser('result', help='Get the OCR result by specified task id.')
     result_parser.add_argument('--task_id', type=str, help='Task Id returned by the upload command')
@@ -272,6 +465,18 @@ def main():
             text_result = get_result(result.get('task_id'), args.print_progress)
             if text_result:
                 print(text_result)
+    elif args.command == 'batch':
+        prompt = args.prompt
+        if args.prompt_file:
+            try:
+                prompt = open(args.prompt_file, 'r').read()
+            except FileNotFoundError:
+                print(f"Prompt file not found: {args.prompt_file}")
+                return
+        batch(args.source, args.output_dir, args.concurrency, args.manifest, ocr_cache=not args.disable_ocr_cache,
+              prompt=prompt, model=args.model, strategy=args.strategy, storage_profile=args.storage_profile,
+              language=args.language, poll_interval=args.poll_interval, max_poll_interval=args.max_poll_interval,
+              task_timeout=args.task_timeout, wait=args.wait)
     elif args.command == 'result':
         text_result = get_result(args.task_id, args.print_progress)
         if text_result:
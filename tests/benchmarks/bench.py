@@ -0,0 +1,258 @@
+"""
+Benchmarks of the extraction pipeline, runnable offline - the Ollama and remote engines are replaced
+by deterministic fakes (see fakes.py); Docling and EasyOCR are benchmarked with `--real-engines`.
+
+    python -m tests.benchmarks.bench --save-baseline tests/benchmarks/baselines/local.json
+    python -m tests.benchmarks.bench --baseline tests/benchmarks/baselines/local.json
+
+Exits with 1 when a case got slower (median time) or used more memory (peak) than the baseline
+by more than the threshold.
+"""
+import argparse
+import contextlib
+import fnmatch
+import functools
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+from unittest.mock import patch
+
+# The Celery app is configured on import - run the tasks in-process, without a broker
+os.environ.setdefault('CELERY_BROKER_URL', 'memory://')
+os.environ.setdefault('CELERY_RESULT_BACKEND', 'cache+memory://')
+os.environ.setdefault('REDIS_CACHE_URL', 'redis://localhost:6379/15')
+os.environ.setdefault('PAGE_CHECKPOINTS', 'false')
+
+from .documents import benchmark_documents, can_rasterize
+from .fakes import FakeOllamaClient, FakeRemoteHttpClient
+
+DEFAULT_THRESHOLD = float(os.getenv('BENCHMARK_THRESHOLD', 0.2))
+DEFAULT_SYNTHETIC_PAGES = (1, 10, 50)
+
+
+class Case(NamedTuple):
+    name: str
+    pages: int
+    # Runs the case once; might return the durations of its stages (seconds by stage name)
+    run: Callable[[], Optional[Dict[str, float]]]
+
+
+def _discard(func: Callable, *args) -> None:
+    func(*args)
+
+
+def _count_pages(binary: bytes) -> int:
+    return max(1, len(re.findall(rb'/Type\s*/Page\b', binary))) if binary.startswith(b'%PDF') else 1
+
+
+@contextlib.contextmanager
+def fake_engines(tokens_per_second: float = 0, engine_latency: float = 0):
+    """
+    Replaces the Ollama client (strategies and LLM step) and the remote API client with the offline fakes.
+    """
+    ollama_client = functools.partial(FakeOllamaClient, tokens_per_second=tokens_per_second, latency=engine_latency)
+    remote_client = FakeRemoteHttpClient(latency=engine_latency)
+    with patch('text_extract_api.extract.strategies.ollama.Client', ollama_client), \
+            patch('text_extract_api.extract.tasks.Client', ollama_client), \
+            patch('text_extract_api.extract.strategies.remote.get_http_client', lambda **kwargs: remote_client):
+        yield
+
+
+def _strategies(real_engines: bool) -> dict:
+    from text_extract_api.extract.strategies.ollama import OllamaStrategy
+    from text_extract_api.extract.strategies.remote import RemoteStrategy
+    from text_extract_api.extract.strategies.strategy import Strategy
+
+    strategies = {
+        'bench_llama_vision': (OllamaStrategy, {'model': 'fake-vision', 'prompt': 'Convert to markdown'}),
+        'bench_remote': (RemoteStrategy, {'url': 'http://remote.invalid/marker'}),
+    }
+    if real_engines:
+        try:
+            from text_extract_api.extract.strategies.docling import DoclingStrategy
+            strategies['bench_docling'] = (DoclingStrategy, {})
+        except ImportError as e:
+            print(f"Docling is not benchmarked: {e}")
+        try:
+            from text_extract_api.extract.strategies.easyocr import EasyOCRStrategy
+            strategies['bench_easyocr'] = (EasyOCRStrategy, {})
+        except ImportError as e:
+            print(f"EasyOCR is not benchmarked: {e}")
+
+    for name, (strategy_class, config) in strategies.items():
+        strategy = strategy_class()
+        strategy.set_strategy_config(config)
+        Strategy.register_strategy(strategy, name, override=True)
+    return {name: Strategy.get_strategy(name) for name in strategies}
+
+
+def build_cases(documents: Dict[str, bytes], real_engines: bool = False) -> List[Case]:
+    from text_extract_api.extract.tasks import ocr_task
+    from text_extract_api.files.file_formats.file_format import FileFormat
+    from text_extract_api.files.file_formats.image import ImageFileFormat
+    from text_extract_api.files.file_formats.pdf import PdfFileFormat
+
+    strategies = _strategies(real_engines)
+    rasterize = can_rasterize()
+    if not rasterize:
+        print("poppler is not installed - the cases rasterizing PDFs are skipped")
+
+    def extract(strategy, file_format):
+        # ocr_task sets its progress callback and checkpoints on the shared strategy instances
+        strategy.set_update_state_callback(lambda **kwargs: None)
+        strategy.set_checkpoints(None)
+        result = strategy.extract_text(file_format, 'en')
+        durations = [segment.duration for segment in result.pages if segment.duration is not None]
+        return {'page': statistics.median(durations)} if durations else None
+
+    def run_task(binary, strategy_name, prompt=None):
+        result = ocr_task.apply(args=[binary, strategy_name, 'document.pdf', 'hash', False, prompt, None, 'en']).get()
+        return {stage: duration for stage, duration in result['timeline'].items() if isinstance(duration, float)}
+
+    cases = []
+    for name, binary in documents.items():
+        pages = _count_pages(binary)
+        is_pdf = binary.startswith(b'%PDF')
+        cases.append(Case(f'file_format.from_binary/{name}', pages,
+                          functools.partial(_discard, FileFormat.from_binary, binary)))
+
+        file_format = FileFormat.from_binary(binary, name)
+        if is_pdf and rasterize:
+            cases.append(Case(f'convert.pdf_to_image/{name}', pages,
+                              functools.partial(_discard, file_format.convert_to, ImageFileFormat)))
+        if not is_pdf:
+            cases.append(Case(f'convert.image_to_pdf/{name}', pages,
+                              functools.partial(_discard, file_format.convert_to, PdfFileFormat)))
+
+        for strategy_name, strategy in strategies.items():
+            if is_pdf and not rasterize and strategy_name in ('bench_llama_vision', 'bench_easyocr'):
+                continue
+            cases.append(Case(f'strategy.{strategy_name[len("bench_"):]}/{name}', pages,
+                              functools.partial(extract, strategy, file_format)))
+
+        if is_pdf:
+            cases.append(Case(f'ocr_task.remote/{name}', pages, functools.partial(run_task, binary, 'bench_remote')))
+            cases.append(Case(f'ocr_task.remote+llm/{name}', pages,
+                              functools.partial(run_task, binary, 'bench_remote', 'Summarize: ')))
+    return cases
+
+
+def run_case(case: Case, repeat: int, warmup: int = 1) -> dict:
+    """
+    Runs the case `warmup` + `repeat` times for timing and once more under tracemalloc for its peak memory.
+    """
+    for _ in range(warmup):
+        case.run()
+    timings = []
+    stages: Dict[str, List[float]] = {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        case_stages = case.run()
+        timings.append(time.perf_counter() - started)
+        for stage, duration in (case_stages or {}).items():
+            stages.setdefault(stage, []).append(duration)
+
+    tracemalloc.start()
+    try:
+        case.run()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(timings)
+    return {
+        'pages': case.pages,
+        'runs': repeat,
+        'median_seconds': round(median, 6),
+        'min_seconds': round(min(timings), 6),
+        'max_seconds': round(max(timings), 6),
+        'pages_per_second': round(case.pages / median, 3) if median else None,
+        'peak_memory_bytes': peak_memory,
+        'stages': {stage: round(statistics.median(durations), 6) for stage, durations in stages.items()},
+    }
+
+
+def run_benchmarks(cases: Iterable[Case], repeat: int = 5, select: Optional[str] = None) -> dict:
+    results = {}
+    for case in cases:
+        if select and not fnmatch.fnmatch(case.name, select):
+            continue
+        # The pipeline reports its progress by print - kept out of the benchmark output
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            results[case.name] = run_case(case, repeat)
+        print(format_result(case.name, results[case.name]), flush=True)
+    return {
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'processor': platform.processor(), 'cpu_count': os.cpu_count()},
+        'cases': results,
+    }
+
+
+def format_result(name: str, result: dict) -> str:
+    stages = ', '.join(f"{stage}={duration * 1000:.1f}ms" for stage, duration in result['stages'].items())
+    return (f"{name:<60} {result['median_seconds'] * 1000:10.2f}ms {result['pages_per_second'] or 0:10.1f} pages/s "
+            f"{result['peak_memory_bytes'] / 1024 / 1024:8.1f}MB" + (f"  [{stages}]" if stages else ''))
+
+
+def compare(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Returns the regressions: cases whose median time or peak memory exceeds the baseline by more than `threshold`.
+    """
+    regressions = []
+    for name, result in results['cases'].items():
+        expected = baseline['cases'].get(name)
+        if expected is None:
+            continue
+        for metric in ('median_seconds', 'peak_memory_bytes'):
+            if expected[metric] and result[metric] > expected[metric] * (1 + threshold):
+                regressions.append(f"{name}: {metric} {result[metric]} > {expected[metric]} "
+                                   f"(+{(result[metric] / expected[metric] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks of the text extraction pipeline')
+    parser.add_argument('--pages', default=','.join(map(str, DEFAULT_SYNTHETIC_PAGES)),
+                        help='Page counts of the synthetic PDFs, comma separated')
+    parser.add_argument('--no-examples', action='store_true', help='Skip the examples/*.pdf documents')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case')
+    parser.add_argument('--select', help='Run the cases matching this glob pattern only, e.g. "strategy.*"')
+    parser.add_argument('--real-engines', action='store_true', help='Benchmark Docling and EasyOCR too')
+    parser.add_argument('--tokens-per-second', type=float, default=0, help='Token rate of the fake Ollama')
+    parser.add_argument('--engine-latency', type=float, default=0, help='Latency of the fake engines in seconds')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--save-baseline', help='Write the results as the baseline to this JSON file')
+    parser.add_argument('--baseline', help='Compare the results with this baseline JSON file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed slowdown/memory growth over the baseline, e.g. 0.2 for 20%%')
+    args = parser.parse_args(argv)
+
+    documents = benchmark_documents([int(pages) for pages in args.pages.split(',') if pages],
+                                    examples=not args.no_examples)
+    with fake_engines(args.tokens_per_second, args.engine_latency):
+        results = run_benchmarks(build_cases(documents, args.real_engines), args.repeat, args.select)
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold * 100:.0f}% of the baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
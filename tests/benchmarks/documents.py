@@ -0,0 +1,62 @@
+import glob
+import io
+import os
+import shutil
+from typing import Dict, Iterable
+
+from PIL import Image, ImageDraw
+
+EXAMPLES_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'examples')
+PAGE_SIZE = (827, 1169)  # A4 at 100 DPI
+
+
+def can_rasterize() -> bool:
+    """
+    pdf2image needs poppler - without it the PDF to image conversion is not benchmarked.
+    """
+    return shutil.which('pdftoppm') is not None and shutil.which('pdfinfo') is not None
+
+
+def synthetic_page(page_no: int, lines: int = 40) -> Image.Image:
+    page = Image.new('RGB', PAGE_SIZE, 'white')
+    draw = ImageDraw.Draw(page)
+    draw.text((60, 40), f"Synthetic page {page_no}", fill='black')
+    for line in range(lines):
+        draw.text((60, 80 + line * 25), f"Line {line + 1} of page {page_no}: lorem ipsum dolor sit amet " * 2,
+                  fill='black')
+    return page
+
+
+def synthetic_pdf(pages: int) -> bytes:
+    """
+    An N-page PDF of text rendered to images - like a scanned document.
+    """
+    images = [synthetic_page(page_no) for page_no in range(1, pages + 1)]
+    buffer = io.BytesIO()
+    images[0].save(buffer, format='PDF', save_all=True, append_images=images[1:])
+    return buffer.getvalue()
+
+
+def synthetic_image() -> bytes:
+    buffer = io.BytesIO()
+    synthetic_page(1).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def example_pdfs() -> Dict[str, bytes]:
+    documents = {}
+    for path in sorted(glob.glob(os.path.join(EXAMPLES_PATH, '*.pdf'))):
+        with open(path, 'rb') as f:
+            documents[os.path.basename(path)] = f.read()
+    return documents
+
+
+def benchmark_documents(synthetic_pages: Iterable[int], examples: bool = True) -> Dict[str, bytes]:
+    """
+    Documents benchmarked by name: the example PDFs, the synthetic N-page PDFs and a synthetic image.
+    """
+    documents = example_pdfs() if examples else {}
+    for pages in synthetic_pages:
+        documents[f'synthetic-{pages}p.pdf'] = synthetic_pdf(pages)
+    documents['synthetic.png'] = synthetic_image()
+    return documents
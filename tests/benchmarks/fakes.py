@@ -0,0 +1,81 @@
+import hashlib
+import re
+import time
+from typing import Iterator, Optional
+
+
+def _words(seed: str, count: int) -> list:
+    """
+    Deterministic pseudo-words derived from `seed` - the same input always gives the same answer.
+    """
+    digest = hashlib.sha256(seed.encode('utf-8')).hexdigest()
+    return [digest[(index * 7) % 60:(index * 7) % 60 + 3 + index % 5] for index in range(count)]
+
+
+class FakeOllamaClient:
+    """
+    Offline stand-in for `ollama.Client`: answers with `tokens` deterministic tokens, streamed at
+    `tokens_per_second` (0 - as fast as possible) after `latency` seconds.
+    """
+
+    def __init__(self, host: Optional[str] = None, timeout=None, tokens: int = 64, tokens_per_second: float = 0,
+                 latency: float = 0):
+        self.host = host
+        self.tokens = tokens
+        self.tokens_per_second = tokens_per_second
+        self.latency = latency
+
+    def _stream(self, seed: str) -> Iterator[str]:
+        if self.latency:
+            time.sleep(self.latency)
+        for word in _words(seed, self.tokens):
+            if self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            yield word + ' '
+
+    def chat(self, model, messages, stream=False, keep_alive=None, **kwargs):
+        seed = model + ''.join(str(message.get('content')) for message in messages)
+        chunks = ({'message': {'role': 'assistant', 'content': token}} for token in self._stream(seed))
+        if stream:
+            return chunks
+        return {'message': {'role': 'assistant', 'content': ''.join(chunk['message']['content'] for chunk in chunks)}}
+
+    def generate(self, model, prompt, stream=False, keep_alive=None, **kwargs):
+        chunks = ({'response': token} for token in self._stream(model + prompt))
+        if stream:
+            return chunks
+        return {'response': ''.join(chunk['response'] for chunk in chunks)}
+
+
+class FakeResponse:
+    def __init__(self, payload: dict, status_code: int = 200):
+        self.status_code = status_code
+        self._payload = payload
+        self.content = str(payload).encode('utf-8')
+
+    def json(self) -> dict:
+        return self._payload
+
+
+class FakeRemoteHttpClient:
+    """
+    Offline stand-in for the Marker-like remote API of `RemoteStrategy`: answers with markdown derived
+    from the document (and page range) after `latency` seconds, plus `page_latency` per page.
+    """
+
+    def __init__(self, latency: float = 0, page_latency: float = 0):
+        self.latency = latency
+        self.page_latency = page_latency
+
+    def post(self, url, files=None, data=None, **kwargs) -> FakeResponse:
+        document = files['file'][1]
+        page_range = (data or {}).get('page_range')
+        if page_range:
+            first, last = map(int, page_range.split('-'))
+            pages = last - first + 1
+        else:
+            pages = max(1, len(re.findall(rb'/Type\s*/Page\b', document)))
+        time.sleep(self.latency + self.page_latency * pages)
+        seed = hashlib.sha256(document).hexdigest() + str(page_range)
+        output = '\n\n'.join(f"## Page\n\n{' '.join(_words(seed + str(page), 120))}" for page in range(pages))
+        return FakeResponse({'output': output})
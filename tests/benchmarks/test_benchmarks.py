@@ -0,0 +1,30 @@
+from .bench import build_cases, compare, fake_engines, run_benchmarks
+from .documents import benchmark_documents
+
+
+def test_benchmarks_run_offline():
+    documents = benchmark_documents([2], examples=False)
+
+    with fake_engines():
+        results = run_benchmarks(build_cases(documents), repeat=1)
+
+    cases = results['cases']
+    assert {'file_format.from_binary/synthetic-2p.pdf', 'strategy.remote/synthetic-2p.pdf',
+            'strategy.llama_vision/synthetic.png', 'ocr_task.remote+llm/synthetic-2p.pdf'} <= set(cases)
+    task = cases['ocr_task.remote+llm/synthetic-2p.pdf']
+    assert task['pages'] == 2
+    assert task['pages_per_second'] > 0
+    assert {'extract', 'llm', 'total'} <= set(task['stages'])
+
+
+def test_compare_flags_regressions():
+    baseline = {'cases': {'a': {'median_seconds': 1.0, 'peak_memory_bytes': 1000},
+                          'b': {'median_seconds': 1.0, 'peak_memory_bytes': 1000}}}
+    results = {'cases': {'a': {'median_seconds': 1.1, 'peak_memory_bytes': 1000},
+                         'b': {'median_seconds': 1.0, 'peak_memory_bytes': 1500},
+                         'new': {'median_seconds': 9.0, 'peak_memory_bytes': 9000}}}
+
+    regressions = compare(results, baseline, threshold=0.2)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith('b: peak_memory_bytes')
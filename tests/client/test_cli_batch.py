@@ -0,0 +1,164 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+CLI_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'client', 'cli.py')
+
+
+@pytest.fixture
+def cli():
+    spec = importlib.util.spec_from_file_location('cli', CLI_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, payload=None, body=None):
+        self.status_code = status_code
+        self._payload = payload
+        self.body = body
+        self.headers = {'content-type': 'text/markdown; charset=utf-8' if body is not None else 'application/json'}
+        self.text = json.dumps(payload)
+
+    def json(self):
+        return self._payload
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+    def raise_for_status(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class FakeSession:
+    """
+    The API: every task is in progress on the first poll and completed on the second, `bad.pdf` fails.
+    """
+
+    def __init__(self):
+        self.uploads = []
+        self.polls = {}
+
+    def post(self, url, files, data):
+        filename = os.path.basename(files['file'].name)
+        self.uploads.append(filename)
+        return FakeResponse(payload={'task_id': filename})
+
+    def get(self, url, headers, params, stream):
+        task_id = url.rsplit('/', 1)[1]
+        self.polls[task_id] = self.polls.get(task_id, 0) + 1
+        if self.polls[task_id] == 1:
+            return FakeResponse(payload={'state': 'PROGRESS'})
+        if task_id == 'bad.pdf':
+            return FakeResponse(payload={'state': 'FAILURE'})
+        return FakeResponse(body=f'# {task_id}'.encode())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def test_batch_writes_results_and_resumes(cli, tmp_path, monkeypatch):
+    source = tmp_path / 'scans'
+    (source / 'nested').mkdir(parents=True)
+    for name in ('a.pdf', 'nested/b.pdf', 'bad.pdf'):
+        (source / name).write_bytes(b'%PDF-1.4')
+    session = FakeSession()
+    monkeypatch.setattr(cli, 'create_session', lambda concurrency: session)
+    options = dict(ocr_cache=True, model='llama3.1', strategy='remote', storage_profile='default', language='en',
+                   poll_interval=0, max_poll_interval=0, task_timeout=10)
+
+    summary = cli.batch(str(source), str(tmp_path / 'out'), concurrency=2, **options)
+
+    assert (summary['done'], summary['failed'], summary['skipped']) == (2, 1, 0)
+    assert (tmp_path / 'out' / 'nested' / 'b.pdf.md').read_text() == '# b.pdf'
+    manifest = json.loads((tmp_path / 'out' / '.batch_manifest.json').read_text())
+    assert manifest['a.pdf']['status'] == 'done'
+    assert manifest['bad.pdf']['status'] == 'failed' and manifest['bad.pdf']['task_id'] is None
+
+    session.uploads.clear()
+    summary = cli.batch(str(source / '**' / '*.pdf'), str(tmp_path / 'out'), concurrency=2, **options)
+
+    assert summary['skipped'] == 2
+    assert session.uploads == ['bad.pdf']
+
+
+def test_submitted_tasks_are_polled_on_resume(cli, tmp_path, monkeypatch):
+    (tmp_path / 'a.pdf').write_bytes(b'%PDF-1.4')
+    stat = os.stat(tmp_path / 'a.pdf')
+    (tmp_path / 'out').mkdir()
+    (tmp_path / 'out' / '.batch_manifest.json').write_text(json.dumps(
+        {'a.pdf': {'size': stat.st_size, 'mtime': stat.st_mtime, 'status': 'submitted', 'task_id': 'earlier-task'}}))
+    session = FakeSession()
+    monkeypatch.setattr(cli, 'create_session', lambda concurrency: session)
+
+    cli.batch(str(tmp_path / '*.pdf'), str(tmp_path / 'out'), ocr_cache=True, model='llama3.1', strategy='remote',
+              storage_profile='default', language='en', poll_interval=0, max_poll_interval=0, task_timeout=10)
+
+    assert session.uploads == []
+    assert (tmp_path / 'out' / 'a.pdf.md').read_text() == '# earlier-task'
+
+
+def test_files_sharing_a_name_get_their_own_results(cli, tmp_path, monkeypatch):
+    (tmp_path / 'scans').mkdir()
+    (tmp_path / 'scans' / 'scan.pdf').write_bytes(b'%PDF-1.4')
+    (tmp_path / 'scans' / 'scan.png').write_bytes(b'\x89PNG')
+    session = FakeSession()
+    monkeypatch.setattr(cli, 'create_session', lambda concurrency: session)
+
+    summary = cli.batch(str(tmp_path / 'scans'), str(tmp_path / 'out'), ocr_cache=True, model='llama3.1',
+                        strategy='remote', storage_profile='default', language='en', poll_interval=0,
+                        max_poll_interval=0, task_timeout=10)
+
+    assert summary['done'] == 2
+    assert (tmp_path / 'out' / 'scan.pdf.md').read_text() == '# scan.pdf'
+    assert (tmp_path / 'out' / 'scan.png.md').read_text() == '# scan.png'
+    manifest = json.loads((tmp_path / 'out' / '.batch_manifest.json').read_text())
+    assert manifest['scan.pdf']['output'] != manifest['scan.png']['output']
+
+
+class HoldingSession(FakeSession):
+    """
+    The API holds every poll for `held` seconds of the fake clock, the task is in progress on the first three polls.
+    """
+
+    def __init__(self, clock, held):
+        super().__init__()
+        self.clock = clock
+        self.held = held
+        self.params = []
+
+    def get(self, url, headers, params, stream):
+        self.params.append(params)
+        self.clock[0] += self.held
+        polls = len(self.params)
+        return FakeResponse(payload={'state': 'PROGRESS'}) if polls <= 3 else FakeResponse(body=b'# done')
+
+
+@pytest.mark.parametrize("held, expected_sleeps", [
+    (5, []),  # the API held the requests until `wait` ran out, polled again right away
+    (0, [1, 2, 4]),  # the API returned early, backed off instead of a busy loop
+])
+def test_poll_result_with_wait(cli, tmp_path, monkeypatch, held, expected_sleeps):
+    clock = [0.0]
+    sleeps = []
+    monkeypatch.setattr(cli.time, 'time', lambda: clock[0])
+    monkeypatch.setattr(cli.time, 'sleep', sleeps.append)
+    session = HoldingSession(clock, held)
+
+    state = cli.poll_result(session, 'task', str(tmp_path / 'a.md'), poll_interval=1, max_poll_interval=10, wait=5)
+
+    assert state == 'SUCCESS'
+    assert session.params == [{'wait': 5}] * 4
+    assert sleeps == expected_sleeps
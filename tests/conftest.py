@@ -0,0 +1,6 @@
+import os
+
+# The Celery app and the Redis clients are configured on import - point them at in-memory stand-ins
+os.environ.setdefault('CELERY_BROKER_URL', 'memory://')
+os.environ.setdefault('CELERY_RESULT_BACKEND', 'cache+memory://')
+os.environ.setdefault('REDIS_CACHE_URL', 'redis://localhost:6379/15')
@@ -0,0 +1,209 @@
+"""
+Lightweight stand-ins for the engines, to load-test the whole stack without GPUs or external endpoints:
+the Ollama API (`/api/version`, `/api/chat`, `/api/generate`) and the Marker-like remote API of `RemoteStrategy`.
+
+    python -m tests.loadtest.fake_servers --latency lognormal:-0.5,0.4 --tokens-per-second 40
+
+then point the API and the workers at them:
+
+    OLLAMA_HOST=http://localhost:11434 REMOTE_API_URL=http://localhost:8001/marker
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+FAKE_OLLAMA_VERSION = '0.0.0-fake'
+
+Distribution = Callable[[], float]
+
+
+def parse_distribution(spec: str, rng: Optional[random.Random] = None) -> Distribution:
+    """
+    Parses a latency distribution (in seconds) - `fixed:0.5` (or just `0.5`), `uniform:0.2,1.5`,
+    `normal:1.0,0.2`, `lognormal:mu,sigma` (of the underlying normal) or `exponential:mean`.
+    Negative samples are clipped to 0.
+    """
+    rng = rng or random.Random()
+    kind, _, params = spec.partition(':') if ':' in spec else ('fixed', '', spec)
+    try:
+        values = [float(value) for value in params.split(',') if value.strip()]
+    except ValueError:
+        raise ValueError(f"Invalid latency distribution '{spec}'")
+
+    samplers = {
+        'fixed': (1, lambda value: value),
+        'uniform': (2, rng.uniform),
+        'normal': (2, rng.gauss),
+        'lognormal': (2, rng.lognormvariate),
+        'exponential': (1, lambda mean: rng.expovariate(1 / mean) if mean else 0.0),
+    }
+    if kind not in samplers or len(values) != samplers[kind][0]:
+        raise ValueError(f"Invalid latency distribution '{spec}' - expected e.g. fixed:0.5, uniform:0.2,1.5, "
+                         f"normal:1.0,0.2, lognormal:-0.5,0.4 or exponential:0.5")
+    sampler = samplers[kind][1]
+    return lambda: max(0.0, sampler(*values))
+
+
+def fake_words(seed: str, count: int) -> List[str]:
+    """
+    Deterministic pseudo-words derived from `seed` - the same request always gets the same answer.
+    """
+    digest = hashlib.sha256(seed.encode('utf-8')).hexdigest()
+    return [digest[(index * 7) % 60:(index * 7) % 60 + 3 + index % 5] for index in range(count)]
+
+
+def _count_pages(document: bytes) -> int:
+    return max(1, len(re.findall(rb'/Type\s*/Page\b', document)))
+
+
+def _error_response(error_rate: float, rng: random.Random) -> Optional[JSONResponse]:
+    if error_rate and rng.random() < error_rate:
+        return JSONResponse({'error': 'injected failure'}, status_code=500)
+    return None
+
+
+def ollama_app(latency: Distribution = lambda: 0.0, tokens: int = 64, tokens_per_second: float = 0,
+               error_rate: float = 0, seed: Optional[int] = None) -> FastAPI:
+    """
+    Fake Ollama: answers with `tokens` deterministic tokens after the `latency` (time to the first token),
+    generated at `tokens_per_second` (0 - as fast as possible). Streams NDJSON unless `stream` is false,
+    like Ollama. `error_rate` of the requests fail with 500.
+    """
+    app = FastAPI(title='Fake Ollama')
+    rng = random.Random(seed)
+
+    async def tokens_of(seed_text: str, count: int) -> AsyncIterator[str]:
+        await asyncio.sleep(latency())
+        for word in fake_words(seed_text, count):
+            if tokens_per_second:
+                await asyncio.sleep(1 / tokens_per_second)
+            yield word + ' '
+
+    def chunk(model: str, done: bool, key: str, value, started: float, count: int = 0) -> dict:
+        message = {'model': model, 'created_at': datetime.now(timezone.utc).isoformat(), key: value, 'done': done}
+        if done:
+            message.update({'done_reason': 'stop', 'total_duration': int((time.perf_counter() - started) * 1e9),
+                            'eval_count': count})
+        return message
+
+    async def respond(body: dict, key: str, make_value: Callable[[str], object], seed_text: str, count: int):
+        started = time.perf_counter()
+        model = body.get('model', '')
+
+        if not body.get('stream', True):
+            text = ''.join([token async for token in tokens_of(seed_text, count)])
+            return JSONResponse(chunk(model, True, key, make_value(text), started, count))
+
+        async def stream():
+            async for token in tokens_of(seed_text, count):
+                yield json.dumps(chunk(model, False, key, make_value(token), started)) + '\n'
+            yield json.dumps(chunk(model, True, key, make_value(''), started, count)) + '\n'
+
+        return StreamingResponse(stream(), media_type='application/x-ndjson')
+
+    @app.get('/api/version')
+    async def version():
+        return {'version': FAKE_OLLAMA_VERSION}
+
+    @app.post('/api/chat')
+    async def chat(request: Request):
+        body = await request.json()
+        failure = _error_response(error_rate, rng)
+        if failure:
+            return failure
+        seed_text = body.get('model', '') + ''.join(str(message.get('content')) for message in body.get('messages', []))
+        return await respond(body, 'message', lambda text: {'role': 'assistant', 'content': text}, seed_text, tokens)
+
+    @app.post('/api/generate')
+    async def generate(request: Request):
+        body = await request.json()
+        failure = _error_response(error_rate, rng)
+        if failure:
+            return failure
+        prompt = body.get('prompt') or ''
+        # An empty prompt only loads the model (see model_warmup) - answered without tokens
+        return await respond(body, 'response', lambda text: text, body.get('model', '') + prompt,
+                             tokens if prompt else 0)
+
+    return app
+
+
+def remote_app(latency: Distribution = lambda: 0.0, page_latency: float = 0, error_rate: float = 0,
+               seed: Optional[int] = None) -> FastAPI:
+    """
+    Fake Marker-like remote API: answers with markdown derived from the document (and the `page_range`)
+    after the `latency` plus `page_latency` for every page. `error_rate` of the requests fail with 500.
+    """
+    app = FastAPI(title='Fake remote OCR API')
+    rng = random.Random(seed)
+
+    @app.post('/marker')
+    @app.post('/')
+    async def marker(request: Request):
+        form = await request.form()
+        document = await form['file'].read()
+        page_range = form.get('page_range')
+        if page_range:
+            first, last = map(int, page_range.split('-'))
+            pages = last - first + 1
+        else:
+            pages = _count_pages(document)
+
+        await asyncio.sleep(latency() + page_latency * pages)
+        failure = _error_response(error_rate, rng)
+        if failure:
+            return failure
+        seed_text = f"{len(document)}{page_range}"
+        output = '\n\n'.join(f"## Page\n\n{' '.join(fake_words(seed_text + str(page), 120))}" for page in range(pages))
+        return {'output': output, 'success': True}
+
+    return app
+
+
+async def serve(ollama_port: int, remote_port: int, host: str = '0.0.0.0', **options) -> None:
+    import uvicorn
+
+    servers = [
+        uvicorn.Server(uvicorn.Config(ollama_app(options['latency'], options['tokens'], options['tokens_per_second'],
+                                                 options['error_rate'], options['seed']),
+                                      host=host, port=ollama_port, log_level='warning')),
+        uvicorn.Server(uvicorn.Config(remote_app(options['latency'], options['page_latency'], options['error_rate'],
+                                                 options['seed']),
+                                      host=host, port=remote_port, log_level='warning')),
+    ]
+    print(f"Fake Ollama on http://{host}:{ollama_port}, fake remote API on http://{host}:{remote_port}/marker")
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Fake Ollama and remote OCR API servers for load testing')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--ollama-port', type=int, default=11434)
+    parser.add_argument('--remote-port', type=int, default=8001)
+    parser.add_argument('--latency', default='0',
+                        help='Latency distribution in seconds, e.g. fixed:0.5, uniform:0.2,1.5, normal:1.0,0.2, '
+                             'lognormal:-0.5,0.4 or exponential:0.5')
+    parser.add_argument('--tokens', type=int, default=64, help='Tokens generated by the fake Ollama per request')
+    parser.add_argument('--tokens-per-second', type=float, default=0, help='Token rate of the fake Ollama')
+    parser.add_argument('--page-latency', type=float, default=0, help='Extra latency per page of the remote API')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of the requests failing with 500')
+    parser.add_argument('--seed', type=int, help='Seed of the latency and error sampling')
+    args = parser.parse_args()
+
+    latency = parse_distribution(args.latency, random.Random(args.seed))
+    asyncio.run(serve(args.ollama_port, args.remote_port, args.host, latency=latency, tokens=args.tokens,
+                      tokens_per_second=args.tokens_per_second, page_latency=args.page_latency,
+                      error_rate=args.error_rate, seed=args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+"""
+Load test of the whole stack (FastAPI, Redis, Celery, engines) - sends OCR requests at a target rate and
+follows every task to its end, sampling the broker queue depth from `/metrics` meanwhile. Run the engines
+as fakes (see fake_servers.py) to test without GPUs:
+
+    python -m tests.loadtest.loadtest --rps 2 --duration 60 --mix remote=3,llama_vision=1
+    python -m tests.loadtest.loadtest --replay traffic.jsonl --speed 2
+
+Recorded traffic is JSON lines of the `/ocr/upload` form fields plus the path of the `file` and, optionally,
+the offset in seconds it was sent `at`, e.g. `{"at": 0.5, "file": "examples/example-invoice.pdf",
+"strategy": "remote", "ocr_cache": false}` - requests without offsets are sent at `--rps`.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import httpx
+
+DEFAULT_API_URL = os.getenv('LOADTEST_API_URL', 'http://localhost:8000')
+TERMINAL_STATES = ('SUCCESS', 'FAILURE', 'REVOKED')
+PERCENTILES = (50, 90, 95, 99)
+QUEUE_DEPTH_METRIC = re.compile(r'^text_extract_queue_depth\{[^}]*\}\s+(\S+)', re.MULTILINE)
+
+
+class LoadRequest(NamedTuple):
+    at: float  # seconds from the start of the test
+    file: str
+    strategy: str
+    model: Optional[str] = None
+    prompt: Optional[str] = None
+    ocr_cache: bool = False
+    language: str = 'en'
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """
+    Parses a strategy mix - `remote=3,llama_vision=1` sends 3 of every 4 requests to the remote strategy.
+    """
+    weights = {}
+    for item in filter(None, (item.strip() for item in mix.split(','))):
+        strategy, _, weight = item.partition('=')
+        weights[strategy] = float(weight or 1)
+    if not weights or sum(weights.values()) <= 0:
+        raise ValueError(f"Invalid strategy mix '{mix}'")
+    return weights
+
+
+def arrivals(rps: float, duration: float, poisson: bool = True, rng: Optional[random.Random] = None) -> List[float]:
+    """
+    Offsets of the requests sent at `rps` for `duration` seconds - Poisson arrivals (an open workload,
+    like independent clients) or evenly spaced.
+    """
+    rng = rng or random.Random()
+    offsets, at = [], 0.0
+    while True:
+        at += rng.expovariate(rps) if poisson else 1 / rps
+        if at > duration:
+            return offsets
+        offsets.append(at)
+
+
+def synthetic_workload(mix: Dict[str, float], files: List[str], rps: float, duration: float, poisson: bool = True,
+                       prompt_ratio: float = 0, prompt: str = 'Convert the document to markdown', model: str = None,
+                       seed: Optional[int] = None) -> List[LoadRequest]:
+    rng = random.Random(seed)
+    strategies, weights = list(mix), list(mix.values())
+    return [
+        LoadRequest(at, rng.choice(files), rng.choices(strategies, weights)[0], model,
+                    prompt if rng.random() < prompt_ratio else None)
+        for at in arrivals(rps, duration, poisson, rng)
+    ]
+
+
+def recorded_workload(path: str, rps: float = 1, speed: float = 1) -> List[LoadRequest]:
+    """
+    Replays recorded traffic - the offsets are divided by `speed`; requests without one are sent at `rps`.
+    """
+    requests = []
+    with open(path) as f:
+        for line_no, line in enumerate(filter(None, map(str.strip, f))):
+            record = json.loads(line)
+            at = record.pop('at', line_no / rps)
+            requests.append(LoadRequest(at=float(at) / speed, **{
+                field: value for field, value in record.items() if field in LoadRequest._fields
+            }))
+    return sorted(requests, key=lambda request: request.at)
+
+
+class Outcome(NamedTuple):
+    strategy: str
+    submit_latency: Optional[float]
+    latency: Optional[float]  # from sending the request until the task ended
+    state: Optional[str]
+    error: Optional[str]
+
+
+def percentiles(values: Iterable[float]) -> Dict[str, float]:
+    values = sorted(values)
+    if not values:
+        return {}
+    result = {f"p{percentile}": round(values[min(len(values) - 1, int(len(values) * percentile / 100))], 3)
+              for percentile in PERCENTILES}
+    result['max'] = round(values[-1], 3)
+    return result
+
+
+async def send(client: httpx.AsyncClient, request: LoadRequest, documents: Dict[str, bytes], poll_interval: float,
+               task_timeout: float) -> Outcome:
+    started = time.perf_counter()
+    data = {'strategy': request.strategy, 'ocr_cache': str(request.ocr_cache), 'language': request.language}
+    data.update({field: getattr(request, field) for field in ('model', 'prompt') if getattr(request, field)})
+    try:
+        response = await client.post('/ocr/upload', data=data,
+                                     files={'file': (os.path.basename(request.file), documents[request.file])})
+    except httpx.HTTPError as e:
+        return Outcome(request.strategy, None, None, None, f"submit: {type(e).__name__}")
+    submit_latency = time.perf_counter() - started
+    if response.status_code != 200:
+        return Outcome(request.strategy, submit_latency, None, None, f"submit: HTTP {response.status_code}")
+
+    task_id = response.json()['task_id']
+    while time.perf_counter() - started < task_timeout:
+        await asyncio.sleep(poll_interval)
+        try:
+            response = await client.get(f'/ocr/result/{task_id}')
+        except httpx.HTTPError as e:
+            return Outcome(request.strategy, submit_latency, None, None, f"result: {type(e).__name__}")
+        if response.status_code != 200:
+            return Outcome(request.strategy, submit_latency, None, None, f"result: HTTP {response.status_code}")
+        state = response.json().get('state')
+        if state in TERMINAL_STATES:
+            return Outcome(request.strategy, submit_latency, time.perf_counter() - started, state,
+                           None if state == 'SUCCESS' else f"task: {state}")
+    return Outcome(request.strategy, submit_latency, None, None, 'timeout')
+
+
+async def queue_depth(client: httpx.AsyncClient) -> Optional[float]:
+    """
+    Messages waiting in the broker queues, as exported by the API on `/metrics` - None when not available.
+    """
+    try:
+        response = await client.get('/metrics')
+    except httpx.HTTPError:
+        return None
+    if response.status_code != 200:
+        return None
+    depths = QUEUE_DEPTH_METRIC.findall(response.text)
+    return sum(float(depth) for depth in depths) if depths else None
+
+
+async def sample_queue(client: httpx.AsyncClient, started: float, interval: float, samples: list) -> None:
+    while True:
+        depth = await queue_depth(client)
+        if depth is not None:
+            samples.append((round(time.perf_counter() - started, 3), depth))
+        await asyncio.sleep(interval)
+
+
+def queue_growth(samples: List[tuple]) -> Optional[dict]:
+    """
+    The queue depth at the start, its maximum and at the end, and its growth (messages/s, least squares) -
+    a steadily growing queue means the workers do not keep up with the rate.
+    """
+    if not samples:
+        return None
+    growth = 0.0
+    if len(samples) > 1:
+        mean_t = sum(t for t, _ in samples) / len(samples)
+        mean_depth = sum(depth for _, depth in samples) / len(samples)
+        variance = sum((t - mean_t) ** 2 for t, _ in samples)
+        if variance:
+            growth = sum((t - mean_t) * (depth - mean_depth) for t, depth in samples) / variance
+    return {'start': samples[0][1], 'max': max(depth for _, depth in samples), 'end': samples[-1][1],
+            'growth_per_second': round(growth, 3), 'samples': samples}
+
+
+async def run_load(client: httpx.AsyncClient, workload: List[LoadRequest], poll_interval: float = 1,
+                   task_timeout: float = 600, sample_interval: float = 5) -> dict:
+    """
+    Sends the workload (open loop - requests are sent on schedule, whether the previous ones ended or not)
+    and reports the latency percentiles, the error rates and the queue growth.
+    """
+    documents = {}
+    for request in workload:
+        if request.file not in documents:
+            with open(request.file, 'rb') as f:
+                documents[request.file] = f.read()
+
+    samples = []
+    started = time.perf_counter()
+    sampler = asyncio.ensure_future(sample_queue(client, started, sample_interval, samples))
+    lag = 0.0
+
+    async def scheduled(request: LoadRequest) -> Outcome:
+        nonlocal lag
+        await asyncio.sleep(max(0.0, request.at - (time.perf_counter() - started)))
+        lag = max(lag, time.perf_counter() - started - request.at)
+        return await send(client, request, documents, poll_interval, task_timeout)
+
+    try:
+        outcomes = await asyncio.gather(*(scheduled(request) for request in workload))
+    finally:
+        sampler.cancel()
+    elapsed = time.perf_counter() - started
+    return report(outcomes, elapsed, workload[-1].at if workload else 0, lag, samples)
+
+
+def report(outcomes: List[Outcome], elapsed: float, send_duration: float, lag: float, samples: List[tuple]) -> dict:
+    def summary(outcomes: List[Outcome]) -> dict:
+        errors = {}
+        for outcome in outcomes:
+            if outcome.error:
+                errors[outcome.error] = errors.get(outcome.error, 0) + 1
+        return {
+            'requests': len(outcomes),
+            'succeeded': sum(outcome.state == 'SUCCESS' for outcome in outcomes),
+            'error_rate': round(sum(errors.values()) / len(outcomes), 4) if outcomes else 0,
+            'errors': errors,
+            'submit_latency': percentiles(o.submit_latency for o in outcomes if o.submit_latency is not None),
+            'latency': percentiles(o.latency for o in outcomes if o.latency is not None and o.state == 'SUCCESS'),
+        }
+
+    by_strategy = {}
+    for outcome in outcomes:
+        by_strategy.setdefault(outcome.strategy, []).append(outcome)
+    return {
+        **summary(outcomes),
+        'duration': round(elapsed, 3),
+        'sent_rps': round(len(outcomes) / send_duration, 3) if send_duration else None,
+        'completed_rps': round(sum(o.state == 'SUCCESS' for o in outcomes) / elapsed, 3) if elapsed else None,
+        'max_send_lag': round(lag, 3),
+        'queue_depth': queue_growth(samples),
+        'strategies': {strategy: summary(outcomes) for strategy, outcomes in sorted(by_strategy.items())},
+    }
+
+
+def format_report(result: dict) -> str:
+    def latencies(summary: dict) -> str:
+        return ' '.join(f"{name}={value:.2f}s" for name, value in summary['latency'].items()) or '-'
+
+    lines = [
+        f"requests: {result['requests']}, succeeded: {result['succeeded']}, error rate: {result['error_rate']:.2%}, "
+        f"sent: {result['sent_rps']} rps, completed: {result['completed_rps']} rps, "
+        f"max send lag: {result['max_send_lag']}s",
+        f"submit latency: {' '.join(f'{k}={v:.3f}s' for k, v in result['submit_latency'].items()) or '-'}",
+        f"latency: {latencies(result)}",
+    ]
+    queue = result['queue_depth']
+    if queue:
+        lines.append(f"queue depth: start={queue['start']:g} max={queue['max']:g} end={queue['end']:g} "
+                     f"growth={queue['growth_per_second']:+g}/s")
+    for error, count in sorted(result['errors'].items()):
+        lines.append(f"error {error}: {count}")
+    for strategy, summary in result['strategies'].items():
+        lines.append(f"  {strategy:<20} requests={summary['requests']} error rate={summary['error_rate']:.2%} "
+                     f"latency: {latencies(summary)}")
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Load test of the text extraction API')
+    parser.add_argument('--url', default=DEFAULT_API_URL, help='URL of the API')
+    parser.add_argument('--replay', help='Replay the recorded traffic from this JSON lines file')
+    parser.add_argument('--speed', type=float, default=1, help='Replay speed-up, e.g. 2 for twice as fast')
+    parser.add_argument('--rps', type=float, default=1, help='Target rate (requests per second)')
+    parser.add_argument('--duration', type=float, default=60, help='Duration of the synthetic workload in seconds')
+    parser.add_argument('--constant', action='store_true', help='Evenly spaced requests instead of Poisson arrivals')
+    parser.add_argument('--mix', default='remote=1', help='Strategy mix of the synthetic workload, e.g. remote=3,llama_vision=1')
+    parser.add_argument('--files', default='examples/*.pdf', help='Documents of the synthetic workload (glob)')
+    parser.add_argument('--prompt-ratio', type=float, default=0, help='Fraction of the requests with an LLM prompt')
+    parser.add_argument('--model', help='Model sent with the requests')
+    parser.add_argument('--seed', type=int, help='Seed of the synthetic workload')
+    parser.add_argument('--poll-interval', type=float, default=1, help='Result polling interval in seconds')
+    parser.add_argument('--task-timeout', type=float, default=600, help='Seconds to wait for a task to end')
+    parser.add_argument('--sample-interval', type=float, default=5, help='Queue depth sampling interval in seconds')
+    parser.add_argument('--max-connections', type=int, default=100)
+    parser.add_argument('--output', help='Write the report to this JSON file')
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        workload = recorded_workload(args.replay, args.rps, args.speed)
+    else:
+        files = sorted(glob.glob(args.files))
+        if not files:
+            parser.error(f"No documents match '{args.files}'")
+        workload = synthetic_workload(parse_mix(args.mix), files, args.rps, args.duration, not args.constant,
+                                      args.prompt_ratio, model=args.model, seed=args.seed)
+    print(f"Sending {len(workload)} requests to {args.url}")
+
+    async def run() -> dict:
+        limits = httpx.Limits(max_connections=args.max_connections)
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.task_timeout) as client:
+            return await run_load(client, workload, args.poll_interval, args.task_timeout, args.sample_interval)
+
+    result = asyncio.run(run())
+    print(format_report(result))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import httpx
+import ollama
+import pytest
+from fastapi import FastAPI, Form, UploadFile
+from fastapi.responses import PlainTextResponse
+
+from .fake_servers import FAKE_OLLAMA_VERSION, ollama_app, parse_distribution, remote_app
+from .loadtest import LoadRequest, parse_mix, queue_growth, recorded_workload, run_load, synthetic_workload
+
+
+def test_fake_ollama_speaks_the_ollama_api():
+    async def run():
+        client = ollama.AsyncClient(host='http://ollama', transport=httpx.ASGITransport(ollama_app(tokens=5)))
+        chunks = [chunk async for chunk in await client.chat('fake', [{'role': 'user', 'content': 'hi'}],
+                                                             stream=True)]
+        generated = await client.generate('fake', 'Summarize: text')
+        warmup = await client.generate('fake', '')
+        version = await client._client.get('/api/version')
+        return chunks, generated, warmup, version.json()
+
+    chunks, generated, warmup, version = asyncio.run(run())
+
+    assert len(chunks) == 6 and chunks[-1]['done']
+    assert ''.join(chunk['message']['content'] for chunk in chunks).count(' ') == 5
+    assert len(generated['response'].split()) == 5
+    assert warmup['response'] == ''
+    assert version == {'version': FAKE_OLLAMA_VERSION}
+
+
+def test_fake_remote_api_answers_page_ranges():
+    async def run():
+        async with httpx.AsyncClient(base_url='http://remote', transport=httpx.ASGITransport(remote_app())) as client:
+            return await client.post('/marker', files={'file': ('document.pdf', b'%PDF-1.4', 'application/pdf')},
+                                     data={'page_range': '2-4'})
+
+    response = asyncio.run(run())
+
+    assert response.status_code == 200
+    assert response.json()['output'].count('## Page') == 3
+
+
+def test_parse_distribution():
+    assert parse_distribution('0.5')() == 0.5
+    assert 0.2 <= parse_distribution('uniform:0.2,0.3')() <= 0.3
+    assert parse_distribution('normal:-5,0.1')() == 0
+    with pytest.raises(ValueError):
+        parse_distribution('gamma:1')
+
+
+def test_workloads(tmp_path):
+    workload = synthetic_workload(parse_mix('remote=1,llama_vision=0'), ['a.pdf'], rps=10, duration=5, seed=1)
+    assert 20 < len(workload) < 80
+    assert {request.strategy for request in workload} == {'remote'}
+    assert all(a.at <= b.at for a, b in zip(workload, workload[1:]))
+
+    traffic = tmp_path / 'traffic.jsonl'
+    traffic.write_text('{"at": 4, "file": "a.pdf", "strategy": "remote", "ignored": 1}\n'
+                       '{"file": "b.pdf", "strategy": "llama_vision", "prompt": "Summarize"}\n')
+    assert recorded_workload(str(traffic), rps=2, speed=2) == [
+        LoadRequest(0.25, 'b.pdf', 'llama_vision', prompt='Summarize'), LoadRequest(2.0, 'a.pdf', 'remote')]
+
+
+def test_queue_growth():
+    assert queue_growth([(0, 0), (1, 2), (2, 4)])['growth_per_second'] == 2
+    assert queue_growth([]) is None
+
+
+def test_run_load_reports_latencies_errors_and_queue_depth(tmp_path):
+    api = FastAPI()
+    polls = {}
+
+    @api.post('/ocr/upload')
+    async def upload(strategy: str = Form(...), file: UploadFile = None):
+        if strategy == 'unknown':
+            return PlainTextResponse('Unknown strategy', status_code=400)
+        task_id = f'task-{len(polls)}'
+        polls[task_id] = 0
+        return {'task_id': task_id}
+
+    @api.get('/ocr/result/{task_id}')
+    async def result(task_id: str):
+        polls[task_id] += 1
+        return {'state': 'SUCCESS' if polls[task_id] > 1 else 'PROGRESS'}
+
+    @api.get('/metrics')
+    async def metrics():
+        return PlainTextResponse(f'text_extract_queue_depth{{queue="ocr"}} {len(polls)}.0\n')
+
+    document = tmp_path / 'document.pdf'
+    document.write_bytes(b'%PDF-1.4')
+    workload = [LoadRequest(0.01 * index, str(document), 'unknown' if index == 3 else 'remote') for index in range(4)]
+
+    async def run():
+        async with httpx.AsyncClient(base_url='http://api', transport=httpx.ASGITransport(api)) as client:
+            return await run_load(client, workload, poll_interval=0.01, sample_interval=0.01)
+
+    result = asyncio.run(run())
+
+    assert result['requests'] == 4 and result['succeeded'] == 3
+    assert result['errors'] == {'submit: HTTP 400': 1}
+    assert result['error_rate'] == 0.25
+    assert set(result['latency']) == {'p50', 'p90', 'p95', 'p99', 'max'}
+    assert result['strategies']['remote']['error_rate'] == 0
+    assert result['queue_depth']['max'] == 3
+    json.dumps(result)
@@ -0,0 +1,118 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+import redis
+
+from text_extract_api.extract.checkpoints import PageCheckpoints, checkpoint_key, may_resume
+from text_extract_api.extract.extract_result import PageSegment
+from text_extract_api.extract.strategies.remote import RemoteStrategy
+from text_extract_api.files.file_formats.pdf import PdfFileFormat
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+        self.expires = {}
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field.encode()] = value.encode()
+
+    def expire(self, key, ttl):
+        self.expires[key] = ttl
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class BrokenRedis:
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise redis.ConnectionError('Connection refused')
+        return fail
+
+
+def test_checkpoints_round_trip():
+    client = FakeRedis()
+    checkpoints = PageCheckpoints(client, checkpoint_key('remote', 'hash', 'en'), ttl=60)
+
+    checkpoints.save(PageSegment(1, 'first', 'remote', 100.0, 1.5))
+    checkpoints.save(PageSegment(3, 'third and fourth', 'remote', 101.0, 2.5, last_page_no=4))
+    pages = checkpoints.load()
+
+    assert sorted(pages) == [1, 3]
+    assert pages[3].to_dict() == {'page_no': 3, 'last_page_no': 4, 'strategy': 'remote', 'started_at': 101.0,
+                                  'duration': 2.5, 'text': 'third and fourth'}
+    assert client.expires == {checkpoints.key: 60}
+    checkpoints.clear()
+    assert checkpoints.load() == {}
+
+
+def test_checkpoint_key_depends_on_the_model_and_prompt():
+    key = checkpoint_key('llama_vision', 'hash', 'en', 'llama3.2-vision', 'Extract the text')
+
+    assert key.startswith('cache:checkpoint:llama_vision:llama3.2-vision:') and key.endswith(':hash:en')
+    assert key == checkpoint_key('llama_vision', 'hash', 'en', 'llama3.2-vision', 'Extract the text')
+    assert key != checkpoint_key('llama_vision', 'hash', 'en', 'llama3.2-vision', 'Extract the tables')
+    assert key != checkpoint_key('llama_vision', 'hash', 'en', 'minicpm-v', 'Extract the text')
+
+
+@pytest.mark.parametrize("ocr_cache, retries, delivery_info, expected", [
+    (True, 0, {'redelivered': False}, True),
+    (False, 0, {'redelivered': False}, False),
+    (False, 0, None, False),
+    (False, 1, {'redelivered': False}, True),
+    (False, 0, {'redelivered': True}, True),
+])
+def test_may_resume(ocr_cache, retries, delivery_info, expected):
+    request = SimpleNamespace(retries=retries, delivery_info=delivery_info)
+
+    assert may_resume(ocr_cache, request) is expected
+
+
+def test_redis_failures_do_not_fail_the_extraction(caplog):
+    checkpoints = PageCheckpoints(BrokenRedis(), 'key')
+
+    checkpoints.save(PageSegment(1, 'text'))
+    checkpoints.clear()
+    assert checkpoints.load() == {}
+    assert [record.levelname for record in caplog.records] == ['WARNING'] * 3
+
+
+def test_strategy_resumes_from_the_first_missing_page_range(monkeypatch):
+    monkeypatch.setenv('REMOTE_API_URL', 'http://remote.invalid/marker')
+    checkpoints = PageCheckpoints(FakeRedis(), 'key')
+    checkpoints.save(PageSegment(1, 'pages 0-1', 'remote', last_page_no=2))
+    checkpoints.save(PageSegment(3, 'pages 2-2', 'remote'))  # sharded differently - requested again
+    strategy = RemoteStrategy({'shard_pages': 2})
+    strategy.set_checkpoints(checkpoints)
+    requested = []
+
+    def request_segment(url, pdf_file, language, page_range=None):
+        requested.append(page_range)
+        return PageSegment(page_range[0] + 1, f'pages {page_range[0]}-{page_range[1]}', 'remote',
+                           last_page_no=page_range[1] + 1)
+
+    pdf = PdfFileFormat(b'%PDF-1.4 stand-in', 'document.pdf', 'application/pdf')
+    with patch.object(RemoteStrategy, '_count_pages', return_value=5), \
+            patch.object(strategy, '_request_segment', side_effect=request_segment):
+        result = strategy.extract_text(pdf)
+
+    assert sorted(requested) == [(2, 3), (4, 4)]
+    assert result.text == 'pages 0-1\n\npages 2-3\n\npages 4-4'
+    assert sorted(checkpoints.load()) == [1, 3, 5]
@@ -0,0 +1,67 @@
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip('docling')
+
+from text_extract_api.extract.strategies.docling import DoclingDocument, DoclingStrategy
+from text_extract_api.files.file_formats.pdf import PdfFileFormat
+
+PDF = PdfFileFormat(b'%PDF-1.4 stand-in', 'document.pdf', 'application/pdf')
+
+TABLE = "| Name | Qty |\n|------|-----|\n| a | 1 |\n| b | 2 |"
+
+
+@pytest.mark.parametrize("config, num_pages, expected", [
+    ({}, 120, []),
+    ({'parallel_workers': 4}, 30, [(1, 30)]),
+    ({'parallel_workers': 4}, 120, [(1, 25), (26, 50), (51, 75), (76, 100), (101, 120)]),
+    ({'parallel_workers': 4, 'parallel_min_pages': 2}, 10, [(1, 3), (4, 6), (7, 9), (10, 10)]),
+])
+def test_plan_page_ranges(config, num_pages, expected):
+    strategy = DoclingStrategy(config)
+
+    with patch.object(DoclingStrategy, '_count_pages', return_value=num_pages):
+        assert strategy._plan_page_ranges(PDF, 'document.pdf') == expected
+
+
+def test_documents_are_converted_sequentially_without_concatenate(monkeypatch):
+    monkeypatch.delattr(DoclingDocument, 'concatenate', raising=False)
+
+    with patch.object(DoclingStrategy, '_count_pages', return_value=120):
+        assert DoclingStrategy({'parallel_workers': 4})._plan_page_ranges(PDF, 'document.pdf') == []
+
+
+def test_merge_documents_concatenates_in_page_order(monkeypatch):
+    monkeypatch.setattr(DoclingDocument, 'concatenate', lambda documents: '+'.join(documents), raising=False)
+
+    assert DoclingStrategy._merge_documents(['pages 1-25', 'pages 26-50']) == 'pages 1-25+pages 26-50'
+
+
+def test_stitch_markdown_drops_the_repeated_table_header():
+    first = "# Report\n\n" + TABLE + "\n"
+    continuation = "| Name | Qty |\n|------|-----|\n| c | 3 |\n\nAfter the table"
+
+    stitched = DoclingStrategy._stitch_markdown([first, continuation])
+
+    assert stitched == "# Report\n\n" + TABLE + "\n| c | 3 |\n\nAfter the table"
+
+
+def test_stitch_markdown_keeps_a_continuation_row_read_as_header():
+    # The range boundary split the table after a row, Docling took the next row for a header
+    continuation = "| c | 3 |\n|---|---|\n| d | 4 |"
+
+    assert DoclingStrategy._stitch_markdown([TABLE, continuation]) == TABLE + "\n| c | 3 |\n| d | 4 |"
+
+
+def test_stitch_markdown_separates_other_chunks():
+    another_table = "| Other | Columns | Here |\n|---|---|---|\n| x | y | z |"
+
+    assert DoclingStrategy._stitch_markdown(["Page one\n", "\nPage two"]) == "Page one\n\nPage two"
+    assert DoclingStrategy._stitch_markdown([TABLE, another_table]) == TABLE + "\n\n" + another_table
+
+
+def test_table_header():
+    assert DoclingStrategy._table_header(TABLE.split('\n')) == '| Name | Qty |'
+    assert DoclingStrategy._table_header(['Text', '| a | 1 |']) is None
+    assert DoclingStrategy._table_header([]) is None
@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from text_extract_api.extract.extract_result import ExtractResult, PageSegment
+
+
+def test_text_is_gathered_once():
+    gatherer = MagicMock(return_value="gathered")
+    result = ExtractResult(object(), gatherer)
+
+    assert result.text == "gathered"
+    assert result.text == "gathered"
+    gatherer.assert_called_once()
+
+
+def test_from_pages_joins_page_texts_in_order():
+    pages = [PageSegment(1, "one", "test"), PageSegment(2, "two", "test"), PageSegment(3, "three", "test")]
+    result = ExtractResult.from_pages(pages, "\n\n")
+
+    assert result.text == "one\n\ntwo\n\nthree"
+    assert [segment.text for segment in result.page_range(2, 5)] == ["two", "three"]
+
+
+def test_page_text_is_gathered_lazily_once():
+    gatherer = MagicMock(return_value="page")
+    segment = PageSegment(1, text_gatherer=gatherer)
+
+    gatherer.assert_not_called()
+    assert segment.text == "page"
+    assert segment.to_dict()["text"] == "page"
+    gatherer.assert_called_once()
+
+
+def test_page_segment_requires_text():
+    with pytest.raises(ValueError):
+        PageSegment(1)
+
+
+def test_derived_outputs_are_memoized():
+    producer = MagicMock(side_effect=lambda result: result.text.upper())
+    result = ExtractResult.from_text("text")
+
+    assert result.derived("upper", producer) == "TEXT"
+    assert result.derived("upper", producer) == "TEXT"
+    producer.assert_called_once()
+
+
+def test_page_offsets_map_pages_into_text():
+    result = ExtractResult.from_pages([PageSegment(1, "one"), PageSegment(2, "two")], "\n\n")
+
+    assert [result.text[start:end] for start, end in result.page_offsets()] == ["one", "two"]
+    assert ExtractResult("text", lambda value: value).page_offsets() is None
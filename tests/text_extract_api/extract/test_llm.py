@@ -0,0 +1,72 @@
+from unittest.mock import MagicMock, patch
+
+from text_extract_api.extract.llm import split_text, estimate_tokens, transform_text_chunked, chunk_cache_key
+from text_extract_api.extract.strategies.remote import RemoteStrategy
+from text_extract_api.files.file_formats.pdf import PdfFileFormat
+
+
+def test_split_text_respects_token_budget_and_boundaries():
+    paragraphs = [f"Paragraph {i} " + "word " * 20 for i in range(10)]
+    text = "\n\n".join(paragraphs)
+
+    chunks = split_text(text, max_tokens=60)
+
+    assert all(estimate_tokens(chunk) <= 60 for chunk in chunks)
+    assert "\n\n".join(chunks) == text
+
+
+def test_split_text_keeps_pages_whole():
+    pages = ["page one\n\nstill one", "two", "page three", "four " * 10]
+
+    chunks = split_text("ignored", max_tokens=5, pages=pages)
+
+    assert chunks == ["page one\n\nstill one", "two\n\npage three", "four " * 4, "four " * 4, "four four "]
+
+
+def test_split_text_on_the_pages_of_a_strategy_result(monkeypatch):
+    monkeypatch.setenv('REMOTE_API_URL', 'http://remote.invalid/marker')
+    outputs = {(0, 0): "Page 1 intro\n\nPage 1 more", (1, 1): "Page 2 text\n\nPage 2 end", (2, 2): "Page 3"}
+    strategy = RemoteStrategy({'shard_pages': 1})
+    pdf = PdfFileFormat(b'%PDF-1.4 stand-in', 'document.pdf', 'application/pdf')
+
+    with patch.object(RemoteStrategy, '_count_pages', return_value=3), \
+            patch.object(strategy, '_request', side_effect=lambda url, pdf_file, language, page_range: outputs[page_range]):
+        result = strategy.extract_text(pdf)
+
+    # Packing paragraphs puts the start of page 2 into the chunk of page 1
+    assert split_text(result.text, max_tokens=10) == ["Page 1 intro\n\nPage 1 more\n\nPage 2 text",
+                                                      "Page 2 end\n\nPage 3"]
+    assert split_text(result.text, max_tokens=10, pages=[page.text for page in result.pages]) == \
+        ["Page 1 intro\n\nPage 1 more", "Page 2 text\n\nPage 2 end\n\nPage 3"]
+
+
+def test_split_text_cuts_oversized_lines():
+    chunks = split_text("x" * 100, max_tokens=10)
+
+    assert chunks == ["x" * 40, "x" * 40, "x" * 20]
+
+
+def test_transform_text_chunked_keeps_order_and_uses_cache():
+    client = MagicMock()
+    client.generate.side_effect = lambda model, prompt, **kwargs: {'response': prompt.upper()}
+    cache = {chunk_cache_key('m', 'p:', 'bbbb'): b'CACHED'}
+    cache_client = MagicMock()
+    cache_client.get.side_effect = cache.get
+    progress = []
+
+    result = transform_text_chunked(client, 'm', 'p:', 'aaaa\n\nbbbb\n\ncccc', max_tokens=1, concurrency=3,
+                                    cache=cache_client, on_chunk_done=lambda done, total: progress.append(total))
+
+    assert result == 'P:AAAA\n\nCACHED\n\nP:CCCC'
+    assert client.generate.call_count == 2
+    assert cache_client.set.call_count == 2
+    assert progress == [3, 3, 3]
+
+
+def test_transform_text_chunked_reduces_outputs():
+    client = MagicMock()
+    client.generate.side_effect = lambda model, prompt, **kwargs: {'response': f'[{prompt}]'}
+
+    result = transform_text_chunked(client, 'm', 'p:', 'aaaa\n\nbbbb', max_tokens=1, concurrency=2, reduce_prompt='r:')
+
+    assert result == '[r:[p:aaaa]\n\n[p:bbbb]]'
@@ -0,0 +1,85 @@
+import json
+import threading
+
+from text_extract_api.extract import model_warmup
+
+CONFIG = """
+strategies:
+  docling:
+    class: text_extract_api.extract.strategies.docling.DoclingStrategy
+  remote:
+    class: text_extract_api.extract.strategies.remote.RemoteStrategy
+    model: marker
+  llama_vision:
+    class: text_extract_api.extract.strategies.ollama.OllamaStrategy
+    model: llama3.2-vision
+    host: http://gpu:11434
+"""
+
+
+def test_models_to_warm_are_the_models_of_ollama_strategies(tmp_path, monkeypatch):
+    config_path = tmp_path / 'strategies.yaml'
+    config_path.write_text(CONFIG)
+    monkeypatch.setenv('OCR_CONFIG_PATH', str(config_path))
+    monkeypatch.setenv('OLLAMA_HOST', 'http://ollama:11434')
+    monkeypatch.setenv('OLLAMA_WARMUP_MODELS', 'llama3.1')
+
+    assert model_warmup.models_to_warm() == [('http://gpu:11434', 'llama3.2-vision'), ('http://ollama:11434', 'llama3.1')]
+
+
+def test_no_models_to_warm_without_ollama_strategies(tmp_path, monkeypatch):
+    config_path = tmp_path / 'strategies.yaml'
+    config_path.write_text(CONFIG.split('  llama_vision:')[0])
+    monkeypatch.delenv('OLLAMA_WARMUP_MODELS', raising=False)
+
+    assert model_warmup.models_to_warm(str(config_path)) == []
+    assert model_warmup.models_to_warm(str(tmp_path / 'missing.yaml')) == []
+
+
+def test_warm_up_status_is_kept_by_host_and_model(monkeypatch):
+    failures = {('http://gpu:11434', 'llama3.2-vision'): 1}  # e.g. Ollama still starting on the first attempt
+
+    class FakeClient:
+        def __init__(self, host):
+            self.host = host
+
+        def generate(self, model, prompt, keep_alive):
+            if failures.get((self.host, model)):
+                failures[(self.host, model)] -= 1
+                raise ConnectionError('Connection refused')
+
+    monkeypatch.setattr(model_warmup, 'Client', FakeClient)
+    monkeypatch.setattr(model_warmup, '_models_status', {})
+    monkeypatch.setattr(model_warmup.time, 'sleep', lambda seconds: None)
+
+    assert model_warmup.warm_up_models([('http://gpu:11434', 'llama3.2-vision'),
+                                        ('http://ollama:11434', 'llama3.2-vision')], timeout=60)
+
+    gpu, ollama = model_warmup.models_status()
+    assert (gpu['host'], gpu['model'], gpu['status'], gpu['attempts']) == \
+        ('http://gpu:11434', 'llama3.2-vision', 'warm', 2)
+    assert gpu['last_error'] == 'Connection refused' and gpu['failed_at'] <= gpu['warmed_at']
+    assert (ollama['host'], ollama['status'], ollama['attempts']) == ('http://ollama:11434', 'warm', 1)
+    assert 'last_error' not in ollama
+    json.dumps({'ready': True, 'models': model_warmup.models_status()})  # published by the heartbeat
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.set_calls = threading.Semaphore(0)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = (json.loads(value), ex)
+        self.set_calls.release()
+
+
+def test_readiness_is_reported_with_a_ttl_until_stopped(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(model_warmup, '_redis_client', lambda: client)
+
+    stopped = model_warmup.start_readiness_heartbeat('worker_ready:host', {'ready': True}, ttl=60, interval=0.01)
+    assert client.set_calls.acquire(timeout=1) and client.set_calls.acquire(timeout=1)  # refreshed
+    stopped.set()
+
+    assert client.values == {'worker_ready:host': ({'ready': True}, 60)}
@@ -0,0 +1,67 @@
+import cProfile
+import pstats
+import subprocess
+import sys
+import time
+
+from text_extract_api.extract.extract_result import PageSegment
+from text_extract_api.extract.profiling import (
+    finish_timeline, save_profile, start_profiler, start_timeline
+)
+from text_extract_api.stages import record_stage
+
+
+def test_timeline():
+    started_at = time.time()
+    timeline = start_timeline(started_at, enqueued_at=started_at - 2)
+    with timeline.stage('extract'):
+        record_stage('convert', 0.25)
+    timeline.add_pages([PageSegment(1, 'a', 'test', started_at, 0.1), PageSegment(2, 'b', 'test', started_at, 0.9),
+                        PageSegment(3, 'c', 'test')])
+    finish_timeline()
+    record_stage('convert', 1.0)  # no task running - ignored
+
+    result = timeline.to_dict()
+
+    assert result['queue_wait'] == 2
+    assert result['convert'] == 0.25
+    assert 'extract' in result and result['total'] >= 0
+    assert [page['page_no'] for page in result['pages']] == [1, 2]
+    assert result['slowest_page'] == {'page_no': 2, 'last_page_no': None, 'duration': 0.9}
+    assert result['peak_rss'] > 0
+
+
+def test_profiler_is_sampled(monkeypatch):
+    timeline = start_timeline(time.time())
+    assert start_profiler(timeline) is None
+
+    monkeypatch.setenv('TASK_PROFILE_SAMPLE_RATE', '1')
+    assert isinstance(start_profiler(timeline), cProfile.Profile)
+    finish_timeline()
+
+
+def test_save_profile(tmp_path, monkeypatch):
+    profiles = tmp_path / 'storage_profiles'
+    profiles.mkdir()
+    (profiles / 'local.yaml').write_text(
+        f"strategy: local_filesystem\nsettings:\n  root_path: {tmp_path / 'storage'}\n")
+    monkeypatch.setenv('STORAGE_PROFILE_PATH', str(profiles))
+    profiler = cProfile.Profile()
+    profiler.enable()
+    sorted(range(1000), key=lambda number: -number)
+
+    reference = save_profile('task-1', profiler, 'local')
+
+    assert reference['key'] == 'results/task-1.prof'
+    stats = pstats.Stats(str(tmp_path / 'storage' / 'results' / 'task-1.prof'))
+    assert any('sorted' in function for _, _, function in stats.stats)
+    assert 'cumulative' in (tmp_path / 'storage' / 'results' / 'task-1.prof.txt').read_text()
+
+
+def test_file_formats_do_not_import_the_task_code():
+    code = ("import sys, text_extract_api.files.file_formats.file_format; "
+            "print(sorted(name for name in sys.modules if name.startswith(('text_extract_api.extract', 'boto3'))))")
+
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+
+    assert output.strip() == '[]'
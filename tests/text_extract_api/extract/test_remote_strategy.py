@@ -0,0 +1,120 @@
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from text_extract_api.extract.http_client import CircuitBreaker, CircuitOpenError, RetryingHttpClient
+from text_extract_api.extract.strategies.remote import RemoteStrategy
+from text_extract_api.files.file_formats.pdf import PdfFileFormat
+
+
+class RemoteApiStandIn(BaseHTTPRequestHandler):
+    """Marker-like remote API answering with the requested page range; fails the first `failures` calls."""
+    failures = 0
+    calls = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length'])).decode('latin-1')
+        RemoteApiStandIn.calls.append(body)
+        if RemoteApiStandIn.failures > 0:
+            RemoteApiStandIn.failures -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        page_range = 'all'
+        if 'name="page_range"' in body:
+            page_range = body.split('name="page_range"')[1].split('\r\n')[2]
+        payload = json.dumps({'output': f'pages {page_range}'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def remote_api():
+    RemoteApiStandIn.failures = 0
+    RemoteApiStandIn.calls = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RemoteApiStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/marker/upload'
+    server.shutdown()
+
+
+def test_retries_server_errors(remote_api):
+    RemoteApiStandIn.failures = 2
+    client = RetryingHttpClient(max_retries=3, backoff_base=0.01)
+
+    response = client.post(remote_api, data={'a': '1'})
+
+    assert response.status_code == 200
+    assert len(RemoteApiStandIn.calls) == 3
+
+
+def test_returns_last_error_when_retries_exhausted(remote_api):
+    RemoteApiStandIn.failures = 5
+    client = RetryingHttpClient(max_retries=1, backoff_base=0.01)
+
+    assert client.post(remote_api, data={'a': '1'}).status_code == 503
+    assert len(RemoteApiStandIn.calls) == 2
+
+
+def test_circuit_opens_after_consecutive_failures(remote_api):
+    RemoteApiStandIn.failures = 10
+    client = RetryingHttpClient(max_retries=0, circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+
+    client.post(remote_api, data={'a': '1'})
+    client.post(remote_api, data={'a': '1'})
+    with pytest.raises(CircuitOpenError):
+        client.post(remote_api, data={'a': '1'})
+    assert len(RemoteApiStandIn.calls) == 2
+
+
+def test_shards_pages_and_stitches_outputs_in_order(remote_api, monkeypatch):
+    monkeypatch.setenv('REMOTE_API_URL', remote_api)
+    strategy = RemoteStrategy({'shard_pages': 2, 'shard_concurrency': 3})
+    pdf = PdfFileFormat(b'%PDF-1.4 stand-in', 'document.pdf', 'application/pdf')
+
+    with patch.object(RemoteStrategy, '_count_pages', return_value=5):
+        result = strategy.extract_text(pdf)
+
+    assert result.text == 'pages 0-1\n\npages 2-3\n\npages 4-4'
+    assert [(page.page_no, page.last_page_no) for page in result.pages] == [(1, 2), (3, 4), (5, 5)]
+    assert len(RemoteApiStandIn.calls) == 3
+
+
+def test_shards_upload_only_their_pages(remote_api, monkeypatch):
+    monkeypatch.setenv('REMOTE_API_URL', remote_api)
+    strategy = RemoteStrategy({'shard_pages': 2})
+    pdf = PdfFileFormat(b'%PDF-1.4 stand-in', 'document.pdf', 'application/pdf')
+
+    with patch.object(RemoteStrategy, '_count_pages', return_value=3), \
+            patch.object(RemoteStrategy, '_split_pdf', side_effect=lambda binary, pages: b'%%PDF part %d-%d' % pages):
+        strategy.extract_text(pdf)
+
+    uploads = sorted(call.split('%PDF part ')[1][:3] for call in RemoteApiStandIn.calls)
+    assert uploads == ['0-1', '2-2']
+    assert not any('stand-in' in call or 'page_range' in call for call in RemoteApiStandIn.calls)
+
+
+def test_split_pdf():
+    pypdfium2 = pytest.importorskip('pypdfium2')
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    pages = [Image.new('RGB', (100, 100), color) for color in ('red', 'green', 'blue')]
+    pages[0].save(buffer, format='PDF', save_all=True, append_images=pages[1:])
+
+    part = pypdfium2.PdfDocument(RemoteStrategy._split_pdf(buffer.getvalue(), (1, 2)))
+
+    assert len(part) == 2
+    assert RemoteStrategy._split_pdf(b'%PDF-1.4 stand-in', (0, 0)) is None
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from text_extract_api.extract.extract_result import ExtractResult
+from text_extract_api.extract.result_formats import docling_json, markdown_to_text, negotiate_format
+
+ALL_FORMATS = ['json', 'markdown', 'text', 'docling', 'msgpack']
+
+
+@pytest.mark.parametrize("format, accept, available, expected", [
+    (None, None, ALL_FORMATS, 'json'),
+    (None, '*/*', ALL_FORMATS, 'json'),
+    ('text', 'application/msgpack', ALL_FORMATS, 'text'),
+    (None, 'text/markdown, application/json;q=0.5', ALL_FORMATS, 'markdown'),
+    (None, 'application/json;q=0.2, application/msgpack;q=0.9', ALL_FORMATS, 'msgpack'),
+    (None, 'application/vnd.docling+json', ['json', 'markdown'], None),
+    (None, 'application/vnd.docling+json, */*;q=0.1', ['json', 'markdown'], 'json'),
+    ('docling', None, ['json', 'markdown'], None),
+])
+def test_negotiate_format(format, accept, available, expected):
+    assert negotiate_format(format, accept, available) == expected
+
+
+def test_negotiate_unknown_format():
+    with pytest.raises(ValueError):
+        negotiate_format('pdf', None, ALL_FORMATS)
+
+
+def test_markdown_to_text():
+    markdown = ("# Invoice\n\nSee **the** [terms](http://example.com).\n\n"
+                "| Item | Price |\n|------|------:|\n| Apple | 1.00 |\n")
+
+    assert markdown_to_text(markdown) == "Invoice\n\nSee the terms.\n\nItem\tPrice\nApple\t1.00\n"
+
+
+def test_docling_json_is_derived_once():
+    class Document:
+        exports = 0
+
+        def export_to_dict(self):
+            Document.exports += 1
+            return {'name': 'doc'}
+
+    result = ExtractResult(Document(), lambda document: '')
+
+    assert json.loads(docling_json(result)) == {'name': 'doc'}
+    assert docling_json(result) == docling_json(result)
+    assert Document.exports == 1
+    assert docling_json(ExtractResult.from_text('text')) is None
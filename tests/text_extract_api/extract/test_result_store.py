@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from text_extract_api.extract.extract_result import ExtractResult, PageSegment
+from text_extract_api.extract.result_store import (
+    BLOCK_SIZE, inline_page_index, iter_result_text, load_index, load_result_text, offload_document, offload_result,
+    read_pages, read_text_range, should_offload, sweep_offloaded_results
+)
+
+
+@pytest.fixture
+def storage_profile(tmp_path, monkeypatch):
+    profiles = tmp_path / 'storage_profiles'
+    profiles.mkdir()
+    (profiles / 'results.yaml').write_text(
+        f"strategy: local_filesystem\nsettings:\n  root_path: {tmp_path / 'storage'}\n")
+    monkeypatch.setenv('STORAGE_PROFILE_PATH', str(profiles))
+    return 'results'
+
+
+def test_should_offload_above_threshold(monkeypatch):
+    monkeypatch.setenv('RESULT_OFFLOAD_THRESHOLD', '10')
+
+    assert not should_offload('short')
+    assert should_offload('ą' * 6)
+
+
+def test_offloaded_result_round_trip(storage_profile, tmp_path):
+    text = 'Zażółć gęślą jaźń\n' * 10000
+
+    reference = offload_result('task-1', text, storage_profile)
+
+    assert reference['size'] == len(text.encode('utf-8'))
+    assert reference['compressed_size'] < reference['size']
+    assert os.path.isfile(tmp_path / 'storage' / reference['key'])
+    assert load_result_text(reference) == text
+    assert ''.join(iter_result_text(reference, chunk_size=7)) == text
+
+
+def test_read_text_range_across_blocks(storage_profile):
+    data = bytes(range(97, 123)) * (BLOCK_SIZE // 10)
+    reference = offload_result('task-2', data.decode('utf-8'), storage_profile)
+    index = load_index(reference)
+
+    assert len(index['blocks']) > 2
+    assert read_text_range(reference, index, 0, 9) == data[0:10]
+    assert read_text_range(reference, index, BLOCK_SIZE - 5, BLOCK_SIZE + 4) == data[BLOCK_SIZE - 5:BLOCK_SIZE + 5]
+    assert read_text_range(reference, index, len(data) - 3, len(data) - 1) == data[-3:]
+
+
+def test_read_pages(storage_profile, monkeypatch):
+    monkeypatch.setattr('text_extract_api.extract.result_store.BLOCK_SIZE', 64)
+    result = ExtractResult.from_pages([PageSegment(page_no, f"Strona {page_no} – zażółć") for page_no in range(1, 21)])
+    reference = offload_result('task-3', result.text, storage_profile,
+                               inline_page_index(result.pages, result.page_offsets()))
+    index = load_index(reference)
+
+    assert len(index['blocks']) > 5
+    assert [page['text'] for page in read_pages(reference, index, 5, 3)] == \
+        ['Strona 5 – zażółć', 'Strona 6 – zażółć', 'Strona 7 – zażółć']
+    assert [page['page_no'] for page in read_pages(reference, index, 19, 10)] == [19, 20]
+    assert read_pages(reference, index, 21, 10) == []
+
+
+def test_sweep_deletes_the_blobs_of_expired_results(storage_profile, tmp_path):
+    expired = offload_result('expired', 'Page 1', storage_profile)
+    offload_document('expired', 'docling.json', '{}', 'application/json', storage_profile)
+    current = offload_result('current', 'Page 1', storage_profile)
+    (tmp_path / 'storage' / 'results' / 'user-file.md').write_text('saved by a storage profile, not offloaded')
+    for path in (tmp_path / 'storage' / 'results').glob('expired.*'):
+        os.utime(path, (0, 0))
+
+    # The result, its index and the Docling JSON
+    assert sweep_offloaded_results(3600, storage_profile) == 3
+
+    assert sorted(path.name for path in (tmp_path / 'storage' / 'results').iterdir()) == \
+        sorted([os.path.basename(current['key']), os.path.basename(current['index_key']), 'user-file.md'])
+    with pytest.raises(FileNotFoundError):
+        load_result_text(expired)
@@ -0,0 +1,63 @@
+import pytest
+
+from text_extract_api.extract import tasks
+from text_extract_api.extract.result_store import offload_result
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    profiles = tmp_path / 'storage_profiles'
+    profiles.mkdir()
+    (profiles / 'local.yaml').write_text(
+        f"strategy: local_filesystem\nsettings:\n  root_path: {tmp_path / 'storage'}\n")
+    monkeypatch.setenv('STORAGE_PROFILE_PATH', str(profiles))
+    monkeypatch.setattr(tasks, 'redis_client', FakeRedis())
+    return tmp_path / 'storage'
+
+
+def test_store_result_text(storage):
+    result = tasks.store_result_task('local', 'result.md', 'extracted text', None, 'task-1-storage')
+
+    assert result['status'] == 'success'
+    assert (storage / 'result.md').read_text() == 'extracted text'
+
+
+def test_store_offloaded_result(storage):
+    reference = offload_result('task-2', 'offloaded text', 'local')
+
+    tasks.store_result_task('local', 'offloaded.md', None, reference, 'task-2-storage')
+
+    assert (storage / 'offloaded.md').read_text() == 'offloaded text'
+
+
+def test_store_result_is_idempotent(storage):
+    tasks.store_result_task('local', 'result.md', 'first', None, 'task-3-storage')
+
+    result = tasks.store_result_task('local', 'result.md', 'second', None, 'task-3-storage')
+
+    assert result['status'] == 'skipped'
+    assert (storage / 'result.md').read_text() == 'first'
+
+
+def test_result_sweep_is_queued_once_per_interval(storage, monkeypatch):
+    queued = []
+    monkeypatch.setattr(tasks.sweep_offloaded_results_task, 'apply_async', lambda **kwargs: queued.append(kwargs))
+
+    tasks.schedule_result_sweep()
+    tasks.schedule_result_sweep()
+
+    assert queued == [{'queue': None}]
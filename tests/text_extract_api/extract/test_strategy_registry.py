@@ -0,0 +1,74 @@
+import importlib
+import importlib.metadata
+import sys
+import threading
+
+import pytest
+
+from text_extract_api.extract.strategies.strategy import STRATEGY_ENTRY_POINT_GROUP, Strategy
+
+
+class FakeStrategy(Strategy):
+    @classmethod
+    def name(cls) -> str:
+        return "fake"
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    config = tmp_path / 'strategies.yaml'
+    config.write_text(
+        "strategies:\n"
+        "  missing:\n"
+        "    class: not_installed_ocr_engine.strategy.MissingStrategy\n"
+        "  configured:\n"
+        f"    class: {__name__}.FakeStrategy\n"
+        "    model: fake-model\n")
+    monkeypatch.setenv('OCR_CONFIG_PATH', str(config))
+    monkeypatch.setattr(Strategy, '_strategies', {})
+    monkeypatch.setattr(Strategy, '_strategy_config_map', {})
+    monkeypatch.setattr(Strategy, '_declared_strategies', None)
+    monkeypatch.setattr(Strategy, '_failed_strategies', {})
+    monkeypatch.setattr(Strategy, '_lock', threading.RLock())
+    return config
+
+
+def test_names_are_validated_without_importing(registry):
+    for name in ('missing', 'configured', 'docling', 'easyOCR', 'remote', 'llama_vision'):
+        Strategy.validate_strategy_name(name)
+
+    with pytest.raises(ValueError, match="Unknown strategy 'nope'"):
+        Strategy.validate_strategy_name('nope')
+    assert 'not_installed_ocr_engine' not in sys.modules
+    assert Strategy._strategies == {}
+
+
+def test_strategy_is_imported_on_first_use(registry):
+    strategy = Strategy.get_strategy('configured')
+
+    assert isinstance(strategy, FakeStrategy)
+    assert strategy.model() == 'fake-model'
+    assert Strategy.get_strategy('configured') is strategy
+    assert isinstance(Strategy.get_strategy('remote'), Strategy)
+
+
+def test_failed_imports_are_cached(registry, monkeypatch, caplog):
+    imports = []
+    import_module = importlib.import_module
+    monkeypatch.setattr(importlib, 'import_module', lambda name: imports.append(name) or import_module(name))
+
+    for _ in range(3):
+        with pytest.raises(ValueError, match="Strategy 'missing' is not available"):
+            Strategy.get_strategy('missing')
+
+    assert imports == ['not_installed_ocr_engine.strategy']
+    [record] = caplog.records  # logged once, with the traceback of the import
+    assert record.levelname == 'ERROR' and record.exc_info[0] is ModuleNotFoundError
+
+
+def test_entry_points(registry, monkeypatch):
+    entry_point = importlib.metadata.EntryPoint('plugin', f'{__name__}:FakeStrategy', STRATEGY_ENTRY_POINT_GROUP)
+    monkeypatch.setattr(importlib.metadata, 'entry_points', lambda: importlib.metadata.EntryPoints([entry_point]))
+
+    assert 'plugin' in Strategy.available_strategies()
+    assert isinstance(Strategy.get_strategy('plugin'), FakeStrategy)
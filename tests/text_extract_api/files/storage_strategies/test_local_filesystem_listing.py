@@ -0,0 +1,40 @@
+import pytest
+
+from text_extract_api.files.storage_strategies.local_filesystem import LocalFilesystemStorageStrategy
+
+NAMES = ['a.md', 'b/c.md', 'b/d/e.md', 'b-f.md', 'results/1.md.gz', 'results/2.md.gz', 'z.md']
+
+
+@pytest.fixture
+def storage(tmp_path):
+    for name in NAMES:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text(name)
+    return LocalFilesystemStorageStrategy({'settings': {'root_path': str(tmp_path)}})
+
+
+def test_list_is_sorted(storage):
+    assert storage.list() == ['a.md', 'b/c.md', 'b/d/e.md', 'b-f.md', 'results/1.md.gz', 'results/2.md.gz', 'z.md']
+
+
+def test_list_pages_follow_cursor(storage):
+    names, cursor = [], None
+    while True:
+        page, cursor = storage.list_page(page_size=2, cursor=cursor)
+        assert len(page) <= 2
+        names += page
+        if cursor is None:
+            break
+
+    assert names == storage.list()
+
+
+@pytest.mark.parametrize("prefix, expected", [
+    ('b', ['b/c.md', 'b/d/e.md', 'b-f.md']),
+    ('b/', ['b/c.md', 'b/d/e.md']),
+    ('results/2', ['results/2.md.gz']),
+    ('missing', []),
+])
+def test_list_with_prefix(storage, prefix, expected):
+    assert list(storage.iter_list(prefix)) == expected
+    assert storage.list_page(prefix, page_size=10) == (expected, None)
@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from text_extract_api.files.storage_strategies.local_filesystem import LocalFilesystemStorageStrategy
+
+CHUNKS = [os.urandom(1024 * 1024) for _ in range(12)]
+
+
+def s3_strategy(bucket_name='results'):
+    boto3 = pytest.importorskip('boto3')
+    from text_extract_api.files.storage_strategies.aws_s3 import AWSS3StorageStrategy
+
+    boto3.client('s3', region_name='us-east-1').create_bucket(Bucket=bucket_name)
+    return AWSS3StorageStrategy({'settings': {
+        'bucket_name': bucket_name,
+        'region': 'us-east-1',
+        'access_key': 'testing',
+        'secret_access_key': 'testing',
+        'multipart_threshold': 5 * 1024 * 1024,
+        'multipart_chunksize': 5 * 1024 * 1024,
+    }})
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    moto = pytest.importorskip('moto')
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        monkeypatch.setenv(name, 'testing')
+    with moto.mock_aws():
+        yield s3_strategy()
+
+
+def test_s3_multipart_stream_round_trip(s3):
+    s3.save_stream('results/large.bin', iter(CHUNKS))
+
+    head = s3.s3_client.head_object(Bucket='results', Key='results/large.bin', PartNumber=1)
+    assert head['PartsCount'] == 3
+    assert b''.join(s3.load_stream('results/large.bin', chunk_size=64 * 1024)) == b''.join(CHUNKS)
+    assert s3.load_stream('results/missing.bin') is None
+
+
+def test_local_stream_round_trip(tmp_path):
+    storage = LocalFilesystemStorageStrategy({'settings': {'root_path': str(tmp_path)}})
+
+    storage.save_stream('results/large.bin', iter(CHUNKS))
+
+    assert b''.join(storage.load_stream('results/large.bin')) == b''.join(CHUNKS)
+    assert storage.load_stream('results/missing.bin') is None
+    assert os.listdir(tmp_path / 'results') == ['large.bin']
+
+
+def test_drive_stream_media_upload_buffers_one_chunk():
+    from text_extract_api.files.storage_strategies.google_drive import StreamMediaUpload
+
+    media = StreamMediaUpload(iter(CHUNKS), chunksize=256 * 1024)
+    data = b''.join(CHUNKS)
+
+    assert media.getbytes(0, 256 * 1024) == data[:256 * 1024]
+    # The last chunk is re-requested when the server did not accept it whole
+    assert media.getbytes(100, 256 * 1024) == data[100:100 + 256 * 1024]
+    assert media.getbytes(len(data) - 10, 256 * 1024) == data[-10:]
+    with pytest.raises(ValueError):
+        media.getbytes(0, 10)
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from text_extract_api.files.storage_manager import StorageManager, StorageProfileRegistry, storage_profiles
+
+
+@pytest.fixture
+def profiles_path(tmp_path, monkeypatch):
+    profiles = tmp_path / 'storage_profiles'
+    profiles.mkdir()
+    (profiles / 'local.yaml').write_text(
+        f"strategy: local_filesystem\nsettings:\n  root_path: {tmp_path / 'storage'}\n")
+    monkeypatch.setenv('STORAGE_PROFILE_PATH', str(profiles))
+    return profiles
+
+
+def test_strategy_is_shared_between_managers(profiles_path):
+    assert StorageManager('local').strategy is StorageManager('local').strategy
+
+
+def test_profile_is_reloaded_when_modified(profiles_path, tmp_path):
+    strategy = StorageManager('local').strategy
+
+    profile_file = profiles_path / 'local.yaml'
+    profile_file.write_text(f"strategy: local_filesystem\nsettings:\n  root_path: {tmp_path / 'other'}\n")
+    os.utime(profile_file, (os.stat(profile_file).st_atime, os.stat(profile_file).st_mtime + 10))
+
+    reloaded = StorageManager('local').strategy
+    assert reloaded is not strategy
+    assert reloaded.base_directory == str(tmp_path / 'other')
+
+
+def test_preload_reports_failing_profiles(profiles_path):
+    (profiles_path / 'broken.yaml').write_text("strategy: unknown\nsettings: {}\n")
+
+    errors = StorageProfileRegistry().preload()
+
+    assert errors['local'] is None
+    assert 'unknown' in errors['broken']
+
+
+def test_missing_profile(profiles_path):
+    with pytest.raises(FileNotFoundError):
+        storage_profiles.get('missing')
@@ -0,0 +1,54 @@
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+
+from text_extract_api import main
+
+STORAGE_DELAY = 0.5
+
+
+class SlowStorageManager:
+    def __init__(self, profile_name):
+        pass
+
+    def iter_list(self, prefix='', page_size=1000):
+        time.sleep(STORAGE_DELAY)
+        return iter(['results/file.md'])
+
+
+@pytest.fixture
+def slow_storage(monkeypatch):
+    monkeypatch.setattr(main, 'StorageManager', SlowStorageManager)
+    monkeypatch.setattr(main, 'fetch_task_state', lambda task_id: ('SUCCESS', {'extracted_text': 'text'}))
+
+
+# Asserts wall-clock latencies - run explicitly, e.g. `RUN_TIMING_TESTS=1 pytest tests/text_extract_api/test_api_concurrency.py`
+@pytest.mark.skipif(not os.getenv('RUN_TIMING_TESTS'), reason="timing test, set RUN_TIMING_TESTS=1 to run it")
+def test_result_latency_while_storage_is_slow(slow_storage):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            async def timed_result():
+                started = time.perf_counter()
+                response = await client.get('/ocr/result/task-id')
+                assert response.status_code == 200
+                return time.perf_counter() - started
+
+            await client.get('/ocr/result/task-id')  # warm-up - the first request initializes the app
+            # Enough slow listings to use up the whole storage pool
+            listings = [asyncio.create_task(client.get('/storage/list')) for _ in range(32)]
+            await asyncio.sleep(0.05)
+            latencies = sorted(await asyncio.gather(*(timed_result() for _ in range(100))))
+            responses = await asyncio.gather(*listings)
+            return latencies, responses
+
+    latencies, responses = asyncio.run(run())
+
+    assert all(response.status_code == 200 for response in responses)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"/ocr/result p50={latencies[len(latencies) // 2] * 1000:.1f}ms p99={p99 * 1000:.1f}ms "
+          f"with {len(responses)} concurrent /storage/list calls taking {STORAGE_DELAY * 1000:.0f}ms")
+    assert p99 < STORAGE_DELAY / 2
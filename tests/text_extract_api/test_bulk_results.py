@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from text_extract_api import main
+
+TASK_METAS = {
+    'done': {'status': 'SUCCESS', 'result': {'extracted_text': 'text'}},
+    'offloaded': {'status': 'SUCCESS', 'result': {'result_ref': {'key': 'results/offloaded.md.gz'}}},
+    'running': {'status': 'PROGRESS', 'result': {'status': 'OCR Processing', 'progress': '30'}},
+    'failed': {'status': 'FAILURE', 'result': {'exc_type': 'ValueError', 'exc_message': ['broken'],
+                                               'exc_module': 'builtins'}},
+}
+
+
+class FakePipeline:
+    def __init__(self, store):
+        self.store = store
+        self.commands = []
+
+    def mget(self, keys):
+        self.commands.append(keys)
+
+    async def execute(self):
+        return [[self.store.get(key) for key in keys] for keys in self.commands]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class FakeBackendClient:
+    """
+    The Redis result backend, holding the task metas encoded like Celery does.
+    """
+
+    def __init__(self):
+        backend = main.celery_app.backend
+        self.store = {backend.get_key_for_task(task_id): backend.encode(dict(meta, task_id=task_id))
+                      for task_id, meta in TASK_METAS.items()}
+        self.pipelines = []
+
+    def pipeline(self, transaction=True):
+        self.pipelines.append(FakePipeline(self.store))
+        return self.pipelines[-1]
+
+
+@pytest.fixture
+def backend_client(monkeypatch):
+    client = FakeBackendClient()
+    monkeypatch.setattr(main, 'backend_client', client)
+    monkeypatch.setattr(main, 'BULK_RESULTS_BATCH_SIZE', 2)
+    return client
+
+
+def post_results(body, **kwargs):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await client.post('/ocr/results', json=body, **kwargs)
+
+    return asyncio.run(run())
+
+
+def test_bulk_results_are_read_by_pipelined_mgets(backend_client):
+    task_ids = ['done', 'unknown', 'running', 'failed', 'offloaded']
+
+    response = post_results({'task_ids': task_ids})
+
+    results = response.json()['results']
+    assert [result['task_id'] for result in results] == task_ids
+    assert [result['state'] for result in results] == ['SUCCESS', 'PENDING', 'PROGRESS', 'FAILURE', 'SUCCESS']
+    assert results[0]['result'] == {'extracted_text': 'text'}
+    assert results[2]['info']['status'] == 'OCR Processing'
+    assert results[3]['status'] == 'broken'
+    assert results[4]['result'] == {'result_ref': {'key': 'results/offloaded.md.gz'}}
+    assert len(backend_client.pipelines) == 1
+    assert [len(keys) for keys in backend_client.pipelines[0].commands] == [2, 2, 1]
+
+
+def test_bulk_results_stream_ndjson_without_pending_info(backend_client):
+    response = post_results({'task_ids': ['running', 'unknown', 'done'], 'include_pending_info': False},
+                            headers={'Accept': 'application/x-ndjson'})
+
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[:2] == [{'task_id': 'running', 'state': 'PROGRESS'}, {'task_id': 'unknown', 'state': 'PENDING'}]
+    assert lines[2]['result'] == {'extracted_text': 'text'}
+    assert len(backend_client.pipelines) == 2
+
+
+def test_bulk_results_of_other_result_backends(monkeypatch):
+    monkeypatch.setattr(main, 'backend_client', None)
+    monkeypatch.setattr(main, 'fetch_task_state',
+                        lambda task_id: ('SUCCESS', {'extracted_text': task_id}) if task_id == 'done' else ('PENDING', None))
+
+    response = post_results({'task_ids': ['done', 'unknown']})
+
+    assert [result['state'] for result in response.json()['results']] == ['SUCCESS', 'PENDING']
+    assert post_results({'task_ids': []}).status_code == 422
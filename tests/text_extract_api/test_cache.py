@@ -0,0 +1,138 @@
+import asyncio
+import fnmatch
+
+import pytest
+from redis.exceptions import ResponseError
+
+from text_extract_api.cache import cache_key, cache_stats, count_lookup, invalidate, key_pattern, ocr_cache_key
+
+LEGACY_KEY = '0123456789abcdef0123456789abcdef'
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    def object(self, subcommand, key):
+        self.calls.append(lambda: self.redis.idle.get(key, 0))
+
+    async def execute(self):
+        results = [call() for call in self.calls]
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
+
+    def memory_usage(self, key):
+        self.calls.append(lambda: len(self.redis.data[key]) + 50 if key in self.redis.data else None)
+
+
+class FakeAsyncRedis:
+    def __init__(self, data, idle=None):
+        self.data = dict(data)
+        self.idle = idle or {}
+        self.hashes = {}
+
+    async def scan_iter(self, match, count=None):
+        for key in list(self.data):
+            if fnmatch.fnmatchcase(key, match):
+                yield key
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def unlink(self, *keys):
+        removed = sum(1 for key in keys if self.data.pop(key, None) is not None or self.hashes.pop(key, None))
+        return removed
+
+    async def hincrby(self, key, field, amount):
+        counters = self.hashes.setdefault(key, {})
+        counters[field] = counters.get(field, 0) + amount
+
+    async def hgetall(self, key):
+        return self.hashes.get(key, {})
+
+    async def info(self, section):
+        return {'used_memory': 1000, 'keyspace_hits': 3, 'keyspace_misses': 1}
+
+
+@pytest.fixture
+def redis():
+    return FakeAsyncRedis({
+        ocr_cache_key('easyocr', 'hash1'): 'a' * 10,
+        ocr_cache_key('easyocr', 'hash2'): 'b' * 10,
+        ocr_cache_key('docling', 'hash1'): 'c' * 100,
+        cache_key('llm', 'chunk'): 'd',
+        cache_key('format', 'task', 'text'): 'e',
+        'celery-task-meta-task': 'kept',
+    }, idle={ocr_cache_key('easyocr', 'hash2'): 7200})
+
+
+def test_key_pattern():
+    assert key_pattern('ocr', strategy='easyocr') == 'cache:ocr:easyocr:*'
+    assert key_pattern(file_hash='abc') == 'cache:ocr:*:abc'
+    assert key_pattern(strategy='a*b') == 'cache:ocr:a\\*b:*'
+    with pytest.raises(ValueError):
+        key_pattern('unknown')
+    with pytest.raises(ValueError):
+        key_pattern('llm', file_hash='abc')
+
+
+def test_invalidate_by_file_hash(redis):
+    assert asyncio.run(invalidate(redis, file_hash='hash1')) == 2
+    assert set(redis.data) == {ocr_cache_key('easyocr', 'hash2'), cache_key('llm', 'chunk'),
+                               cache_key('format', 'task', 'text'), 'celery-task-meta-task'}
+
+
+def test_invalidate_idle_keys(redis):
+    assert asyncio.run(invalidate(redis, 'ocr', min_idle_seconds=3600)) == 1
+    assert ocr_cache_key('easyocr', 'hash2') not in redis.data
+    assert ocr_cache_key('easyocr', 'hash1') in redis.data
+
+
+def test_invalidate_everything_keeps_other_keys(redis):
+    assert asyncio.run(invalidate(redis, batch_size=2)) == 5
+    assert set(redis.data) == {'celery-task-meta-task'}
+
+
+def test_cache_stats(redis):
+    asyncio.run(count_lookup(redis, 'ocr', True))
+    asyncio.run(count_lookup(redis, 'ocr', False))
+
+    stats = asyncio.run(cache_stats(redis, top=2))
+
+    assert stats['keys'] == 5
+    assert stats['namespaces']['ocr']['keys'] == 3
+    assert stats['namespaces']['ocr']['hit_ratio'] == 0.5
+    assert stats['namespaces']['llm']['hit_ratio'] is None
+    assert stats['top_keys'] == [{'key': ocr_cache_key('docling', 'hash1'), 'bytes': 150},
+                                 {'key': ocr_cache_key('easyocr', 'hash2'), 'bytes': 60}]
+    assert stats['server']['hit_ratio'] == 0.75
+
+
+def test_invalidate_legacy_ocr_keys(redis):
+    redis.data[LEGACY_KEY] = 'cached by an earlier version'
+
+    assert asyncio.run(invalidate(redis, strategy='easyocr')) == 2
+    assert LEGACY_KEY in redis.data
+    assert asyncio.run(invalidate(redis, file_hash=LEGACY_KEY)) == 1
+    assert LEGACY_KEY not in redis.data
+
+    redis.data[LEGACY_KEY] = 'cached by an earlier version'
+    assert asyncio.run(invalidate(redis, 'ocr')) == 2
+    assert set(redis.data) == {cache_key('llm', 'chunk'), cache_key('format', 'task', 'text'), 'celery-task-meta-task'}
+
+
+def test_invalidate_idle_keys_with_an_lfu_policy(redis):
+    redis.idle = {key: ResponseError('An LFU maxmemory policy is selected, idle time not tracked.') for key in redis.data}
+
+    with pytest.raises(ValueError, match='min_idle_seconds'):
+        asyncio.run(invalidate(redis, min_idle_seconds=3600))
+    assert len(redis.data) == 6
@@ -0,0 +1,125 @@
+import asyncio
+import gzip
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import FileResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from text_extract_api.compression import CompressionMiddleware, select_encoding
+
+BODY = "| cell | cell |\n" * 1000
+
+
+def make_app(file_path=None):
+    def large(request):
+        return PlainTextResponse(BODY)
+
+    def small(request):
+        return PlainTextResponse("small")
+
+    def stream(request):
+        return StreamingResponse(iter([BODY, BODY]), media_type="text/plain")
+
+    def file(request):
+        return FileResponse(file_path, media_type="text/markdown")
+
+    app = Starlette(routes=[Route("/large", large), Route("/small", small), Route("/stream", stream),
+                            Route("/file", file)])
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return app
+
+
+def make_client(file_path=None):
+    return TestClient(make_app(file_path))
+
+
+def call(app, path, extensions):
+    """
+    Calls the ASGI app directly - the test client does not offer the `http.response.pathsend` extension.
+    """
+    messages = []
+    scope = {'type': 'http', 'asgi': {'version': '3.0', 'spec_version': '2.4'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+             'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+             'headers': [(b'host', b'testserver'), (b'accept-encoding', b'gzip')], 'server': ('testserver', 80),
+             'client': ('testclient', 50000), 'extensions': extensions}
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return messages
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("*", "br"),
+    ("identity", None),
+    ("br;q=0, gzip;q=0", None),
+])
+def test_select_encoding(accept_encoding, expected):
+    assert select_encoding(accept_encoding) == expected
+
+
+@pytest.mark.parametrize("encoding", ["br", "gzip"])
+def test_large_responses_are_compressed(encoding):
+    response = make_client().get("/large", headers={"Accept-Encoding": encoding})
+
+    assert response.headers["content-encoding"] == encoding
+    assert int(response.headers["content-length"]) < len(BODY) / 10
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.text == BODY
+
+
+def test_small_responses_are_not_compressed():
+    response = make_client().get("/small", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.text == "small"
+
+
+def test_streaming_responses_are_compressed():
+    response = make_client().get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == BODY * 2
+
+
+def test_file_responses_are_compressed_with_a_weak_etag(tmp_path):
+    (tmp_path / 'result.md').write_text(BODY)
+
+    response = make_client(tmp_path / 'result.md').get("/file", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"].startswith('W/"')
+    assert response.text == BODY
+
+
+def test_file_responses_are_not_sent_by_path_when_compressed(tmp_path):
+    (tmp_path / 'result.md').write_text(BODY)
+    app = make_app(tmp_path / 'result.md')
+
+    messages = call(app, '/file', extensions={'http.response.pathsend': {}})
+
+    assert [message['type'] for message in messages][0] == 'http.response.start'
+    assert 'http.response.pathsend' not in [message['type'] for message in messages]
+    headers = dict(messages[0]['headers'])
+    assert headers[b'content-encoding'] == b'gzip' and headers[b'etag'].startswith(b'W/"')
+    assert gzip.decompress(b''.join(message.get('body', b'') for message in messages[1:])).decode() == BODY
+
+
+def test_other_messages_are_sent_after_the_response_start():
+    async def app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.pathsend', 'path': '/tmp/result.md'})
+
+    messages = call(CompressionMiddleware(app), '/', extensions={})
+
+    assert [message['type'] for message in messages] == ['http.response.start', 'http.response.pathsend']
@@ -0,0 +1,30 @@
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from text_extract_api import main
+from text_extract_api.metrics import STORAGE_SAVE_DURATION, timed
+
+
+class FakeBroker:
+    async def llen(self, queue):
+        return 7
+
+
+def test_timed_observes_duration():
+    before = REGISTRY.get_sample_value('text_extract_storage_save_seconds_count', {'storage_strategy': 'test'}) or 0
+
+    with timed(STORAGE_SAVE_DURATION, storage_strategy='test'):
+        pass
+
+    assert REGISTRY.get_sample_value('text_extract_storage_save_seconds_count', {'storage_strategy': 'test'}) == before + 1
+
+
+def test_metrics_endpoint(monkeypatch):
+    monkeypatch.setattr(main, 'broker_client', FakeBroker())
+
+    response = TestClient(main.app).get('/metrics')
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    assert 'text_extract_queue_depth{queue="celery"} 7.0' in response.text
+    assert '# TYPE text_extract_page_ocr_seconds histogram' in response.text
@@ -0,0 +1,141 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from text_extract_api import main
+from text_extract_api.extract import result_store
+from text_extract_api.extract.extract_result import ExtractResult, PageSegment
+from text_extract_api.extract.result_store import inline_page_index, offload_result
+
+PAGES = [PageSegment(page_no, f"# Strona {page_no}\n\nZażółć \"gęślą\" jaźń\n") for page_no in range(1, 6)]
+TEXT = ExtractResult.from_pages(PAGES).text
+
+
+@pytest.fixture
+def results(tmp_path, monkeypatch):
+    """
+    Completed task results by task id - `inline` as kept in the result backend, `offloaded` to the storage layer.
+    """
+    profiles = tmp_path / 'storage_profiles'
+    profiles.mkdir()
+    (profiles / 'results.yaml').write_text(
+        f"strategy: local_filesystem\nsettings:\n  root_path: {tmp_path / 'storage'}\n")
+    monkeypatch.setenv('STORAGE_PROFILE_PATH', str(profiles))
+    monkeypatch.setattr(result_store, 'BLOCK_SIZE', 64)
+    result_store._load_index.cache_clear()
+
+    extract_result = ExtractResult.from_pages(PAGES)
+    page_index = inline_page_index(extract_result.pages, extract_result.page_offsets())
+    results = {
+        'inline': {'status': 'success', 'extracted_text': TEXT, 'pages': page_index, 'formats': {}},
+        'offloaded': {'status': 'success', 'result_ref': offload_result('offloaded', TEXT, 'results', page_index),
+                      'summary': TEXT[:10], 'formats': {}},
+        # e.g. transformed by LLM - without a page structure
+        'inline-unpaged': {'status': 'success', 'extracted_text': TEXT, 'pages': None, 'formats': {}},
+        'offloaded-unpaged': {'status': 'success', 'result_ref': offload_result('offloaded-unpaged', TEXT, 'results'),
+                              'summary': TEXT[:10], 'formats': {}},
+    }
+    monkeypatch.setattr(main, 'fetch_task_state', lambda task_id: ('SUCCESS', results[task_id]))
+    return results
+
+
+@pytest.fixture
+def client(results):
+    return TestClient(main.app)
+
+
+def test_offloaded_result_is_streamed_as_json(client, results):
+    response = client.get('/ocr/result/offloaded')
+
+    assert response.status_code == 200
+    body = json.loads(response.content)
+    assert body['state'] == 'SUCCESS'
+    assert body['result']['extracted_text'] == TEXT
+    assert body['result']['result_ref'] == results['offloaded']['result_ref']
+    assert list(body['result']) == ['status', 'result_ref', 'summary', 'formats', 'extracted_text']
+
+
+@pytest.mark.parametrize("task_id", ['inline', 'offloaded'])
+@pytest.mark.parametrize("start, count, expected", [
+    (1, 10, [1, 2, 3, 4, 5]),
+    (2, 2, [2, 3]),
+    (5, 10, [5]),
+    (6, 10, []),
+    (2, 0, []),
+    (2, -1, []),
+])
+def test_result_pages(client, task_id, start, count, expected):
+    response = client.get(f'/ocr/result/{task_id}/pages', params={'start': start, 'count': count})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body['start'], body['count'], body['total_pages']) == (start, len(expected), 5)
+    assert [page['page_no'] for page in body['pages']] == expected
+    assert [page['text'] for page in body['pages']] == [PAGES[page_no - 1].text for page_no in expected]
+
+
+@pytest.mark.parametrize("task_id", ['inline-unpaged', 'offloaded-unpaged'])
+@pytest.mark.parametrize("start, count, expected", [
+    (1, 10, [TEXT]),
+    (1, 0, []),
+    (2, 10, []),
+])
+def test_result_without_page_structure_is_a_single_page(client, task_id, start, count, expected):
+    body = client.get(f'/ocr/result/{task_id}/pages', params={'start': start, 'count': count}).json()
+
+    assert (body['count'], body['total_pages']) == (len(expected), 1)
+    assert [page['text'] for page in body['pages']] == expected
+    assert all(page['page_no'] == 1 and page['last_page_no'] is None for page in body['pages'])
+
+
+@pytest.mark.parametrize("task_id", ['inline', 'offloaded'])
+def test_result_text(client, task_id):
+    data = TEXT.encode('utf-8')
+
+    response = client.get(f'/ocr/result/{task_id}/text')
+
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'text/markdown; charset=utf-8'
+    assert response.headers['accept-ranges'] == 'bytes'
+    assert response.content == data
+
+
+@pytest.mark.parametrize("task_id", ['inline', 'offloaded'])
+@pytest.mark.parametrize("byte_range, start, end", [
+    ('bytes=0-9', 0, 9),
+    ('bytes=60-139', 60, 139),  # across the blocks of the offloaded text
+    ('bytes=100-', 100, None),
+    ('bytes=-20', -20, None),  # suffix range
+    ('bytes=-100000', 0, None),
+    ('bytes=100-100000', 100, None),
+])
+def test_result_text_range(client, task_id, byte_range, start, end):
+    data = TEXT.encode('utf-8')
+    start = start % len(data)
+    end = len(data) - 1 if end is None else end
+
+    response = client.get(f'/ocr/result/{task_id}/text', headers={'Range': byte_range})
+
+    assert response.status_code == 206
+    assert response.headers['content-range'] == f'bytes {start}-{end}/{len(data)}'
+    assert response.content == data[start:end + 1]
+
+
+@pytest.mark.parametrize("task_id", ['inline', 'offloaded'])
+@pytest.mark.parametrize("byte_range", ['bytes=100000-', 'bytes=20-10'])
+def test_result_text_unsatisfiable_range(client, task_id, byte_range):
+    size = len(TEXT.encode('utf-8'))
+
+    response = client.get(f'/ocr/result/{task_id}/text', headers={'Range': byte_range})
+
+    assert response.status_code == 416
+    assert response.headers['content-range'] == f'bytes */{size}'
+
+
+@pytest.mark.parametrize("task_id", ['inline', 'offloaded'])
+def test_result_text_ignores_multiple_ranges(client, task_id):
+    response = client.get(f'/ocr/result/{task_id}/text', headers={'Range': 'bytes=0-9,20-29'})
+
+    assert response.status_code == 200
+    assert response.content == TEXT.encode('utf-8')
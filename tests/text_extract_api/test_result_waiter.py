@@ -0,0 +1,129 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from text_extract_api import main
+from text_extract_api.result_waiter import ResultWaiter
+
+
+class FakePubSub:
+    def __init__(self):
+        self.channels = set()
+        self.messages = asyncio.Queue()
+
+    async def subscribe(self, *channels):
+        self.channels.update(channels)
+
+    async def unsubscribe(self, *channels):
+        self.channels.difference_update(channels)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        try:
+            return await asyncio.wait_for(self.messages.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self):
+        pass
+
+
+class FakeRedis:
+    """
+    Publishes like the Redis result backend: the task meta to the channel named by the result key.
+    """
+
+    def __init__(self):
+        self._pubsub = FakePubSub()
+
+    def pubsub(self):
+        return self._pubsub
+
+    def publish(self, task_id, status):
+        channel = channel_of(task_id)
+        if channel in self._pubsub.channels:
+            data = json.dumps({'status': status, 'task_id': task_id}).encode()
+            self._pubsub.messages.put_nowait({'type': 'message', 'channel': channel, 'data': data})
+
+    async def aclose(self):
+        pass
+
+
+def channel_of(task_id):
+    return f'celery-task-meta-{task_id}'.encode()
+
+
+def test_waiter_is_woken_by_terminal_states_only():
+    async def run():
+        client = FakeRedis()
+        waiter = ResultWaiter(client, channel_of)
+        async with waiter.subscribe('task-1') as first, waiter.subscribe('task-1') as second:
+            assert client.pubsub().channels == {channel_of('task-1')}
+            client.publish('task-1', 'PROGRESS')
+            await asyncio.sleep(0.05)
+            woken_by_progress = first.is_set()
+            client.publish('task-1', 'SUCCESS')
+            await asyncio.wait_for(asyncio.gather(first.wait(), second.wait()), 1)
+        channels = set(client.pubsub().channels)
+        await waiter.aclose()
+        return woken_by_progress, channels
+
+    woken_by_progress, channels = asyncio.run(run())
+
+    assert not woken_by_progress
+    assert channels == set()
+
+
+@pytest.fixture
+def task_states(monkeypatch):
+    task_states = {}
+    monkeypatch.setattr(main, 'fetch_task_state', lambda task_id: task_states.get(task_id, ('PENDING', None)))
+    return task_states
+
+
+def get_result(path, on_request=None):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            if on_request:
+                asyncio.get_running_loop().call_later(0.2, on_request)
+            started = time.perf_counter()
+            response = await client.get(path)
+            return response, time.perf_counter() - started
+
+    return asyncio.run(run())
+
+
+def test_wait_returns_once_the_task_ends(task_states, monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(main, 'result_waiter', ResultWaiter(client, channel_of))
+
+    def complete():
+        task_states['task-1'] = ('SUCCESS', {'extracted_text': 'text'})
+        client.publish('task-1', 'SUCCESS')
+
+    response, elapsed = get_result('/ocr/result/task-1?wait=10', complete)
+
+    assert response.json()['state'] == 'SUCCESS'
+    assert 0.2 <= elapsed < 1
+
+
+def test_wait_times_out(task_states, monkeypatch):
+    monkeypatch.setattr(main, 'result_waiter', ResultWaiter(FakeRedis(), channel_of))
+
+    response, elapsed = get_result('/ocr/result/task-1?wait=0.3')
+
+    assert response.json()['state'] == 'PENDING'
+    assert 0.3 <= elapsed < 1
+
+
+def test_wait_polls_other_result_backends(task_states, monkeypatch):
+    monkeypatch.setattr(main, 'result_waiter', None)
+
+    response, elapsed = get_result('/ocr/result/task-1?wait=10',
+                                   lambda: task_states.update({'task-1': ('SUCCESS', {'extracted_text': 'text'})}))
+
+    assert response.json()['state'] == 'SUCCESS'
+    assert elapsed < 2
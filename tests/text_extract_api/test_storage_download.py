@@ -0,0 +1,62 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from text_extract_api.main import app
+
+CONTENT = bytes(range(256)) * 64
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    profiles = tmp_path / 'storage_profiles'
+    profiles.mkdir()
+    (profiles / 'local.yaml').write_text(
+        f"strategy: local_filesystem\nsettings:\n  root_path: {tmp_path / 'storage'}\n")
+    (profiles / 's3.yaml').write_text(
+        "strategy: aws_s3\nsettings:\n  bucket_name: results\n  region: us-east-1\n"
+        "  access_key: testing\n  secret_access_key: testing\n")
+    monkeypatch.setenv('STORAGE_PROFILE_PATH', str(profiles))
+    (tmp_path / 'storage' / 'results').mkdir(parents=True)
+    (tmp_path / 'storage' / 'results' / 'file.bin').write_bytes(CONTENT)
+    return TestClient(app)
+
+
+@pytest.fixture
+def s3_client(client, monkeypatch):
+    moto = pytest.importorskip('moto')
+    import boto3
+
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        monkeypatch.setenv(name, 'testing')
+    with moto.mock_aws():
+        s3 = boto3.client('s3', region_name='us-east-1')
+        s3.create_bucket(Bucket='results')
+        s3.put_object(Bucket='results', Key='results/file.bin', Body=CONTENT)
+        yield client
+
+
+@pytest.mark.parametrize("profile", ['local', 's3'])
+def test_download(request, profile):
+    client = request.getfixturevalue('client' if profile == 'local' else 's3_client')
+    params = {'file_name': 'results/file.bin', 'storage_profile': profile}
+
+    response = client.get('/storage/download', params=params)
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers['content-type'] == 'application/octet-stream'
+
+    response = client.get('/storage/download', params=params, headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.headers['content-range'] == f'bytes 100-199/{len(CONTENT)}'
+    assert response.content == CONTENT[100:200]
+
+    etag = client.get('/storage/download', params=params).headers['etag']
+    response = client.get('/storage/download', params=params, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.content == b''
+
+
+def test_download_missing_file(client):
+    response = client.get('/storage/download', params={'file_name': 'missing.bin', 'storage_profile': 'local'})
+
+    assert response.status_code == 404
@@ -0,0 +1,55 @@
+import json
+import time
+
+import pytest
+
+pytest.importorskip('opentelemetry.sdk')
+
+from opentelemetry import trace
+
+from text_extract_api import tracing
+
+
+@pytest.fixture(scope='module')
+def trace_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp('traces') / 'traces.jsonl'
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv('TRACING_EXPORTER', 'file')
+        monkeypatch.setenv('TRACING_FILE', str(path))
+        assert tracing.setup_tracing('test')
+    return path
+
+
+def read_spans(path):
+    trace.get_tracer_provider().force_flush()
+    return {span['name']: span for span in map(json.loads, path.read_text().splitlines())}
+
+
+def test_task_span_continues_the_enqueueing_trace(trace_file):
+    with tracing.span('ocr_endpoint'):
+        headers = tracing.inject_headers()
+    assert 'traceparent' in headers
+
+    tracing.start_task_span('task-1', 'ocr_task', headers)
+    started_at = time.time()
+    tracing.record_span('extract.page', started_at, 0.5, page_no=1)
+    tracing.end_task_span('task-1', 'SUCCESS')
+
+    spans = read_spans(trace_file)
+    endpoint, task, page = spans['ocr_endpoint'], spans['ocr_task'], spans['extract.page']
+    assert task['context']['trace_id'] == endpoint['context']['trace_id']
+    assert task['parent_id'] == endpoint['context']['span_id']
+    assert page['parent_id'] == task['context']['span_id']
+    assert page['attributes'] == {'page_no': 1}
+    assert task['attributes']['celery.state'] == 'SUCCESS'
+
+
+def test_disabled_tracing_is_a_no_op(monkeypatch):
+    monkeypatch.setattr(tracing, 'trace', None)
+    monkeypatch.setattr(tracing, 'propagate', None)
+
+    with tracing.span('nothing') as current:
+        assert current is None
+    assert tracing.inject_headers() == {}
+    tracing.start_task_span('task-2', 'ocr_task', {})
+    tracing.end_task_span('task-2')
@@ -0,0 +1,222 @@
+import os
+import re
+from typing import Dict, List, Optional
+
+from redis.exceptions import ResponseError
+
+from text_extract_api.metrics import CACHE_LOOKUPS
+
+# Every cache key lives under CACHE_KEY_PREFIX, in a namespace:
+#   {prefix}ocr:{strategy}:{file_hash}     - extracted text of a file
+#   {prefix}llm:{sha256}                   - LLM output of a text chunk
+#   {prefix}format:{task_id}:{format}      - rendered result formats
+# so the cache can be invalidated (and measured) without touching the Celery broker/backend keys
+# that might share the Redis database.
+NAMESPACES = ('ocr', 'llm', 'format', 'checkpoint')
+# Earlier versions cached the extracted texts under the bare file hash (MD5) - for any strategy. They are still
+# read (see `read_legacy_keys`) and removed along with the 'ocr' namespace.
+LEGACY_OCR_KEY_PATTERN = '[0-9a-f]' * 32
+STATS_KEY_SUFFIX = 'stats'
+SCAN_BATCH_SIZE = 500
+
+
+def key_prefix() -> str:
+    return os.getenv('CACHE_KEY_PREFIX', 'cache:')
+
+
+def cache_key(namespace: str, *parts: str) -> str:
+    return key_prefix() + ':'.join((namespace,) + parts)
+
+
+def stats_key() -> str:
+    return key_prefix() + STATS_KEY_SUFFIX
+
+
+def ocr_cache_key(strategy: str, file_hash: str) -> str:
+    return cache_key('ocr', strategy, file_hash)
+
+
+def legacy_ocr_cache_key(file_hash: str) -> str:
+    return file_hash
+
+
+def read_legacy_keys() -> bool:
+    """
+    Whether OCR results missing in the cache are looked up under the keys of earlier versions
+    (CACHE_READ_LEGACY_KEYS, enabled by default) - disable it once they are gone.
+    """
+    return os.getenv('CACHE_READ_LEGACY_KEYS', 'true').lower() in ('1', 'true', 'yes')
+
+
+def count_lookup(client, namespace: str, hit: bool):
+    """
+    Counts a cache hit or miss of `namespace` - returns what the client returns, so with an asyncio
+    client the result is awaited by the caller.
+    """
+    CACHE_LOOKUPS.labels(namespace, 'hit' if hit else 'miss').inc()
+    return client.hincrby(stats_key(), f"{namespace}:{'hits' if hit else 'misses'}", 1)
+
+
+def _escape(value: str) -> str:
+    return re.sub(r'([*?\[\]\\])', r'\\\1', value)
+
+
+def key_pattern(namespace: Optional[str] = None, strategy: Optional[str] = None,
+                file_hash: Optional[str] = None) -> str:
+    """
+    SCAN pattern of the cache keys to invalidate. `strategy` and `file_hash` select OCR results.
+
+    :raises ValueError: for an unknown namespace or filters not applicable to it.
+    """
+    if namespace is not None and namespace not in NAMESPACES:
+        raise ValueError(f"Unknown cache namespace '{namespace}'. Available namespaces: {', '.join(NAMESPACES)}")
+    if strategy or file_hash:
+        if namespace not in (None, 'ocr'):
+            raise ValueError("The strategy and file_hash filters apply to the 'ocr' namespace only")
+        return cache_key('ocr', _escape(strategy) if strategy else '*', _escape(file_hash) if file_hash else '*')
+    if namespace:
+        return cache_key(namespace, '*')
+    return key_prefix() + '[a-z]*:*'
+
+
+def legacy_key_patterns(namespace: Optional[str] = None, strategy: Optional[str] = None,
+                        file_hash: Optional[str] = None) -> List[str]:
+    """
+    SCAN patterns of the legacy OCR cache keys to invalidate along with `key_pattern`. Legacy keys do not
+    tell the strategy, so they are not matched by the strategy filter.
+    """
+    if namespace not in (None, 'ocr') or strategy:
+        return []
+    if file_hash:
+        return [legacy_ocr_cache_key(file_hash)] if re.fullmatch('[0-9a-f]{32}', file_hash) else []
+    return [LEGACY_OCR_KEY_PATTERN]
+
+
+def _namespace_of(key: str) -> str:
+    return key[len(key_prefix()):].split(':', 1)[0]
+
+
+async def _unlink_batch(client, keys: List[bytes], min_idle_seconds: Optional[int]) -> int:
+    if min_idle_seconds is not None:
+        async with client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.object('idletime', key)
+            try:
+                idle_times = await pipe.execute()
+            except ResponseError as e:
+                # OBJECT IDLETIME is not available with the LFU maxmemory policies
+                raise ValueError(f"min_idle_seconds is not supported by the Redis server: {e}")
+        keys = [key for key, idle in zip(keys, idle_times) if idle is not None and idle >= min_idle_seconds]
+    if not keys:
+        return 0
+    return await client.unlink(*keys)
+
+
+async def invalidate(client, namespace: Optional[str] = None, strategy: Optional[str] = None,
+                     file_hash: Optional[str] = None, min_idle_seconds: Optional[int] = None,
+                     batch_size: int = SCAN_BATCH_SIZE) -> int:
+    """
+    Removes the matching cache keys in SCAN/UNLINK batches - Redis is never blocked for long
+    (unlike KEYS or FLUSHDB) and the values are freed in the background. With `min_idle_seconds` only
+    keys not read or written for at least that long are removed. Returns the number of keys removed.
+
+    :raises ValueError: for invalid filters, or `min_idle_seconds` with an LFU maxmemory policy.
+    """
+    patterns = [key_pattern(namespace, strategy, file_hash)] + legacy_key_patterns(namespace, strategy, file_hash)
+    removed = 0
+    for pattern in patterns:
+        batch = []
+        async for key in client.scan_iter(match=pattern, count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                removed += await _unlink_batch(client, batch, min_idle_seconds)
+                batch = []
+        if batch:
+            removed += await _unlink_batch(client, batch, min_idle_seconds)
+    if namespace is None and not (strategy or file_hash) and min_idle_seconds is None:
+        await client.unlink(stats_key())
+    return removed
+
+
+def _ratio(hits: int, misses: int) -> Optional[float]:
+    return round(hits / (hits + misses), 4) if hits + misses else None
+
+
+async def cache_stats(client, sample_size: int = 10000, top: int = 10,
+                      batch_size: int = SCAN_BATCH_SIZE) -> dict:
+    """
+    Key counts, memory and hit ratios of the cache namespaces, and its largest keys.
+
+    All keys are counted; the memory used is measured (MEMORY USAGE) for the first `sample_size` keys
+    only and extrapolated to the rest of each namespace.
+    """
+    namespaces: Dict[str, dict] = {
+        namespace: {'keys': 0, 'sampled_keys': 0, 'sampled_bytes': 0} for namespace in NAMESPACES
+    }
+    largest = []
+    sampled = 0
+    batch = []
+
+    async def measure(keys):
+        async with client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.memory_usage(key)
+            sizes = await pipe.execute()
+        for key, size in zip(keys, sizes):
+            if size is None:
+                continue
+            stats = namespaces[_namespace_of(key)]
+            stats['sampled_keys'] += 1
+            stats['sampled_bytes'] += size
+            largest.append((size, key))
+        largest.sort(reverse=True)
+        del largest[top:]
+
+    async for key in client.scan_iter(match=key_prefix() + '[a-z]*:*', count=batch_size):
+        key = key.decode('utf-8') if isinstance(key, bytes) else key
+        namespace = _namespace_of(key)
+        if namespace not in namespaces:
+            continue
+        namespaces[namespace]['keys'] += 1
+        if sampled < sample_size:
+            sampled += 1
+            batch.append(key)
+            if len(batch) >= batch_size:
+                await measure(batch)
+                batch = []
+    if batch:
+        await measure(batch)
+
+    counters = {
+        (key.decode('utf-8') if isinstance(key, bytes) else key): int(value)
+        for key, value in (await client.hgetall(stats_key())).items()
+    }
+    for namespace, stats in namespaces.items():
+        sampled_keys = stats.pop('sampled_keys')
+        sampled_bytes = stats.pop('sampled_bytes')
+        stats['bytes'] = int(sampled_bytes / sampled_keys * stats['keys']) if sampled_keys else 0
+        hits = counters.get(f'{namespace}:hits', 0)
+        misses = counters.get(f'{namespace}:misses', 0)
+        stats.update({'hits': hits, 'misses': misses, 'hit_ratio': _ratio(hits, misses)})
+
+    memory = await client.info('memory')
+    server = await client.info('stats')
+    return {
+        'namespaces': namespaces,
+        'keys': sum(stats['keys'] for stats in namespaces.values()),
+        'bytes': sum(stats['bytes'] for stats in namespaces.values()),
+        'sampled_keys': sampled,
+        'top_keys': [{'key': key, 'bytes': size} for size, key in largest],
+        'memory': {
+            'used_memory': memory.get('used_memory'),
+            'maxmemory': memory.get('maxmemory'),
+            'maxmemory_policy': memory.get('maxmemory_policy'),
+        },
+        'server': {
+            'keyspace_hits': server.get('keyspace_hits'),
+            'keyspace_misses': server.get('keyspace_misses'),
+            'hit_ratio': _ratio(server.get('keyspace_hits', 0), server.get('keyspace_misses', 0)),
+            'evicted_keys': server.get('evicted_keys'),
+            'expired_keys': server.get('expired_keys'),
+        },
+    }
@@ -53,3 +53,6 @@ app.config_from_object({
 })
 
 app.autodiscover_tasks(["text_extract_api.extract"], 'tasks', True)
+
+# Connects the worker signal handlers warming up the Ollama models before the queues are consumed
+import text_extract_api.extract.model_warmup  # noqa
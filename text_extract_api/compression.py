@@ -0,0 +1,148 @@
+import zlib
+from typing import Optional
+
+import brotli
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Already compressed (or streamed event) content is sent as is
+EXCLUDED_CONTENT_TYPES = ('application/gzip', 'application/zip', 'text/event-stream', 'image/', 'audio/', 'video/')
+# Bodies this large are compressed in a thread, not to block the event loop
+THREAD_MINIMUM_SIZE = 256 * 1024
+
+
+def select_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Returns `br` or `gzip` - whichever the `Accept-Encoding` header prefers (brotli on a tie) - or None.
+    """
+    qualities = {}
+    for item in accept_encoding.lower().split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding] = quality
+
+    wildcard = qualities.get('*', 0.0)
+    candidates = [(qualities.get(coding, wildcard), coding) for coding in ('br', 'gzip')]
+    quality, coding = max(candidates, key=lambda candidate: candidate[0])
+    return coding if quality > 0 else None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data) + (self._brotli.finish() if final else self._brotli.flush())
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses of at least `minimum_size` bytes with brotli or gzip, as negotiated by `Accept-Encoding`.
+    Streaming responses are compressed chunk by chunk. Partial (206) and already encoded responses are left as is.
+    Strong ETags of compressed responses are made weak.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = select_encoding(Headers(scope=scope).get('accept-encoding', '')) if scope['type'] == 'http' else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressingResponder(self, encoding, send).run(scope, receive)
+
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.app = middleware.app
+        self.minimum_size = middleware.minimum_size
+        self.encoding = encoding
+        self.compressor = _Compressor(encoding, middleware.gzip_level, middleware.brotli_quality)
+        self.send = send
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.started = False
+
+    async def run(self, scope: Scope, receive: Receive) -> None:
+        if 'http.response.pathsend' in scope.get('extensions', {}):
+            # A file sent by path (e.g. FileResponse) bypasses the body messages - have it sent as a body instead
+            extensions = {name: value for name, value in scope['extensions'].items()
+                          if name != 'http.response.pathsend'}
+            scope = dict(scope, extensions=extensions)
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            headers = Headers(raw=message['headers'])
+            content_type = headers.get('content-type', '').lower()
+            self.passthrough = (
+                'content-encoding' in headers
+                or message['status'] in (204, 206, 304)
+                or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            )
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.start_message = message
+            return
+
+        if message['type'] != 'http.response.body' or self.passthrough:
+            if not self.started and self.start_message is not None:
+                self.started = True
+                await self.send(self.start_message)
+            await self.send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if not self.started:
+            self.started = True
+            if not more_body and len(body) < self.minimum_size:
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+
+            compressed = await self._compress(body, final=not more_body)
+            headers = MutableHeaders(raw=self.start_message['headers'])
+            headers['Content-Encoding'] = self.encoding
+            headers.add_vary_header('Accept-Encoding')
+            etag = headers.get('etag')
+            if etag and not etag.startswith('W/'):
+                headers['ETag'] = 'W/' + etag  # the compressed body differs from the one the strong ETag names
+            if more_body:
+                if 'content-length' in headers:
+                    del headers['Content-Length']
+            else:
+                headers['Content-Length'] = str(len(compressed))
+            await self.send(self.start_message)
+            await self.send({'type': 'http.response.body', 'body': compressed, 'more_body': more_body})
+            return
+
+        await self.send({'type': 'http.response.body', 'body': await self._compress(body, final=not more_body),
+                         'more_body': more_body})
+
+    async def _compress(self, body: bytes, final: bool) -> bytes:
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            return await run_in_threadpool(self.compressor.compress, body, final)
+        return self.compressor.compress(body, final)
@@ -0,0 +1,47 @@
+import functools
+import os
+from typing import AsyncIterator, Callable, Dict, Iterator, TypeVar
+
+import anyio.to_thread
+from anyio import CapacityLimiter
+from anyio.lowlevel import RunVar
+
+T = TypeVar('T')
+
+# Blocking calls run in bounded thread pools, one per backend - a slow storage backend can use up
+# its own threads only, while the other requests (e.g. task results) still get theirs
+POOL_SIZES = {
+    'default': lambda: int(os.getenv('API_BLOCKING_THREADS', 32)),
+    'storage': lambda: int(os.getenv('API_STORAGE_THREADS', 16)),
+}
+
+_limiters: Dict[str, RunVar] = {pool: RunVar(f'{pool}_limiter') for pool in POOL_SIZES}
+
+
+def _limiter(pool: str) -> CapacityLimiter:
+    # Limiters are bound to the running event loop, hence created on first use within it
+    try:
+        return _limiters[pool].get()
+    except LookupError:
+        limiter = CapacityLimiter(POOL_SIZES[pool]())
+        _limiters[pool].set(limiter)
+        return limiter
+
+
+async def run_blocking(func: Callable[..., T], *args, pool: str = 'default', **kwargs) -> T:
+    """
+    Runs a blocking call in the thread pool `pool`, not to block the event loop.
+    """
+    return await anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs), limiter=_limiter(pool))
+
+
+async def iterate_blocking(iterator: Iterator[T], pool: str = 'default') -> AsyncIterator[T]:
+    """
+    Iterates a blocking iterator (e.g. a storage download) in the thread pool `pool`.
+    """
+    sentinel = object()
+    while True:
+        item = await run_blocking(next, iterator, sentinel, pool=pool)
+        if item is sentinel:
+            return
+        yield item
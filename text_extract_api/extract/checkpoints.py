@@ -0,0 +1,78 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+import redis
+
+from text_extract_api.cache import cache_key
+from text_extract_api.extract.extract_result import PageSegment
+
+logger = logging.getLogger(__name__)
+
+
+def checkpoints_enabled() -> bool:
+    return os.getenv('PAGE_CHECKPOINTS', 'true').lower() in ('1', 'true', 'yes')
+
+
+def checkpoint_key(strategy: str, file_hash: str, language: str, model: Optional[str] = None,
+                   prompt: Optional[str] = None) -> str:
+    """
+    Key of the page checkpoints - pages extracted with another model or prompt of the strategy are not reused.
+    """
+    prompt_hash = hashlib.sha256((prompt or '').encode('utf-8')).hexdigest()
+    return cache_key('checkpoint', strategy, model or '', prompt_hash, file_hash, language)
+
+
+def may_resume(ocr_cache: bool, request) -> bool:
+    """
+    Whether the task (by its Celery `request`) may resume from the pages checkpointed earlier: when the cache is
+    allowed, or when the task is retried or redelivered - e.g. after its worker died. Otherwise the document
+    is extracted again, as requested with `ocr_cache` disabled.
+    """
+    redelivered = (getattr(request, 'delivery_info', None) or {}).get('redelivered')
+    return bool(ocr_cache or getattr(request, 'retries', 0) or redelivered)
+
+
+class PageCheckpoints:
+    """
+    Pages of a document extracted so far, kept in a Redis hash (by the first page number) as they complete.
+    A redelivered task - e.g. after its worker exceeded `worker_max_memory_per_child` - a retry, or a request of
+    the same document allowing the cache resumes from the missing pages instead of extracting the whole document
+    again (see `may_resume`).
+    The checkpoints expire after PAGE_CHECKPOINT_TTL seconds and are removed once the task succeeded.
+    Redis failures are reported, but do not fail the extraction.
+    """
+
+    def __init__(self, client: redis.Redis, key: str, ttl: Optional[int] = None):
+        self.client = client
+        self.key = key
+        self.ttl = ttl if ttl is not None else int(os.getenv('PAGE_CHECKPOINT_TTL', 86400))
+
+    def load(self) -> Dict[int, PageSegment]:
+        try:
+            fields = self.client.hgetall(self.key)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to load the page checkpoints {self.key}: {e}")
+            return {}
+        pages = {}
+        for value in fields.values():
+            segment = json.loads(value)
+            pages[segment['page_no']] = PageSegment(**segment)
+        return pages
+
+    def save(self, segment: PageSegment) -> None:
+        try:
+            with self.client.pipeline() as pipe:
+                pipe.hset(self.key, str(segment.page_no), json.dumps(segment.to_dict()))
+                pipe.expire(self.key, self.ttl)
+                pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Failed to checkpoint page {segment.page_no} to {self.key}: {e}")
+
+    def clear(self) -> None:
+        try:
+            self.client.delete(self.key)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to remove the page checkpoints {self.key}: {e}")
@@ -1,4 +1,4 @@
-from typing import Callable, Any
+from typing import Callable, Any, Dict, List, Optional, Tuple
 
 """
 IMPORTANT INFORMATION ABOUT THIS CLASS:
@@ -15,11 +15,66 @@ resulting string caused us to lose valuable metadata about the document. Thanks
 class, we retain DoclingDocument and foresee that other converters/OCRs may have similar 
 metadata.
 """
+
+class PageSegment:
+    """
+    Text of a single page (or of a page range, when `last_page_no` is set) with its origin and timings.
+
+    The text might be given directly or produced lazily by `text_gatherer` on first access - e.g.
+    a per-page markdown export of a DoclingDocument.
+    """
+    __slots__ = ('page_no', 'last_page_no', 'strategy', 'started_at', 'duration', '_text', '_text_gatherer')
+
+    def __init__(
+        self,
+        page_no: int,
+        text: Optional[str] = None,
+        strategy: Optional[str] = None,
+        started_at: Optional[float] = None,
+        duration: Optional[float] = None,
+        last_page_no: Optional[int] = None,
+        text_gatherer: Optional[Callable[[], str]] = None
+    ):
+        if text is None and text_gatherer is None:
+            raise ValueError("PageSegment requires `text` or `text_gatherer`.")
+
+        self.page_no = page_no
+        self.last_page_no = last_page_no
+        self.strategy = strategy
+        self.started_at = started_at
+        self.duration = duration
+        self._text = text
+        self._text_gatherer = text_gatherer
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self._text_gatherer()
+            self._text_gatherer = None
+        return self._text
+
+    def to_dict(self, include_text: bool = True) -> Dict[str, Any]:
+        segment = {
+            'page_no': self.page_no,
+            'last_page_no': self.last_page_no,
+            'strategy': self.strategy,
+            'started_at': self.started_at,
+            'duration': self.duration,
+        }
+        if include_text:
+            segment['text'] = self.text
+        return segment
+
+    def __repr__(self) -> str:
+        return f"<PageSegment(page_no={self.page_no}, strategy='{self.strategy}', duration={self.duration})>"
+
+
 class ExtractResult:
     def __init__(
         self,
         value: Any,
-        text_gatherer: Callable[[Any], str] = None
+        text_gatherer: Callable[[Any], str] = None,
+        pages: Optional[List[PageSegment]] = None
     ):
         """
         Initializes a UnifiedText instance.
@@ -28,6 +83,7 @@ class ExtractResult:
             value (Any): The object containing or representing the text.
             text_gatherer (Callable[[Any], str], optional): A callable that extracts text
                 from the `data`. Defaults to the `_default_text_gatherer`.
+            pages (List[PageSegment], optional): Ordered per-page segments of the result.
 
         Raises:
             ValueError: If `text_gatherer` is not callable or not provided when `value` is not a string.
@@ -36,14 +92,14 @@ class ExtractResult:
             Using the default text gatherer
 
             >>> unified = ExtractResult("Example text")
-            >>> print(unified.text())
+            >>> print(unified.text)
             Example text
 
             Using a custom text gatherer
 
             >>> def custom_gatherer(value): return f"Custom: {value}"
             >>> unified = ExtractResult(123, custom_gatherer)
-            >>> print(unified.text())
+            >>> print(unified.text)
             Custom: 123
         """
 
@@ -55,20 +111,69 @@ class ExtractResult:
 
         self.value = value
         self.text_gatherer = text_gatherer or self._default_text_gatherer
+        self.pages: List[PageSegment] = pages or []
+        self.page_separator: Optional[str] = None
+        self._text: Optional[str] = None
+        self._derived: Dict[str, Any] = {}
 
     @staticmethod
-    def from_text(value: str) -> 'ExtractResult':
-        return ExtractResult(value)
+    def from_text(value: str, pages: Optional[List[PageSegment]] = None) -> 'ExtractResult':
+        return ExtractResult(value, pages=pages)
+
+    @staticmethod
+    def from_pages(pages: List[PageSegment], separator: str = "\n\n") -> 'ExtractResult':
+        """
+        Builds a result out of page segments; the text is gathered by joining the page texts.
+        """
+        result = ExtractResult(pages, lambda segments: separator.join(segment.text for segment in segments), pages)
+        result.page_separator = separator
+        return result
 
     @property
     def text(self) -> str:
         """
-        Retrieves text using the text gatherer.
+        Retrieves text using the text gatherer. The text is gathered once and memoized.
 
         Returns:
             str: The extracted text from `value`.
         """
-        return self.text_gatherer(self.value)
+        if self._text is None:
+            self._text = self.text_gatherer(self.value)
+        return self._text
+
+    def add_page(self, segment: PageSegment) -> None:
+        self.pages.append(segment)
+
+    def page_range(self, start: int, count: int) -> List[PageSegment]:
+        """
+        Returns up to `count` segments starting with the page number `start`.
+        """
+        return [segment for segment in self.pages if segment.page_no >= start][:count]
+
+    def page_offsets(self) -> Optional[List[Tuple[int, int]]]:
+        """
+        Returns (start, end) character offsets of the pages within `text`, or None when the text is not
+        made of the page texts (e.g. a DoclingDocument exported as a whole).
+        """
+        if self.page_separator is None:
+            return None
+        offsets = []
+        position = 0
+        for index, segment in enumerate(self.pages):
+            if index:
+                position += len(self.page_separator)
+            offsets.append((position, position + len(segment.text)))
+            position += len(segment.text)
+        return offsets
+
+    def derived(self, name: str, producer: Callable[['ExtractResult'], Any]) -> Any:
+        """
+        Returns a derived output (e.g. another export format) produced by `producer` on first request
+        and memoized under `name`.
+        """
+        if name not in self._derived:
+            self._derived[name] = producer(self)
+        return self._derived[name]
 
     @staticmethod
     def _default_text_gatherer(value: Any) -> str:
@@ -87,4 +192,4 @@ class ExtractResult:
         """
         if isinstance(value, str):
             return value
-        raise TypeError("Default text gatherer only supports strings.")
\ No newline at end of file
+        raise TypeError("Default text gatherer only supports strings.")
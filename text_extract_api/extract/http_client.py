@@ -0,0 +1,139 @@
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised when requests are short-circuited because the remote endpoint keeps failing.
+    """
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failures in a row the circuit opens and calls fail fast for
+    `reset_timeout` seconds. Then a single trial call is let through (half-open state): success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_progress:
+                raise CircuitOpenError(
+                    f"Circuit open after {self._failures} consecutive failures - retry in a while")
+            self._trial_in_progress = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_progress = False
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class RetryingHttpClient:
+    """
+    Pooled keep-alive HTTP client with bounded timeouts, retries on connection errors and 5xx
+    responses (exponential backoff with full jitter) and a circuit breaker per client.
+
+    Instances are thread-safe and meant to be shared - see `get_http_client()`.
+    """
+
+    RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+    def __init__(
+            self,
+            timeout: float = 300.0,
+            connect_timeout: float = 10.0,
+            max_retries: int = 3,
+            backoff_base: float = 0.5,
+            backoff_max: float = 30.0,
+            max_connections: int = 20,
+            circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._client = httpx.Client(
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request('POST', url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request('GET', url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Sends the request, retrying transient failures. The last 5xx response is returned once
+        retries are exhausted; connection errors are re-raised.
+        """
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_call()
+            try:
+                response = self._client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                self.circuit_breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                if response.status_code not in self.RETRY_STATUS_CODES:
+                    self.circuit_breaker.record_success()
+                    return response
+                self.circuit_breaker.record_failure()
+                if attempt >= self.max_retries:
+                    return response
+
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def close(self):
+        self._client.close()
+
+
+_clients: Dict[Tuple, RetryingHttpClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_http_client(**options) -> RetryingHttpClient:
+    """
+    Returns a process-wide client for the given options, so connections are reused between tasks.
+    """
+    key = tuple(sorted(options.items()))
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = RetryingHttpClient(**options)
+        return _clients[key]
@@ -0,0 +1,122 @@
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Union
+
+from ollama import Client
+
+from text_extract_api.cache import cache_key, count_lookup
+
+# Rough token estimate - good enough for keeping chunks under the model context without a tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def split_text(text: str, max_tokens: int, pages: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Splits text into chunks of at most `max_tokens` (estimated) tokens. Given the page texts (see
+    `ExtractResult.pages`), chunks are made of whole pages joined by blank lines and `text` is not used.
+    Otherwise - and within oversized pages - paragraphs are preferred as boundaries, then lines;
+    only a single oversized line is cut in the middle. Consecutive small parts are packed together
+    up to the budget.
+    """
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+    if pages:
+        chunks = _pack([page.strip('\n') for page in pages if page.strip()], max_chars, '\n\n', ['\n\n', '\n'])
+    else:
+        chunks = _split(text, max_chars, ['\n\n', '\n'])
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def _split(text: str, max_chars: int, separators: List[str]) -> List[str]:
+    if len(text) <= max_chars:
+        return [text]
+    if not separators:
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+    return _pack(text.split(separators[0]), max_chars, separators[0], separators[1:])
+
+
+def _pack(parts: List[str], max_chars: int, separator: str, finer_separators: List[str]) -> List[str]:
+    """
+    Packs consecutive parts joined by `separator` into chunks of at most `max_chars`; oversized parts
+    are split further on `finer_separators`.
+    """
+    chunks: List[str] = []
+    current = ''
+    for part in parts:
+        candidate = current + separator + part if current else part
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        if len(part) > max_chars:
+            chunks.extend(_split(part, max_chars, finer_separators))
+            current = ''
+        else:
+            current = part
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_cache_key(model: str, prompt: str, chunk: str) -> str:
+    return cache_key('llm', hashlib.sha256(f"{model}\0{prompt}\0{chunk}".encode('utf-8')).hexdigest())
+
+
+def transform_text_chunked(
+        client: Client,
+        model: str,
+        prompt: str,
+        text: str,
+        max_tokens: int,
+        concurrency: int,
+        reduce_prompt: Optional[str] = None,
+        cache=None,
+        on_chunk_done: Optional[Callable[[int, int], None]] = None,
+        keep_alive: Optional[Union[float, str]] = None,
+        pages: Optional[Sequence[str]] = None,
+) -> str:
+    """
+    Map-reduce LLM transformation: `prompt` is applied to every chunk of `text` concurrently (at most
+    `concurrency` requests in flight), the outputs are concatenated in order and - when `reduce_prompt`
+    is given - combined by one more generation over the concatenated outputs.
+
+    :param cache: Optional Redis-like client (get/set) used to cache outputs per chunk.
+    :param on_chunk_done: Called with (number of chunks done, number of chunks) for progress reporting.
+    :param keep_alive: Ollama keep_alive sent with every request.
+    :param pages: Page texts of `text` - chunks are then split on page boundaries (see `split_text`).
+    """
+    chunks = split_text(text, max_tokens, pages)
+    num_done = 0
+    progress_lock = threading.Lock()
+
+    def transform_chunk(chunk: str) -> str:
+        nonlocal num_done
+        key = chunk_cache_key(model, prompt, chunk)
+        output = cache.get(key) if cache is not None else None
+        if cache is not None:
+            count_lookup(cache, 'llm', output is not None)
+        if output is not None:
+            output = output.decode('utf-8') if isinstance(output, bytes) else output
+        else:
+            output = client.generate(model, prompt + chunk, keep_alive=keep_alive)['response']
+            if cache is not None:
+                cache.set(key, output)
+        with progress_lock:
+            num_done += 1
+            if on_chunk_done:
+                on_chunk_done(num_done, len(chunks))
+        return output
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        outputs = list(executor.map(transform_chunk, chunks))
+
+    combined = '\n\n'.join(outputs)
+    if reduce_prompt:
+        combined = client.generate(model, reduce_prompt + combined, keep_alive=keep_alive)['response']
+    return combined
@@ -0,0 +1,178 @@
+import json
+import os
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+import redis
+import yaml
+from celery.signals import worker_init, worker_shutdown
+from ollama import Client
+
+from text_extract_api.extract.strategies.strategy import BUILTIN_STRATEGIES, Strategy
+
+READINESS_KEY_PREFIX = 'worker_ready:'
+# Strategies sending their `model` to Ollama - the models of the other strategies are not warmed up
+OLLAMA_STRATEGY_CLASSES = {BUILTIN_STRATEGIES['llama_vision']}
+
+_ready = False
+# Warm-up status by (Ollama host, model) - see `models_status`
+_models_status: Dict[Tuple[str, str], dict] = {}
+_readiness_key: Optional[str] = None
+_readiness_heartbeat: Optional[threading.Event] = None
+
+
+def keep_alive() -> Union[float, str]:
+    """
+    How long Ollama keeps a model loaded after a request (OLLAMA_KEEP_ALIVE, e.g. `30m`, `3600` or `-1`
+    for forever). Sent with every request so idle gaps do not unload the models.
+    """
+    value = os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def default_llm_model() -> str:
+    return os.getenv('LLM_DEFAULT_MODEL', 'llama3.1')
+
+
+def models_to_warm(config_path: Optional[str] = None) -> List[Tuple[str, str]]:
+    """
+    Returns (host, model) pairs to load on worker startup: models of the Ollama strategies configured in
+    `config_path` (OCR_CONFIG_PATH by default, see `Strategy.load_strategies_from_config`) and the comma
+    separated OLLAMA_WARMUP_MODELS - e.g. the LLM_DEFAULT_MODEL of workers running the LLM step.
+    Set OLLAMA_WARMUP_MODELS=none to disable the warm-up.
+    """
+    default_host = os.getenv('OLLAMA_HOST', 'http://localhost:11434')
+    extra_models = os.getenv('OLLAMA_WARMUP_MODELS', '')
+    if extra_models.strip().lower() == 'none':
+        return []
+
+    try:
+        strategies = Strategy.load_strategies_from_config(config_path)
+    except (FileNotFoundError, ValueError, yaml.YAMLError) as e:
+        print(f"Strategies config not loaded - no strategy models to warm up: {e}")
+        strategies = {}
+
+    models = [
+        (strategy_config.get('host', default_host), strategy_config['model'])
+        for strategy_config in strategies.values()
+        if strategy_config.get('class') in OLLAMA_STRATEGY_CLASSES and strategy_config.get('model')
+    ]
+    models.extend((default_host, model.strip()) for model in extra_models.split(',') if model.strip())
+    return list(dict.fromkeys(models))
+
+
+def warm_up_models(models: List[Tuple[str, str]], timeout: float = 60.0) -> bool:
+    """
+    Loads the models into Ollama memory with empty-prompt requests, retrying until all of them are
+    loaded or `timeout` seconds pass. Returns True when all models are warm.
+    """
+    global _ready
+    deadline = time.monotonic() + timeout
+    pending = list(models)
+    while pending:
+        for host, model in list(pending):
+            status = _models_status.setdefault((host, model), {'host': host, 'model': model, 'attempts': 0})
+            status['attempts'] += 1
+            try:
+                Client(host=host).generate(model=model, prompt='', keep_alive=keep_alive())
+                status.update(status='warm', warmed_at=time.time())
+                pending.remove((host, model))
+                print(f"🔥 Model warmed up: {model} ({host})")
+            except Exception as e:
+                # The last failure is kept once the model is warm - e.g. Ollama was still starting
+                status.update(status='cold', last_error=str(e), failed_at=time.time())
+                print(f"❌ Failed to warm up model {model} ({host}): {e}")
+        if pending and time.monotonic() < deadline:
+            time.sleep(min(5.0, max(0.0, deadline - time.monotonic())))
+        elif pending:
+            break
+
+    _ready = not pending
+    return _ready
+
+
+def is_ready() -> bool:
+    return _ready
+
+
+def models_status() -> List[dict]:
+    """
+    Warm-up status of every model: its Ollama `host` and `model`, `status` (`warm` or `cold`), the number of
+    `attempts`, `warmed_at` and the `last_error` with `failed_at` (timestamps), when any.
+    """
+    return [dict(status) for status in _models_status.values()]
+
+
+def readiness_key(hostname: Optional[str] = None) -> str:
+    return READINESS_KEY_PREFIX + (hostname or socket.gethostname())
+
+
+async def worker_readiness_async(redis_client) -> Dict[str, dict]:
+    """
+    Returns the readiness reported by the running workers, keyed by the worker host name.
+    """
+    readiness = {}
+    async for key in redis_client.scan_iter(match=READINESS_KEY_PREFIX + '*'):
+        value = await redis_client.get(key)
+        if value:
+            key = key.decode('utf-8') if isinstance(key, bytes) else key
+            readiness[key[len(READINESS_KEY_PREFIX):]] = json.loads(value)
+    return readiness
+
+
+def _redis_client():
+    return redis.Redis.from_url(os.getenv('REDIS_CACHE_URL'))
+
+
+def start_readiness_heartbeat(key: str, readiness: dict, ttl: int, interval: Optional[float] = None) -> threading.Event:
+    """
+    Reports the readiness under `key` with a `ttl` (seconds) refreshed every `interval` (a third of the `ttl`
+    by default), until the returned event is set. A worker killed without shutting down (e.g. by the OOM killer) expires within the `ttl`.
+    """
+    stopped = threading.Event()
+    value = json.dumps(readiness)
+
+    def heartbeat():
+        client = _redis_client()
+        while True:
+            try:
+                client.set(key, value, ex=ttl)
+            except redis.RedisError as e:
+                print(f"❌ Failed to report worker readiness: {e}")
+            if stopped.wait(interval or ttl / 3):
+                return
+
+    threading.Thread(target=heartbeat, name='worker-readiness', daemon=True).start()
+    return stopped
+
+
+@worker_init.connect
+def warm_up_on_worker_init(**kwargs):
+    """
+    Runs before the worker starts consuming its queues, so the first tasks do not pay the model load.
+    """
+    global _readiness_key, _readiness_heartbeat
+    models = models_to_warm()
+    if not models:
+        return
+    ready = warm_up_models(models, timeout=float(os.getenv('OLLAMA_WARMUP_TIMEOUT', 60)))
+    _readiness_key = readiness_key(getattr(kwargs.get('sender'), 'hostname', None))
+    _readiness_heartbeat = start_readiness_heartbeat(_readiness_key, {'ready': ready, 'models': models_status()},
+                                                     ttl=int(os.getenv('WORKER_READINESS_TTL', 60)))
+
+
+@worker_shutdown.connect
+def clear_readiness_on_worker_shutdown(**kwargs):
+    if not _readiness_key:
+        return
+    if _readiness_heartbeat is not None:
+        _readiness_heartbeat.set()
+    try:
+        _redis_client().delete(_readiness_key)
+    except redis.RedisError:
+        pass
@@ -0,0 +1,149 @@
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Optional, TypedDict
+
+from text_extract_api.extract.extract_result import PageSegment
+from text_extract_api.extract.result_store import RESULT_KEY_PREFIX, result_storage_profile
+from text_extract_api.files.storage_manager import StorageManager
+from text_extract_api.stages import set_stage_recorder
+
+PROFILE_SUMMARY_LINES = 40
+
+_current_timeline: ContextVar[Optional['TaskTimeline']] = ContextVar('task_timeline', default=None)
+
+
+class ProfileReference(TypedDict):
+    storage_profile: str
+    key: str
+    summary_key: str
+
+
+def peak_rss() -> int:
+    """
+    Peak resident set size of the process in bytes - the value `worker_max_memory_per_child` is checked against.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def tracemalloc_enabled() -> bool:
+    return os.getenv('TASK_TRACEMALLOC', 'false').lower() in ('1', 'true', 'yes')
+
+
+class TaskTimeline:
+    """
+    Durations of the stages of a task, of every page extracted and the peak memory - a compact record
+    returned with the task result. Stages nested in others (e.g. `convert` within `extract`) are reported
+    on their own, so the stages do not necessarily sum up to the total.
+    """
+
+    def __init__(self, started_at: float, enqueued_at: Optional[float] = None):
+        self.started_at = started_at
+        self.stages = {}
+        self.pages = []
+        self.profiler: Optional[cProfile.Profile] = None
+        if enqueued_at:
+            self.stages['queue_wait'] = max(0.0, started_at - enqueued_at)
+        self._tracemalloc_started = tracemalloc_enabled() and not tracemalloc.is_tracing()
+        if self._tracemalloc_started:
+            tracemalloc.start()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+    def add(self, stage: str, duration: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + duration
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add_pages(self, segments: Iterable[PageSegment]) -> None:
+        self.pages = [
+            {'page_no': segment.page_no, 'last_page_no': segment.last_page_no, 'duration': round(segment.duration, 3)}
+            for segment in segments if segment.duration is not None
+        ]
+
+    def to_dict(self) -> dict:
+        timeline = {stage: round(duration, 3) for stage, duration in self.stages.items()}
+        timeline['total'] = round(time.time() - self.started_at, 3)
+        timeline['pages'] = self.pages
+        if self.pages:
+            timeline['slowest_page'] = max(self.pages, key=lambda page: page['duration'])
+        timeline['peak_rss'] = peak_rss()
+        if tracemalloc.is_tracing():
+            timeline['tracemalloc_peak'] = tracemalloc.get_traced_memory()[1]
+        return timeline
+
+    def close(self) -> None:
+        """
+        Stops tracemalloc and the profiler, if started for this task - also when the task failed.
+        """
+        if self._tracemalloc_started:
+            tracemalloc.stop()
+            self._tracemalloc_started = False
+        if self.profiler is not None:
+            self.profiler.disable()
+
+
+def start_timeline(started_at: float, enqueued_at: Optional[float] = None) -> TaskTimeline:
+    """
+    Starts the timeline of the current task - stages might then be recorded by `stages.record_stage` from anywhere
+    in the task, e.g. by the file converters.
+    """
+    timeline = TaskTimeline(started_at, enqueued_at)
+    _current_timeline.set(timeline)
+    set_stage_recorder(timeline.add)
+    return timeline
+
+
+def finish_timeline() -> None:
+    timeline = _current_timeline.get()
+    if timeline is not None:
+        timeline.close()
+    _current_timeline.set(None)
+    set_stage_recorder(None)
+
+
+def start_profiler(timeline: TaskTimeline) -> Optional[cProfile.Profile]:
+    """
+    Starts cProfile for a TASK_PROFILE_SAMPLE_RATE fraction of the tasks (none by default). Only the task
+    thread is profiled - not the threads the strategies might spawn.
+    """
+    sample_rate = float(os.getenv('TASK_PROFILE_SAMPLE_RATE', 0))
+    if sample_rate <= 0 or random.random() >= sample_rate:
+        return None
+    timeline.profiler = cProfile.Profile()
+    timeline.profiler.enable()
+    return timeline.profiler
+
+
+def save_profile(task_id: str, profiler: cProfile.Profile, storage_profile: Optional[str] = None) -> ProfileReference:
+    """
+    Stops the profiler and stores its stats next to the task result: `{task_id}.prof` (pstats format, e.g. for
+    `python -m pstats` or snakeviz) and `{task_id}.prof.txt` with the top functions by cumulative time.
+    """
+    profiler.disable()
+    storage_profile = storage_profile or result_storage_profile()
+    stats = pstats.Stats(profiler)
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(PROFILE_SUMMARY_LINES)
+
+    key = f"{RESULT_KEY_PREFIX}{task_id}.prof"
+    storage_manager = StorageManager(storage_profile)
+    storage_manager.save_bytes(key, marshal.dumps(stats.stats))
+    storage_manager.save_bytes(key + '.txt', summary.getvalue().encode('utf-8'))
+    return {'storage_profile': storage_profile, 'key': key, 'summary_key': key + '.txt'}
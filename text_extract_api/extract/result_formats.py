@@ -0,0 +1,104 @@
+import json
+import re
+from typing import Iterable, List, Optional
+
+from text_extract_api.extract.extract_result import ExtractResult
+
+# Format name -> media type. `json` is the default response: the task state with the result inside.
+FORMAT_MEDIA_TYPES = {
+    'json': 'application/json',
+    'markdown': 'text/markdown',
+    'text': 'text/plain',
+    'docling': 'application/vnd.docling+json',
+    'msgpack': 'application/msgpack',
+}
+MEDIA_TYPE_ALIASES = {
+    'application/x-msgpack': 'msgpack',
+    'application/vnd.msgpack': 'msgpack',
+    'text/x-markdown': 'markdown',
+}
+DEFAULT_FORMAT = 'json'
+
+
+def _accepted_media_types(accept: str) -> List[str]:
+    """
+    Media types of an `Accept` header ordered by their quality, most preferred first.
+    Media types with q=0 are left out.
+    """
+    accepted = []
+    for position, item in enumerate(accept.split(',')):
+        media_type, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            accepted.append((-quality, position, media_type.lower()))
+    return [media_type for _, _, media_type in sorted(accepted)]
+
+
+def negotiate_format(format: Optional[str], accept: Optional[str], available: Iterable[str]) -> Optional[str]:
+    """
+    Picks the response format: an explicit `format` parameter wins over the `Accept` header.
+    Returns None when none of the `available` formats is acceptable.
+
+    :raises ValueError: for an unknown `format`.
+    """
+    available = [name for name in FORMAT_MEDIA_TYPES if name in set(available)]
+    if format:
+        if format not in FORMAT_MEDIA_TYPES:
+            raise ValueError(f"Unknown format '{format}'. Available formats: {', '.join(FORMAT_MEDIA_TYPES)}")
+        return format if format in available else None
+
+    if not accept:
+        return DEFAULT_FORMAT
+    for media_type in _accepted_media_types(accept):
+        if media_type in ('*/*', 'application/*') and DEFAULT_FORMAT in available:
+            return DEFAULT_FORMAT
+        if media_type == 'text/*':
+            return next((name for name in ('markdown', 'text') if name in available), None)
+        name = MEDIA_TYPE_ALIASES.get(media_type) or next(
+            (name for name, known_type in FORMAT_MEDIA_TYPES.items() if known_type == media_type), None)
+        if name in available:
+            return name
+    return None
+
+
+_MARKDOWN_RULES = [
+    (re.compile(r'^```.*$', re.MULTILINE), ''),                          # code fences
+    (re.compile(r'^[ \t]*\|?[ \t]*:?-{3,}:?[ \t]*(\|[ \t]*:?-{3,}:?[ \t]*)*\|?[ \t]*\n?', re.MULTILINE), ''),  # table rules
+    (re.compile(r'!\[([^\]]*)\]\([^)]*\)'), r'\1'),                      # images
+    (re.compile(r'\[([^\]]*)\]\([^)]*\)'), r'\1'),                       # links
+    (re.compile(r'^#{1,6}\s+', re.MULTILINE), ''),                       # headings
+    (re.compile(r'^[ \t]*>[ \t]?', re.MULTILINE), ''),                   # quotes
+    (re.compile(r'(\*\*|__)(.+?)\1'), r'\2'),                            # bold
+    (re.compile(r'(?<![\w*])([*_])(?!\s)(.+?)(?<!\s)\1(?![\w*])'), r'\2'),  # italics
+    (re.compile(r'`([^`]*)`'), r'\1'),                                   # inline code
+    (re.compile(r'<!--.*?-->', re.DOTALL), ''),                          # comments (e.g. docling image placeholders)
+]
+_TABLE_ROW = re.compile(r'^[ \t]*\|(.*)\|[ \t]*$', re.MULTILINE)
+
+
+def markdown_to_text(markdown: str) -> str:
+    """
+    Plain text rendition of markdown: the formatting syntax is removed and table cells are separated by tabs.
+    """
+    text = markdown
+    for pattern, replacement in _MARKDOWN_RULES:
+        text = pattern.sub(replacement, text)
+    text = _TABLE_ROW.sub(lambda row: '\t'.join(cell.strip() for cell in row.group(1).split('|')), text)
+    return re.sub(r'\n{3,}', '\n\n', text).strip() + '\n'
+
+
+def docling_json(extract_result: ExtractResult) -> Optional[str]:
+    """
+    Serialized DoclingDocument of the result, or None when the strategy did not produce one.
+    """
+    export_to_dict = getattr(extract_result.value, 'export_to_dict', None)
+    if not callable(export_to_dict):
+        return None
+    return extract_result.derived('docling', lambda result: json.dumps(export_to_dict(), ensure_ascii=False))
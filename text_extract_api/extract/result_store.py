@@ -0,0 +1,279 @@
+import bisect
+import codecs
+import functools
+import gzip
+import json
+import os
+import time
+import zlib
+from typing import Iterable, Iterator, List, Optional, Tuple, TypedDict
+
+from text_extract_api.extract.extract_result import PageSegment
+from text_extract_api.files.storage_manager import StorageManager
+
+RESULT_KEY_PREFIX = 'results/'
+# Blobs stored under RESULT_KEY_PREFIX: the results and their other formats (gzip), result indexes and task profiles
+RESULT_KEY_SUFFIXES = ('.gz', '.index.json', '.prof', '.prof.txt')
+SUMMARY_LENGTH = 500
+BLOCK_SIZE = 256 * 1024
+
+
+class ResultReference(TypedDict):
+    storage_profile: str
+    key: str
+    index_key: Optional[str]
+    encoding: str
+    content_type: str
+    size: int
+    compressed_size: int
+
+
+def offload_threshold() -> int:
+    """
+    Results with more UTF-8 bytes than RESULT_OFFLOAD_THRESHOLD are kept in the storage layer
+    instead of the Celery result backend.
+    """
+    return int(os.getenv('RESULT_OFFLOAD_THRESHOLD', 256 * 1024))
+
+
+def result_storage_profile() -> str:
+    return os.getenv('RESULT_STORAGE_PROFILE', 'default')
+
+
+def should_offload(text: str) -> bool:
+    # Cheap upper bound first - UTF-8 never takes more than 4 bytes per character
+    if len(text) * 4 <= offload_threshold():
+        return False
+    return len(text.encode('utf-8')) > offload_threshold()
+
+
+def summarize(text: str, length: int = SUMMARY_LENGTH) -> str:
+    return text[:length]
+
+
+def inline_page_index(pages: List[PageSegment], offsets: Optional[List[Tuple[int, int]]]) -> Optional[List[dict]]:
+    """
+    Page index of a result kept inline: (start, end) character offsets of every page within the text.
+    """
+    if not pages or offsets is None:
+        return None
+    return [
+        {'page_no': segment.page_no, 'last_page_no': segment.last_page_no, 'start': start, 'end': end}
+        for segment, (start, end) in zip(pages, offsets)
+    ]
+
+
+def _compress_members(parts: Iterable[bytes], members: List[Tuple[int, int, int]]) -> Iterator[bytes]:
+    """
+    Compresses every part as a separate gzip member. The concatenation is still a valid gzip file while
+    any member might be read and decompressed on its own - the (compressed offset, compressed size, size)
+    of every member yielded is appended to `members`.
+    """
+    position = 0
+    for part in parts:
+        member = gzip.compress(part)
+        members.append((position, len(member), len(part)))
+        position += len(member)
+        yield member
+
+
+def _byte_offsets(text: str, offsets: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Converts ascending (start, end) character offsets within `text` into UTF-8 byte offsets.
+    """
+    byte_offsets = []
+    position = byte_position = 0
+    for start, end in offsets:
+        byte_position += len(text[position:start].encode('utf-8'))
+        byte_end = byte_position + len(text[start:end].encode('utf-8'))
+        byte_offsets.append((byte_position, byte_end))
+        position, byte_position = end, byte_end
+    return byte_offsets
+
+
+def offload_result(task_id: str, text: str, storage_profile: Optional[str] = None,
+                   page_index: Optional[List[dict]] = None) -> ResultReference:
+    """
+    Stores the gzip compressed result text once, in the storage layer, and returns its reference.
+
+    The text is compressed in blocks of BLOCK_SIZE bytes. The index written next to it maps byte ranges
+    to their blocks and - given the `page_index` of the text (see `inline_page_index`) - pages to their
+    byte ranges, so a slice or a few pages of the result are read without decompressing the whole of it.
+    Blocks are compressed while being uploaded - the compressed result is never held whole in memory.
+    """
+    storage_profile = storage_profile or result_storage_profile()
+    storage_manager = StorageManager(storage_profile)
+    key = f"{RESULT_KEY_PREFIX}{task_id}.md.gz"
+    index_key = f"{RESULT_KEY_PREFIX}{task_id}.index.json"
+
+    data = text.encode('utf-8')
+    page_index = page_index or []
+    byte_offsets = _byte_offsets(text, [(page['start'], page['end']) for page in page_index])
+    blocks = []
+    storage_manager.save_stream(key, _compress_members(
+        (data[offset:offset + BLOCK_SIZE] for offset in range(0, max(len(data), 1), BLOCK_SIZE)), blocks))
+
+    index = {
+        'size': len(data),
+        'blocks': [
+            {'offset': block_no * BLOCK_SIZE, 'size': size, 'compressed_offset': compressed_offset,
+             'compressed_size': compressed_size}
+            for block_no, (compressed_offset, compressed_size, size) in enumerate(blocks)
+        ],
+        # The pages with (start, end) byte offsets within the text - instead of the character offsets
+        'pages': [dict(page, start=start, end=end) for page, (start, end) in zip(page_index, byte_offsets)],
+    }
+
+    storage_manager.save_bytes(index_key, json.dumps(index).encode('utf-8'))
+
+    return {
+        'storage_profile': storage_profile,
+        'key': key,
+        'index_key': index_key,
+        'encoding': 'gzip',
+        'content_type': 'text/markdown',
+        'size': len(data),
+        'compressed_size': sum(compressed_size for _, compressed_size, _ in blocks),
+    }
+
+
+def offload_document(task_id: str, name: str, data: str, content_type: str,
+                     storage_profile: Optional[str] = None) -> ResultReference:
+    """
+    Stores another format of the result (e.g. the Docling JSON), gzip compressed, next to the result text.
+    """
+    storage_profile = storage_profile or result_storage_profile()
+    key = f"{RESULT_KEY_PREFIX}{task_id}.{name}.gz"
+    encoded = data.encode('utf-8')
+    compressed = gzip.compress(encoded)
+    StorageManager(storage_profile).save_bytes(key, compressed)
+    return {
+        'storage_profile': storage_profile,
+        'key': key,
+        'index_key': None,
+        'encoding': 'gzip',
+        'content_type': content_type,
+        'size': len(encoded),
+        'compressed_size': len(compressed),
+    }
+
+
+def _iter_gunzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """
+    Incrementally decompresses a (possibly multi-member) gzip stream.
+    """
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        while chunk:
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+            chunk = decompressor.unused_data if decompressor.eof else b''
+            if decompressor.eof:
+                decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    data = decompressor.flush()
+    if data:
+        yield data
+
+
+def iter_result_text(reference: ResultReference, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """
+    Yields the text of an offloaded result, decompressing and decoding it incrementally.
+    """
+    chunks = StorageManager(reference['storage_profile']).load_stream(reference['key'], chunk_size)
+    if chunks is None:
+        raise FileNotFoundError(f"Result '{reference['key']}' not found in the '{reference['storage_profile']}' storage")
+
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for data in _iter_gunzip(chunks):
+        text = decoder.decode(data)
+        if text:
+            yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+def load_result_text(reference: ResultReference) -> str:
+    return ''.join(iter_result_text(reference))
+
+
+def load_index(reference: ResultReference) -> dict:
+    """
+    Returns the index of an offloaded result. Indexes are never modified once written, so the recently
+    used ones are kept in memory (RESULT_INDEX_CACHE_SIZE, default 128) - do not modify the returned index.
+    """
+    return _load_index(reference['storage_profile'], reference['index_key'])
+
+
+@functools.lru_cache(maxsize=int(os.getenv('RESULT_INDEX_CACHE_SIZE', 128)))
+def _load_index(storage_profile: str, index_key: str) -> dict:
+    data = StorageManager(storage_profile).load_bytes(index_key)
+    if data is None:
+        raise FileNotFoundError(f"Result index '{index_key}' not found")
+    return json.loads(data)
+
+
+def read_text_range(reference: ResultReference, index: dict, start: int, end: int) -> bytes:
+    """
+    Returns bytes `start`-`end` (inclusive) of the result text, decompressing only the blocks covering them.
+    """
+    blocks = index['blocks']
+    first = bisect.bisect_right([block['offset'] for block in blocks], start) - 1
+    last = bisect.bisect_right([block['offset'] for block in blocks], end) - 1
+    compressed_start = blocks[first]['compressed_offset']
+    compressed_end = blocks[last]['compressed_offset'] + blocks[last]['compressed_size']
+
+    compressed = StorageManager(reference['storage_profile']).load_range(
+        reference['key'], compressed_start, compressed_end - compressed_start)
+    data = gzip.decompress(compressed)
+    return data[start - blocks[first]['offset']:end - blocks[first]['offset'] + 1]
+
+
+def find_pages(page_index: List[dict], start: int, count: int) -> Tuple[int, int]:
+    """
+    Returns the [first, last) positions in the page index of up to `count` pages, beginning with the page
+    containing the page number `start`.
+    """
+    first = bisect.bisect_left([page.get('last_page_no') or page['page_no'] for page in page_index], start)
+    return first, min(first + max(count, 0), len(page_index))
+
+
+def read_pages(reference: ResultReference, index: dict, start: int, count: int) -> List[dict]:
+    """
+    Returns up to `count` pages (page numbers and texts) of an offloaded result, beginning with the page `start`.
+    Only the blocks of the result text covering the pages are read.
+    """
+    pages = index['pages']
+    first, last = find_pages(pages, start, count)
+    if first >= last:
+        return []
+
+    data_start, data_end = pages[first]['start'], pages[last - 1]['end']
+    data = read_text_range(reference, index, data_start, data_end - 1) if data_end > data_start else b''
+    return [
+        {
+            'page_no': page['page_no'],
+            'last_page_no': page['last_page_no'],
+            'text': data[page['start'] - data_start:page['end'] - data_start].decode('utf-8'),
+        }
+        for page in pages[first:last]
+    ]
+
+
+def sweep_offloaded_results(max_age: float, storage_profile: Optional[str] = None) -> int:
+    """
+    Deletes the blobs stored next to the task results (see RESULT_KEY_SUFFIXES) older than `max_age` seconds -
+    the task metas referencing them expired already. Returns the number of deleted blobs.
+    """
+    storage_manager = StorageManager(storage_profile or result_storage_profile())
+    expired_before = time.time() - max_age
+    deleted = 0
+    for key in storage_manager.iter_list(RESULT_KEY_PREFIX):
+        if not key.endswith(RESULT_KEY_SUFFIXES):
+            continue
+        stat = storage_manager.stat(key)
+        if stat is not None and stat['last_modified'] is not None and stat['last_modified'] < expired_before:
+            storage_manager.delete_bytes(key)
+            deleted += 1
+    return deleted
@@ -1,4 +1,10 @@
+import logging
+import multiprocessing
+import os
 import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
 
 from docling.document_converter import DocumentConverter, PdfFormatOption
 from docling.datamodel.base_models import InputFormat
@@ -7,15 +13,72 @@ from docling_core.types.doc.document import (  # Assuming a compatible Docling l
     DoclingDocument,
 )
 
-from text_extract_api.extract.extract_result import ExtractResult
+from text_extract_api.extract.extract_result import ExtractResult, PageSegment
 from text_extract_api.extract.strategies.strategy import Strategy
 from text_extract_api.files.file_formats import FileFormat, PdfFileFormat
 
+logger = logging.getLogger(__name__)
+
+# Converters are expensive to build (layout and table models are loaded on creation),
+# so every process keeps one warm instance and the page-range pool is reused between tasks.
+_converter: Optional[DocumentConverter] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_size: int = 0
+
+
+def _build_converter() -> DocumentConverter:
+    # Optimized configuration: Enable table structure but disable OCR
+    pdf_options = PdfPipelineOptions()
+    pdf_options.do_ocr = False  # Critical: Disable OCR completely to avoid EasyOCR downloads
+    pdf_options.do_table_structure = True  # Enable table structure detection for proper table extraction
+
+    # Create converter with table detection enabled but OCR disabled
+    return DocumentConverter(
+        format_options={
+            InputFormat.PDF: PdfFormatOption(pipeline_options=pdf_options)
+        }
+    )
+
+
+def _get_converter() -> DocumentConverter:
+    global _converter
+    if _converter is None:
+        _converter = _build_converter()
+    return _converter
+
+
+def _convert_page_range(file_path: str, page_range: Tuple[int, int]) -> DoclingDocument:
+    """
+    Converts a single page range of a PDF. Executed inside the page-range pool workers.
+    """
+    return _get_converter().convert(file_path, page_range=page_range).document
+
+
+def _get_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    global _process_pool, _process_pool_size
+    if _process_pool is None or _process_pool_size != max_workers:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False)
+        _process_pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_get_converter,
+        )
+        _process_pool_size = max_workers
+    return _process_pool
+
+
 class DoclingStrategy(Strategy):
     """
     Extraction strategy for processing PDF documents using Docling.
+
+    Large PDFs can be split into page ranges converted in a local process pool; set
+    `parallel_workers` (or DOCLING_PARALLEL_WORKERS) to enable it.
     """
 
+    DEFAULT_PAGES_PER_CHUNK = 25
+    DEFAULT_PARALLEL_MIN_PAGES = 50
+
     def name(self) -> str:
         return "docling"
 
@@ -33,11 +96,20 @@ class DoclingStrategy(Strategy):
         # Save file content to a temporary file
         temp_file_path = self._save_to_temp_file(file_format)
 
-        # Convert the document using Docling
-        docling_document = self._convert_to_docling(temp_file_path)
+        try:
+            page_ranges = self._plan_page_ranges(file_format, temp_file_path)
+            if len(page_ranges) > 1:
+                return self._extract_parallel(temp_file_path, page_ranges)
+
+            # Convert the document using Docling
+            started_at = time.time()
+            docling_document = self._convert_to_docling(temp_file_path)
+        finally:
+            os.remove(temp_file_path)
 
         # Return the result wrapped in ExtractResult
-        return ExtractResult(value=docling_document, text_gatherer=self.text_gatherer)
+        return ExtractResult(value=docling_document, text_gatherer=self.text_gatherer,
+                             pages=self._page_segments(docling_document, started_at))
 
     def text_gatherer(self, docling_document: DoclingDocument) -> str:
         """
@@ -48,6 +120,16 @@ class DoclingStrategy(Strategy):
         """
         return docling_document.export_to_markdown()
 
+    def _page_segments(self, docling_document: DoclingDocument, started_at: float) -> List[PageSegment]:
+        """
+        Per-page segments of the document. Page markdown is exported lazily, on first access.
+        """
+        return [
+            PageSegment(page_no, strategy=self.name(), started_at=started_at,
+                        text_gatherer=lambda page_no=page_no: docling_document.export_to_markdown(page_no=page_no))
+            for page_no in sorted(docling_document.pages)
+        ]
+
     def _convert_to_docling(self, file_path: str) -> DoclingDocument:
         """
         Converts a file into a DoclingDocument instance.
@@ -56,23 +138,137 @@ class DoclingStrategy(Strategy):
         :return: DoclingDocument instance.
         """
         try:
-            # Optimized configuration: Enable table structure but disable OCR
-            pdf_options = PdfPipelineOptions()
-            pdf_options.do_ocr = False  # Critical: Disable OCR completely to avoid EasyOCR downloads
-            pdf_options.do_table_structure = True  # Enable table structure detection for proper table extraction
-            
-            # Create converter with table detection enabled but OCR disabled
-            converter = DocumentConverter(
-                format_options={
-                    InputFormat.PDF: PdfFormatOption(pipeline_options=pdf_options)
-                }
-            )
-            
-            docling_document = converter.convert(file_path).document
+            docling_document = _get_converter().convert(file_path).document
             return docling_document
         except Exception as e:
             raise RuntimeError(f"Failed to convert document using Docling: {e}")
 
+    def _plan_page_ranges(self, file_format: FileFormat, file_path: str) -> List[Tuple[int, int]]:
+        """
+        Splits a PDF into 1-based, inclusive page ranges for parallel conversion.
+        Returns no more than a single range when parallelism is disabled or the document is too small.
+        """
+        workers = self._parallel_workers()
+        if workers < 2 or not isinstance(file_format, PdfFileFormat):
+            return []
+        if not hasattr(DoclingDocument, 'concatenate'):
+            logger.warning("Converting sequentially - parallel conversion needs a docling-core version "
+                           "with DoclingDocument.concatenate")
+            return []
+
+        num_pages = self._count_pages(file_path)
+
+        min_pages = int(self._strategy_config.get(
+            'parallel_min_pages', os.getenv('DOCLING_PARALLEL_MIN_PAGES', self.DEFAULT_PARALLEL_MIN_PAGES)))
+        if num_pages < max(min_pages, 2):
+            return [(1, num_pages)]
+
+        pages_per_chunk = int(self._strategy_config.get(
+            'pages_per_chunk', os.getenv('DOCLING_PAGES_PER_CHUNK', self.DEFAULT_PAGES_PER_CHUNK)))
+        # Never create fewer chunks than workers - otherwise cores stay idle on mid-sized documents
+        pages_per_chunk = max(1, min(pages_per_chunk, -(-num_pages // workers)))
+
+        return [
+            (start, min(start + pages_per_chunk - 1, num_pages))
+            for start in range(1, num_pages + 1, pages_per_chunk)
+        ]
+
+    @staticmethod
+    def _count_pages(file_path: str) -> int:
+        import pypdfium2  # docling dependency - only needed when splitting PDFs
+
+        pdf = pypdfium2.PdfDocument(file_path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def _parallel_workers(self) -> int:
+        return int(self._strategy_config.get('parallel_workers', os.getenv('DOCLING_PARALLEL_WORKERS', 0)))
+
+    def _extract_parallel(self, file_path: str, page_ranges: List[Tuple[int, int]]) -> ExtractResult:
+        """
+        Converts page ranges in the local process pool and merges the resulting documents in page order.
+        """
+        start_time = time.time()
+        pool = _get_process_pool(self._parallel_workers())
+        documents: List[Optional[DoclingDocument]] = [None] * len(page_ranges)
+
+        try:
+            futures = {
+                pool.submit(_convert_page_range, file_path, page_range): index
+                for index, page_range in enumerate(page_ranges)
+            }
+            for num_done, future in enumerate(as_completed(futures), start=1):
+                documents[futures[future]] = future.result()
+                self.update_state_callback(state='PROGRESS', meta={
+                    'progress': str(30 + int(20 * num_done / len(page_ranges))),
+                    'status': f'Docling Processing (page range {num_done} of {len(page_ranges)})',
+                    'start_time': start_time,
+                    'elapsed_time': time.time() - start_time})
+        except Exception as e:
+            raise RuntimeError(f"Failed to convert document using Docling: {e}")
+
+        merged_document = self._merge_documents(documents)
+
+        def text_gatherer(_value) -> str:
+            return self._stitch_markdown([document.export_to_markdown() for document in documents])
+
+        pages = [segment for document in documents for segment in self._page_segments(document, start_time)]
+        return ExtractResult(value=merged_document, text_gatherer=text_gatherer, pages=pages)
+
+    @staticmethod
+    def _merge_documents(documents: List[DoclingDocument]) -> DoclingDocument:
+        """
+        Concatenates page-range documents into one DoclingDocument. Page numbers are kept as
+        Docling assigns them from the original PDF when converting with `page_range`.
+        Needs `DoclingDocument.concatenate` - older docling-core versions are never split (see `_plan_page_ranges`).
+        """
+        return DoclingDocument.concatenate(documents)
+
+    @staticmethod
+    def _stitch_markdown(chunks: List[str]) -> str:
+        """
+        Joins markdown of consecutive page ranges. A table split by a range boundary is joined back
+        into a single table: the continuation loses its separator row and its header row when
+        the header repeats the one of the table being continued.
+        """
+        merged_lines: List[str] = []
+        for chunk in chunks:
+            lines = chunk.strip('\n').split('\n')
+            previous = [line for line in merged_lines if line.strip()]
+            if (
+                    previous and previous[-1].lstrip().startswith('|')
+                    and len(lines) > 1 and lines[0].lstrip().startswith('|')
+                    and DoclingStrategy._is_table_separator(lines[1])
+                    and lines[0].count('|') == previous[-1].count('|')
+            ):
+                table_header = DoclingStrategy._table_header(merged_lines)
+                continuation = lines[2:] if lines[0].strip() == table_header else [lines[0]] + lines[2:]
+                while merged_lines and not merged_lines[-1].strip():
+                    merged_lines.pop()
+                merged_lines.extend(continuation)
+                continue
+
+            if merged_lines:
+                merged_lines.append('')
+            merged_lines.extend(lines)
+        return '\n'.join(merged_lines)
+
+    @staticmethod
+    def _table_header(lines: List[str]) -> Optional[str]:
+        for index in range(len(lines) - 1, 0, -1):
+            if not lines[index].lstrip().startswith('|'):
+                return None
+            if DoclingStrategy._is_table_separator(lines[index]) and lines[index - 1].lstrip().startswith('|'):
+                return lines[index - 1].strip()
+        return None
+
+    @staticmethod
+    def _is_table_separator(line: str) -> bool:
+        cells = line.replace('|', '').strip()
+        return line.lstrip().startswith('|') and '-' in cells and set(cells) <= set('-: ')
+
     def _save_to_temp_file(self, file_format: FileFormat) -> str:
         """
         Saves the content of a FileFormat instance to a temporary file.
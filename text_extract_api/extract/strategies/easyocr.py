@@ -1,9 +1,11 @@
 import io
+import time
+
 import numpy as np
 from PIL import Image
 import easyocr
 
-from extract.extract_result import ExtractResult
+from text_extract_api.extract.extract_result import ExtractResult, PageSegment
 from text_extract_api.extract.strategies.strategy import Strategy
 from text_extract_api.files.file_formats.file_format import FileFormat
 from text_extract_api.files.file_formats.image import ImageFileFormat
@@ -37,8 +39,14 @@ class EasyOCRStrategy(Strategy):
         reader = easyocr.Reader(language.split(','))
 
         # Process each image, extracting text
-        all_extracted_text = []
-        for image_format in images:
+        pages = []
+        checkpointed = self.checkpointed_pages()
+        for page_no, image_format in enumerate(images, start=1):
+            if page_no in checkpointed:
+                pages.append(checkpointed[page_no])
+                continue
+            page_started_at = time.time()
+
             # Convert the in-memory bytes to a PIL Image
             pil_image = Image.open(io.BytesIO(image_format.binary))
             
@@ -50,10 +58,9 @@ class EasyOCRStrategy(Strategy):
 
             # Combine all lines into a single string for that image/page
             extracted_text = "\n".join(ocr_result)
-            all_extracted_text.append(extracted_text)
+            pages.append(PageSegment(page_no, extracted_text, self.name(), page_started_at,
+                                     time.time() - page_started_at))
+            self.checkpoint_page(pages[-1])
 
         # Join text from all images/pages
-        full_text = "\n\n".join(all_extracted_text)
-
-
-        return ExtractResult.from_text(full_text)
+        return ExtractResult.from_pages(pages, "\n\n")
@@ -5,10 +5,12 @@ import time
 import httpx
 from ollama import Client
 
-from extract.extract_result import ExtractResult
+from text_extract_api.extract.extract_result import ExtractResult, PageSegment
+from text_extract_api.extract.model_warmup import keep_alive
 from text_extract_api.extract.strategies.strategy import Strategy
 from text_extract_api.files.file_formats.file_format import FileFormat
 from text_extract_api.files.file_formats.image import ImageFileFormat
+from text_extract_api.metrics import ENGINE_ERRORS
 from ollama import ResponseError
 
 class OllamaStrategy(Strategy):
@@ -28,11 +30,17 @@ class OllamaStrategy(Strategy):
                 f"Ollama OCR - format {file_format.mime_type} is not supported (yet?)"
             )
         images = FileFormat.convert_to(file_format, ImageFileFormat)
-        extracted_text = ""
+        pages = []
         start_time = time.time()
         ocr_percent_done = 0
         num_pages = len(images)
+        checkpointed = self.checkpointed_pages()
         for i, image in enumerate(images):
+            if i + 1 in checkpointed:
+                pages.append(checkpointed[i + 1])
+                continue
+            page_started_at = time.time()
+            page_text = ""
 
             with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as temp_file:
                 temp_file.write(image.binary)
@@ -50,7 +58,7 @@ class OllamaStrategy(Strategy):
                     'role': 'user',
                     'content': self._strategy_config.get('prompt'),
                     'images': [temp_filename]
-                }], stream=True)
+                }], stream=True, keep_alive=keep_alive())
                 os.remove(temp_filename)
                 num_chunk = 1
                 for chunk in response:
@@ -63,14 +71,20 @@ class OllamaStrategy(Strategy):
                         'elapsed_time': time.time() - start_time}
                     self.update_state_callback(state='PROGRESS', meta=meta)
                     num_chunk += 1
-                    extracted_text += chunk['message']['content']
+                    page_text += chunk['message']['content']
+
+                pages.append(PageSegment(i + 1, page_text, self.name(), page_started_at,
+                                         time.time() - page_started_at))
+                self.checkpoint_page(pages[-1])
 
                 ocr_percent_done += int(
                     20 / num_pages)  # 20% of work is for OCR - just a stupid assumption from tasks.py
             except ResponseError as e:
+                ENGINE_ERRORS.labels('ollama', self.model() or '').inc()
                 print('Error:', e.error)
                 raise Exception("Failed to generate text with Ollama model " + self._strategy_config.get('model'))
 
             print(response)
 
-        return ExtractResult.from_text(extracted_text)
+        # Pages are concatenated as they come from the model - no separator added
+        return ExtractResult.from_pages(pages, "")
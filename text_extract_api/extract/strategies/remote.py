@@ -1,14 +1,16 @@
+import io
 import os
-import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
-from extract.extract_result import ExtractResult
-
+from text_extract_api.extract.extract_result import ExtractResult, PageSegment
+from text_extract_api.extract.http_client import get_http_client, RetryingHttpClient
 from text_extract_api.extract.strategies.strategy import Strategy
 from text_extract_api.files.file_formats.file_format import FileFormat
 from text_extract_api.files.file_formats.image import ImageFileFormat
 from text_extract_api.files.file_formats.pdf import PdfFileFormat
-import requests
+from text_extract_api.metrics import ENGINE_ERRORS
 
 
 class RemoteStrategy(Strategy):
@@ -29,28 +31,19 @@ class RemoteStrategy(Strategy):
             )
 
         pdf_files = FileFormat.convert_to(file_format, PdfFileFormat)
-        extracted_text = ""
         start_time = time.time()
         ocr_percent_done = 0
-        
+
         if len(pdf_files) > 1:
             raise ValueError("Only one PDF file is supported.")
-        
+
         if len(pdf_files) == 0:
             raise ValueError("No PDF file found - conversion error.")
 
-        try: 
+        try:
             url = os.getenv("REMOTE_API_URL", self._strategy_config.get("url"))
             if not url:
                 raise Exception('Please do set the REMOTE_API_URL environment variable: export REMOTE_API_URL=http://...')
-            files = {'file': ('document.pdf', pdf_files[0].binary, 'application/pdf')}
-            data = {
-                'page_range': None,
-                'languages': language,
-                'force_ocr': False,
-                'paginate_output': False,
-                'output_format': 'markdown' # TODO: support JSON output format
-            }
 
             meta = {
                 'progress': str(30 + ocr_percent_done),
@@ -59,13 +52,126 @@ class RemoteStrategy(Strategy):
                 'elapsed_time': time.time() - start_time}
             self.update_state_callback(state='PROGRESS', meta=meta)
 
-            response = requests.post(url, files=files, data=data)
-            if response.status_code != 200:
-                raise Exception(f"Failed to upload PDF file: {response.content}")
-
-            extracted_text = response.json().get('output', '')
+            page_ranges = self._plan_page_ranges(pdf_files[0])
+            if len(page_ranges) > 1:
+                checkpointed = self.checkpointed_pages()
+                with ThreadPoolExecutor(max_workers=self._config_int('shard_concurrency', 'REMOTE_API_SHARD_CONCURRENCY', 4)) as executor:
+                    pages = list(executor.map(
+                        lambda page_range: self._checkpointed_segment(url, pdf_files[0], language, page_range,
+                                                                      checkpointed), page_ranges))
+                separator = "\n\n"
+            else:
+                pages = [self._request_segment(url, pdf_files[0], language)]
+                separator = ""
         except Exception as e:
+            ENGINE_ERRORS.labels('remote', self.model() or '').inc()
             print('Error:', e)
             raise Exception("Failed to generate text with Remote API. Make sure the remote server is up and running")
-            
-        return ExtractResult.from_text(extracted_text)
+
+        return ExtractResult.from_pages(pages, separator)
+
+    def _request_segment(self, url: str, pdf_file: FileFormat, language: str,
+                         page_range: Optional[Tuple[int, int]] = None) -> PageSegment:
+        """
+        Requests a page range (the whole document by default) as a page segment. Segment page numbers are 1-based.
+        """
+        started_at = time.time()
+        output = self._request(url, pdf_file, language, page_range)
+        if page_range:
+            output = output.strip('\n')
+        return PageSegment(page_range[0] + 1 if page_range else 1, output, self.name(), started_at,
+                           time.time() - started_at, page_range[1] + 1 if page_range else None)
+
+    def _checkpointed_segment(self, url: str, pdf_file: FileFormat, language: str, page_range: Tuple[int, int],
+                              checkpointed: dict) -> PageSegment:
+        """
+        Returns the page range checkpointed by an earlier attempt (with the same sharding) or requests and checkpoints it.
+        """
+        segment = checkpointed.get(page_range[0] + 1)
+        if segment is not None and segment.last_page_no == page_range[1] + 1:
+            return segment
+        segment = self._request_segment(url, pdf_file, language, page_range)
+        self.checkpoint_page(segment)
+        return segment
+
+    def _request(self, url: str, pdf_file: FileFormat, language: str, page_range: Optional[Tuple[int, int]] = None) -> str:
+        """
+        Sends the PDF (or a range of its pages) to the remote API and returns the markdown output.
+        Page ranges are 0-based and inclusive, as expected by the Marker API. A range is uploaded as a PDF
+        of its pages only; when the PDF can not be split, the whole PDF is uploaded with the `page_range`.
+        """
+        binary = pdf_file.binary
+        data = {
+            'languages': language,
+            'force_ocr': 'False',
+            'paginate_output': 'False',
+            'output_format': 'markdown' # TODO: support JSON output format
+        }
+        if page_range:
+            part = self._split_pdf(binary, page_range)
+            if part is not None:
+                binary = part
+            else:
+                data['page_range'] = f"{page_range[0]}-{page_range[1]}"
+        files = {'file': ('document.pdf', binary, 'application/pdf')}
+
+        response = self._http_client().post(url, files=files, data=data)
+        if response.status_code != 200:
+            raise Exception(f"Failed to upload PDF file: {response.content}")
+
+        return response.json().get('output', '')
+
+    def _plan_page_ranges(self, pdf_file: FileFormat) -> List[Tuple[int, int]]:
+        """
+        Splits the document into page ranges sent as concurrent requests. Sharding is disabled
+        unless `shard_pages` (or REMOTE_API_SHARD_PAGES) is set.
+        """
+        shard_pages = self._config_int('shard_pages', 'REMOTE_API_SHARD_PAGES', 0)
+        if shard_pages < 1:
+            return []
+
+        num_pages = self._count_pages(pdf_file)
+        return [
+            (start, min(start + shard_pages, num_pages) - 1)
+            for start in range(0, num_pages, shard_pages)
+        ]
+
+    @staticmethod
+    def _split_pdf(binary: bytes, page_range: Tuple[int, int]) -> Optional[bytes]:
+        """
+        A PDF of the (0-based, inclusive) page range. None without pypdfium2 (installed with docling)
+        or when the PDF can not be read by it.
+        """
+        try:
+            import pypdfium2
+        except ImportError:
+            return None
+
+        try:
+            source = pypdfium2.PdfDocument(binary)
+        except pypdfium2.PdfiumError:
+            return None
+        part = pypdfium2.PdfDocument.new()
+        try:
+            part.import_pages(source, list(range(page_range[0], page_range[1] + 1)))
+            buffer = io.BytesIO()
+            part.save(buffer)
+            return buffer.getvalue()
+        finally:
+            part.close()
+            source.close()
+
+    @staticmethod
+    def _count_pages(pdf_file: FileFormat) -> int:
+        from pdf2image import pdfinfo_from_bytes
+
+        return int(pdfinfo_from_bytes(pdf_file.binary)['Pages'])
+
+    def _http_client(self) -> RetryingHttpClient:
+        return get_http_client(
+            timeout=float(self._strategy_config.get('timeout', os.getenv('REMOTE_API_TIMEOUT', 300))),
+            max_retries=self._config_int('max_retries', 'REMOTE_API_MAX_RETRIES', 3),
+        )
+
+    def _config_int(self, key: str, env_name: str, default: int) -> int:
+        return int(self._strategy_config.get(key, os.getenv(env_name, default)))
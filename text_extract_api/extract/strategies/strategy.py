@@ -1,29 +1,81 @@
 from __future__ import annotations
+import logging
 import os
+import threading
 import yaml
 import importlib
+import importlib.metadata
 import pkgutil
-from typing import Type, Dict
+from typing import Type, Dict, List, Optional
 
-from extract.extract_result import ExtractResult
+from text_extract_api.extract.extract_result import ExtractResult, PageSegment
 from text_extract_api.files.file_formats.file_format import FileFormat
 
+logger = logging.getLogger(__name__)
+
+STRATEGY_ENTRY_POINT_GROUP = 'text_extract_api.strategies'
+
+# Declared by class path - the engines are imported only when the strategy is used
+BUILTIN_STRATEGIES = {
+    'llama_vision': 'text_extract_api.extract.strategies.ollama.OllamaStrategy',
+    'easyOCR': 'text_extract_api.extract.strategies.easyocr.EasyOCRStrategy',
+    'docling': 'text_extract_api.extract.strategies.docling.DoclingStrategy',
+    'remote': 'text_extract_api.extract.strategies.remote.RemoteStrategy',
+}
+
 
 class Strategy:
     # ✅ Add missing class-level attributes
     _strategies: Dict[str, Strategy] = {}
     _strategy_config_map: Dict[str, dict] = {}
+    _declared_strategies: Optional[Dict[str, dict]] = None
+    _failed_strategies: Dict[str, str] = {}
+    _lock = threading.RLock()
 
     def __init__(self, strategy_config=None, update_state_callback=None):
         self._strategy_config = strategy_config or {}
         self.update_state_callback = update_state_callback or (lambda **kwargs: None)
+        self.checkpoints = None
 
     def set_strategy_config(self, config: Dict):
         self._strategy_config = config
 
+    def model(self) -> Optional[str]:
+        """
+        Model used by the strategy (from its config), if any.
+        """
+        return self._strategy_config.get('model')
+
+    def prompt(self) -> Optional[str]:
+        """
+        Prompt used by the strategy (from its config), if any.
+        """
+        return self._strategy_config.get('prompt')
+
     def set_update_state_callback(self, callback):
         self.update_state_callback = callback
 
+    def set_checkpoints(self, checkpoints):
+        """
+        Sets the PageCheckpoints of the current task (None disables checkpointing) - see text_extract_api.extract.checkpoints.
+        """
+        self.checkpoints = checkpoints
+
+    def checkpointed_pages(self) -> Dict[int, PageSegment]:
+        """
+        Pages extracted by an earlier attempt, by their (first) page number - to be skipped by the strategy.
+        """
+        if self.checkpoints is None:
+            return {}
+        pages = self.checkpoints.load()
+        if pages:
+            logger.info(f"Resuming from {len(pages)} checkpointed page(s)")
+        return pages
+
+    def checkpoint_page(self, segment: PageSegment) -> None:
+        if self.checkpoints is not None:
+            self.checkpoints.save(segment)
+
     def update_state(self, state, meta):
         if self.update_state_callback:
             self.update_state_callback(state, meta)
@@ -39,19 +91,52 @@ class Strategy:
     def get_strategy(cls, name: str) -> Strategy:
         """
         Returns the registered strategy instance by name.
-        Auto-loads from config or autodiscovers if not yet registered.
+        The strategy class is imported and instantiated on first use - failures are remembered,
+        so a strategy with a missing dependency is not imported again on every request.
         """
-        if name not in cls._strategies:
-            cls.load_strategies_from_config()
+        if name in cls._strategies:
+            return cls._strategies[name]
+
+        with cls._lock:
+            if name in cls._strategies:
+                return cls._strategies[name]
+            if name in cls._failed_strategies:
+                raise ValueError(f"Strategy '{name}' is not available: {cls._failed_strategies[name]}")
+
+            config = cls.declared_strategies().get(name)
+            if config is None and cls._autodiscovery_enabled():
+                cls.autodiscover_strategies()
+                if name in cls._strategies:
+                    return cls._strategies[name]
+            if config is None:
+                raise ValueError(f"Unknown strategy '{name}'. Available: {', '.join(cls.available_strategies())}")
 
-        if name not in cls._strategies:
-            cls.autodiscover_strategies()
+            try:
+                module_path, class_name = config['class'].rsplit('.', 1)
+                strategy_cls = getattr(importlib.import_module(module_path), class_name)
+                strategy_instance = strategy_cls()
+            except Exception as e:
+                cls._failed_strategies[name] = f"{type(e).__name__}: {e}"
+                logger.exception(f"Error loading strategy '{name}' ({config['class']}): {e}")
+                raise ValueError(f"Strategy '{name}' is not available: {cls._failed_strategies[name]}") from e
+
+            strategy_instance.set_strategy_config(config)
+            cls.register_strategy(strategy_instance, name)
+            logger.info(f"Loaded strategy: {name} ({config['class']})")
+            return strategy_instance
 
-        if name not in cls._strategies:
-            available = ', '.join(cls._strategies.keys())
-            raise ValueError(f"Unknown strategy '{name}'. Available: {available}")
+    @classmethod
+    def validate_strategy_name(cls, name: str) -> None:
+        """
+        Checks the strategy is registered or declared - without importing its implementation,
+        so the API validates requests without loading the OCR engines.
+        """
+        if name not in cls.available_strategies():
+            raise ValueError(f"Unknown strategy '{name}'. Available: {', '.join(cls.available_strategies())}")
 
-        return cls._strategies[name]
+    @classmethod
+    def available_strategies(cls) -> List[str]:
+        return sorted(set(cls.declared_strategies()) | set(cls._strategies))
 
     @classmethod
     def register_strategy(cls, strategy_instance: Strategy, name: str = None, override: bool = False):
@@ -61,12 +146,46 @@ class Strategy:
         name = name or strategy_instance.name()
         if override or name not in cls._strategies:
             cls._strategies[name] = strategy_instance
+            cls._failed_strategies.pop(name, None)
+
+    @classmethod
+    def declared_strategies(cls) -> Dict[str, dict]:
+        """
+        Strategy configs (with the `class` path) by name: the built-in strategies, those of the
+        `text_extract_api.strategies` entry points and of the config file, which override the former.
+        Loaded once - nothing is imported.
+        """
+        if cls._declared_strategies is None:
+            with cls._lock:
+                if cls._declared_strategies is None:
+                    declared = {name: {'class': class_path} for name, class_path in BUILTIN_STRATEGIES.items()}
+                    declared.update(cls.load_entry_points())
+                    try:
+                        declared.update(cls.load_strategies_from_config())
+                    except FileNotFoundError as e:
+                        logger.warning(f"Strategies config not loaded: {e}")
+                    cls._declared_strategies = declared
+        return cls._declared_strategies
 
     @classmethod
-    def load_strategies_from_config(cls, path: str = os.getenv('OCR_CONFIG_PATH', 'config/strategies.yaml')):
+    def load_entry_points(cls, group: str = STRATEGY_ENTRY_POINT_GROUP) -> Dict[str, dict]:
         """
-        Loads strategies from a YAML configuration file.
+        Strategies declared by installed packages, e.g. in their pyproject.toml:
+        `[project.entry-points."text_extract_api.strategies"] my_ocr = "my_package.strategy:MyOcrStrategy"`
         """
+        entry_points = importlib.metadata.entry_points()
+        if hasattr(entry_points, 'select'):
+            entry_points = entry_points.select(group=group)
+        else:  # Python < 3.10
+            entry_points = entry_points.get(group, [])
+        return {entry_point.name: {'class': entry_point.value.replace(':', '.')} for entry_point in entry_points}
+
+    @classmethod
+    def load_strategies_from_config(cls, path: str = None) -> Dict[str, dict]:
+        """
+        Loads the strategy configs from a YAML configuration file - by name, validated but not imported.
+        """
+        path = path or os.getenv('OCR_CONFIG_PATH', 'config/strategies.yaml')
         project_root = os.path.dirname(os.path.dirname(os.path.abspath(path)))
         config_file_path = os.path.join(project_root, path)
 
@@ -82,23 +201,18 @@ class Strategy:
         for strategy_name, strategy_config in config['strategies'].items():
             if 'class' not in strategy_config:
                 raise ValueError(f"Missing 'class' attribute for OCR strategy: {strategy_name}")
-
-            strategy_class_path = strategy_config['class']
-            module_path, class_name = strategy_class_path.rsplit('.', 1)
-            module = importlib.import_module(module_path)
-
-            strategy_cls = getattr(module, class_name)
-            strategy_instance = strategy_cls()
-            strategy_instance.set_strategy_config(strategy_config)
-
-            cls.register_strategy(strategy_instance, strategy_name)
             cls._strategy_config_map[strategy_name] = strategy_config
-            print(f"✅ Loaded strategy: {strategy_name} ({strategy_class_path})")
+        return dict(config['strategies'])
+
+    @staticmethod
+    def _autodiscovery_enabled() -> bool:
+        return os.getenv('STRATEGY_AUTODISCOVERY', 'false').lower() in ('1', 'true', 'yes')
 
     @classmethod
     def autodiscover_strategies(cls) -> Dict[str, Strategy]:
         """
         Auto-discovers and registers any strategy classes under text_extract_api.*.strategies.*
+        Imports every strategy module - used by `get_strategy` only when STRATEGY_AUTODISCOVERY is set.
         """
         for module_info in pkgutil.iter_modules():
             if not module_info.name.startswith("text_extract_api"):
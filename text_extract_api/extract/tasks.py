@@ -1,21 +1,86 @@
 import os
 import time
+from datetime import timedelta
 from typing import Optional
 
 import ollama
 from ollama import Client
 import redis
+from celery.signals import task_postrun, task_prerun, worker_init, worker_process_shutdown
 
+from text_extract_api.cache import count_lookup, legacy_ocr_cache_key, ocr_cache_key, read_legacy_keys
 from text_extract_api.celery_app import app as celery_app
+from text_extract_api.extract.checkpoints import PageCheckpoints, checkpoint_key, checkpoints_enabled, may_resume
+from text_extract_api.extract.llm import transform_text_chunked
+from text_extract_api.extract.model_warmup import default_llm_model, keep_alive
+from text_extract_api.extract.profiling import finish_timeline, save_profile, start_profiler, start_timeline
+from text_extract_api.extract.result_formats import FORMAT_MEDIA_TYPES, docling_json
+from text_extract_api.extract.result_store import (
+    inline_page_index, load_result_text, offload_document, offload_result, should_offload, summarize,
+    sweep_offloaded_results
+)
 from text_extract_api.extract.strategies.strategy import Strategy
 from text_extract_api.files.file_formats.file_format import FileFormat
-from text_extract_api.files.storage_manager import StorageManager
+from text_extract_api.files.storage_manager import StorageManager, storage_profiles
+from text_extract_api.metrics import (
+    ENGINE_ERRORS, LLM_TRANSFORM_DURATION, PAGE_OCR_DURATION, QUEUE_WAIT_DURATION, TASK_LATENCY, TASKS_IN_FLIGHT,
+    mark_process_dead, start_exporter, timed
+)
+from text_extract_api.tracing import end_task_span, inject_headers, record_span, setup_tracing, span, start_task_span
 
 # Connect to Redis - require environment variable to be set
 redis_url = os.getenv('REDIS_CACHE_URL')
 redis_client = redis.Redis.from_url(redis_url)
 
 
+@worker_init.connect
+def preload_storage_profiles(**kwargs):
+    """
+    Sets up the storage backends once per worker - the tasks reuse their clients (see StorageProfileRegistry).
+    """
+    for profile_name, error in storage_profiles.preload().items():
+        if error:
+            print(f"Storage profile '{profile_name}' is not available: {error}")
+
+
+@worker_init.connect
+def start_tracing(**kwargs):
+    """
+    Sets up the span export (see TRACING_EXPORTER) before the pool processes are forked.
+    """
+    setup_tracing('text-extract-worker')
+
+
+@worker_init.connect
+def start_metrics_exporter(**kwargs):
+    """
+    Serves the worker metrics on WORKER_METRICS_PORT (disabled unless set). Prefork pools need
+    PROMETHEUS_MULTIPROC_DIR - the tasks run in the child processes.
+    """
+    port = int(os.getenv('WORKER_METRICS_PORT', 0))
+    if port:
+        start_exporter(port)
+        print(f"Serving worker metrics on port {port}")
+
+
+@worker_process_shutdown.connect
+def remove_process_metrics(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
+
+
+@task_prerun.connect
+def count_task_started(task_id=None, task=None, **kwargs):
+    TASKS_IN_FLIGHT.labels(task.name).inc()
+    start_task_span(task_id, task.name, task.request)
+
+
+@task_postrun.connect
+def count_task_finished(task_id=None, task=None, state=None, **kwargs):
+    TASKS_IN_FLIGHT.labels(task.name).dec()
+    end_task_span(task_id, state)
+    finish_timeline()
+
+
 @celery_app.task(bind=True, time_limit=int(os.getenv('TASK_TIME_LIMIT', 1800)), soft_time_limit=int(os.getenv('TASK_SOFT_TIME_LIMIT', 1500)))
 def ocr_task(
         self,
@@ -29,27 +94,51 @@ def ocr_task(
         language: Optional[str] = None,
         storage_profile: Optional[str] = None,
         storage_filename: Optional[str] = None,
+        llm_chunked: bool = False,
+        reduce_prompt: Optional[str] = None,
 ):
     """
     Celery task to perform OCR processing on a PDF/Office/image file.
+    With `llm_chunked` the prompt is applied to chunks of the extracted text processed concurrently
+    (see text_extract_api.extract.llm) and optionally combined by `reduce_prompt`.
     """
     # Initialize Ollama client with external endpoint
     ollama_host = os.getenv('OLLAMA_HOST', 'http://localhost:11434')
     ollama_client = Client(host=ollama_host)
     
     start_time = time.time()
+    enqueued_at = self.request.get('enqueued_at')
+    if enqueued_at:
+        QUEUE_WAIT_DURATION.labels(strategy_name).observe(max(0.0, start_time - enqueued_at))
+    timeline = start_timeline(start_time, enqueued_at)
+    profiler = start_profiler(timeline)
 
     strategy = Strategy.get_strategy(strategy_name)
+    file_format = FileFormat.from_binary(binary_content)
+    labels = {'strategy': strategy_name, 'model': strategy.model() or '', 'mime_type': file_format.mime_type}
     strategy.set_update_state_callback(self.update_state)
+    # Pages are checkpointed as they complete - a redelivered or retried task resumes from the missing ones
+    checkpoints = PageCheckpoints(
+        redis_client, checkpoint_key(strategy_name, file_hash, language, strategy.model(), strategy.prompt())
+    ) if checkpoints_enabled() else None
+    if checkpoints is not None and not may_resume(ocr_cache, self.request):
+        checkpoints.clear()  # the pages of an earlier request are not reused with the cache disabled
+    strategy.set_checkpoints(checkpoints)
 
     self.update_state(state='PROGRESS', status="File uploaded successfully",
                       meta={'progress': 10})  # Example progress update
 
     # Try to get from cache first
     extracted_text = None
+    extract_result = None
     if ocr_cache:
         print("Checking cache...")
-        extracted_text = redis_client.get(file_hash)
+        with timeline.stage('cache_lookup'):
+            extracted_text = redis_client.get(ocr_cache_key(strategy_name, file_hash))
+            if extracted_text is None and read_legacy_keys():
+                # Cached by an earlier version - written again under the namespaced key below
+                extracted_text = redis_client.get(legacy_ocr_cache_key(file_hash))
+        count_lookup(redis_client, 'ocr', extracted_text is not None)
         if extracted_text:
             extracted_text = extracted_text.decode('utf-8')
 
@@ -58,51 +147,217 @@ def ocr_task(
         self.update_state(state='PROGRESS',
                           meta={'progress': 30, 'status': 'Extracting text from file', 'start_time': start_time,
                                 'elapsed_time': time.time() - start_time})  # Example progress update
-        extract_result = strategy.extract_text(FileFormat.from_binary(binary_content), language)
-        extracted_text = extract_result.text
+        with span('extract', **labels), timeline.stage('extract'):
+            extract_result = strategy.extract_text(file_format, language)
+            extracted_text = extract_result.text
+            timeline.add_pages(extract_result.pages)
+            for segment in extract_result.pages:
+                record_span('extract.page', segment.started_at, segment.duration, strategy=segment.strategy,
+                            page_no=segment.page_no, last_page_no=segment.last_page_no)
+                if segment.duration is not None:
+                    PAGE_OCR_DURATION.labels(**labels).observe(segment.duration)
 
     else:
         print("Using cached result...")
 
     print("After extracted text")
-    self.update_state(state='PROGRESS',
-                      meta={'progress': 50, 'status': 'Text extracted', 'extracted_text': extracted_text,
-                            'start_time': start_time,
-                            'elapsed_time': time.time() - start_time})  # Example progress update
+    progress_meta = {'progress': 50, 'status': 'Text extracted', 'start_time': start_time,
+                     'elapsed_time': time.time() - start_time}
+    # Large texts are not written to the result backend with every progress update
+    if not should_offload(extracted_text):
+        progress_meta['extracted_text'] = extracted_text
+    self.update_state(state='PROGRESS', meta=progress_meta)  # Example progress update
 
     # @todo Universal Text Object - is cache available
     if ocr_cache:
-        redis_client.set(file_hash, extracted_text)
+        redis_client.set(ocr_cache_key(strategy_name, file_hash), extracted_text)
 
     if prompt:
+        model = model or default_llm_model()
+        labels['model'] = model
         print(f"Transforming text using LLM (prompt={prompt}, model={model}) ...")
+        llm_started_at = time.perf_counter()
         self.update_state(state='PROGRESS', meta={'progress': 75, 'status': 'Processing LLM', 'start_time': start_time,
                                                   'elapsed_time': time.time() - start_time})  # Example progress update
-        llm_resp = ollama_client.generate(model, prompt + extracted_text, stream=True)
-        num_chunk = 1
-        extracted_text = ''  # will be filled with chunks from llm
-        for chunk in llm_resp:
-            self.update_state(state='PROGRESS',
-                              meta={'progress': num_chunk, 'status': 'LLM Processing chunk no: ' + str(num_chunk),
-                                    'start_time': start_time,
-                                    'elapsed_time': time.time() - start_time})  # Example progress update
-            num_chunk += 1
-            extracted_text += chunk['response']
+        with span('llm.transform', model=model, chunked=llm_chunked):
+            try:
+                if llm_chunked:
+                    def on_chunk_done(num_done, num_chunks):
+                        self.update_state(state='PROGRESS',
+                                          meta={'progress': 75 + int(20 * num_done / num_chunks),
+                                                'status': f'LLM Processing text chunk {num_done} of {num_chunks}',
+                                                'start_time': start_time,
+                                                'elapsed_time': time.time() - start_time})
+
+                    extracted_text = transform_text_chunked(
+                        ollama_client, model, prompt, extracted_text,
+                        max_tokens=int(os.getenv('LLM_CHUNK_TOKENS', 2048)),
+                        concurrency=int(os.getenv('LLM_CHUNK_CONCURRENCY', 4)),
+                        reduce_prompt=reduce_prompt,
+                        cache=redis_client if ocr_cache else None,
+                        on_chunk_done=on_chunk_done,
+                        keep_alive=keep_alive(),
+                        # Chunks follow the page boundaries, unless the text came from the cache
+                        pages=[segment.text for segment in extract_result.pages] if extract_result else None)
+                else:
+                    llm_resp = ollama_client.generate(model, prompt + extracted_text, stream=True, keep_alive=keep_alive())
+                    num_chunk = 1
+                    extracted_text = ''  # will be filled with chunks from llm
+                    for chunk in llm_resp:
+                        self.update_state(state='PROGRESS',
+                                          meta={'progress': num_chunk, 'status': 'LLM Processing chunk no: ' + str(num_chunk),
+                                                'start_time': start_time,
+                                                'elapsed_time': time.time() - start_time})  # Example progress update
+                        num_chunk += 1
+                        extracted_text += chunk['response']
+            except Exception:
+                ENGINE_ERRORS.labels('ollama', model).inc()
+                raise
+        LLM_TRANSFORM_DURATION.labels(**labels).observe(time.perf_counter() - llm_started_at)
+        timeline.add('llm', time.perf_counter() - llm_started_at)
+
+    # Page structure is kept only when the result is the extracted text itself
+    pages = extract_result.pages if extract_result is not None and not prompt else []
+
+    # So is the document structure behind it (DoclingDocument) - stored next to the result, for the `docling` format
+    formats = {}
+    offload_started_at = time.perf_counter()
+    document = docling_json(extract_result) if extract_result is not None and not prompt else None
+    if document is not None:
+        try:
+            formats['docling'] = offload_document(self.request.id, 'docling.json', document,
+                                                  FORMAT_MEDIA_TYPES['docling'])
+        except Exception as e:
+            print(f"Failed to store the Docling JSON of the result: {e}")
+
+    page_index = inline_page_index(pages, extract_result.page_offsets() if pages else None)
+    result_ref = offload_result(self.request.id, extracted_text, page_index=page_index) \
+        if should_offload(extracted_text) else None
+    timeline.add('offload', time.perf_counter() - offload_started_at)
 
+    storage_task_id = None
+    storage_started_at = time.perf_counter()
     if storage_profile:
         if not storage_filename:
             storage_filename = filename.replace('.', '_') + '.pdf'
 
-        storage_manager = StorageManager(storage_profile)
-        storage_manager.save(file_name=storage_filename, content=extracted_text, dest_file_name=storage_filename)
+        if storage_write_behind():
+            # Persisted by a separate, retried task - the OCR worker does not wait for the upload
+            storage_task_id = f"{self.request.id}-storage"
+            store_result_task.apply_async(
+                args=[storage_profile, storage_filename, None if result_ref else extracted_text, result_ref,
+                      storage_task_id],
+                task_id=storage_task_id,
+                queue=os.getenv('STORAGE_QUEUE') or None,
+                headers=inject_headers())
+        else:
+            storage_manager = StorageManager(storage_profile)
+            storage_manager.save(file_name=storage_filename, content=extracted_text, dest_file_name=storage_filename)
+    timeline.add('storage', time.perf_counter() - storage_started_at)
+
+    profile_ref = None
+    if profiler is not None:
+        try:
+            profile_ref = save_profile(self.request.id, profiler)
+        except Exception as e:
+            print(f"Failed to store the task profile: {e}")
 
     self.update_state(state='SUCCESS',
-                      meta={'progress': 100, 'status': 'OCR Completed', 'extracted_text': extracted_text,
+                      meta={'progress': 100, 'status': 'OCR Completed',
                             'start_time': start_time,
                             'elapsed_time': time.time() - start_time})  # Example progress update
+    TASK_LATENCY.labels(**labels).observe(time.time() - (enqueued_at or start_time))
+    if checkpoints is not None:
+        checkpoints.clear()
+    if result_ref or formats or profile_ref:
+        schedule_result_sweep()
+
+    if result_ref:
+        # Stored once in the storage layer - the result backend keeps only the reference and a summary
+        return {
+            'status': 'success',
+            'result_ref': result_ref,
+            'summary': summarize(extracted_text),
+            'formats': formats,
+            'storage_task_id': storage_task_id,
+            'timeline': timeline.to_dict(),
+            'profile_ref': profile_ref,
+            'elapsed_time': time.time() - start_time
+        }
 
     return {
         'status': 'success',
         'extracted_text': extracted_text,
+        'pages': page_index,
+        'formats': formats,
+        'storage_task_id': storage_task_id,
+        'timeline': timeline.to_dict(),
+        'profile_ref': profile_ref,
         'elapsed_time': time.time() - start_time
     }
+
+
+def storage_write_behind() -> bool:
+    return os.getenv('STORAGE_WRITE_BEHIND', 'true').lower() in ('1', 'true', 'yes')
+
+
+STORAGE_DONE_PREFIX = 'storage_done:'
+RESULT_SWEEP_KEY = 'result_sweep'
+
+
+def schedule_result_sweep() -> None:
+    """
+    Queues `sweep_offloaded_results_task` - at most once every RESULT_SWEEP_INTERVAL seconds (default 3600)
+    across the workers, so no beat scheduler is needed for the blobs of the expired results to be deleted.
+    """
+    try:
+        if redis_client.set(RESULT_SWEEP_KEY, 1, nx=True, ex=int(os.getenv('RESULT_SWEEP_INTERVAL', 3600))):
+            sweep_offloaded_results_task.apply_async(queue=os.getenv('STORAGE_QUEUE') or None)
+    except redis.RedisError as e:
+        print(f"Failed to schedule the sweep of the offloaded results: {e}")
+
+
+@celery_app.task
+def sweep_offloaded_results_task():
+    """
+    Deletes the offloaded results, the other formats and the profiles stored for the tasks whose results
+    expired (`result_expires`) from the result backend.
+    """
+    result_expires = celery_app.conf.result_expires
+    if not result_expires:
+        return {'deleted': 0}  # the results never expire
+    if isinstance(result_expires, timedelta):
+        result_expires = result_expires.total_seconds()
+    deleted = sweep_offloaded_results(result_expires)
+    print(f"Deleted {deleted} blob(s) of expired results")
+    return {'deleted': deleted}
+
+
+@celery_app.task(bind=True, acks_late=True, autoretry_for=(Exception,), retry_backoff=True, retry_backoff_max=600,
+                 retry_jitter=True, max_retries=int(os.getenv('STORAGE_TASK_MAX_RETRIES', 8)))
+def store_result_task(
+        self,
+        storage_profile: str,
+        storage_filename: str,
+        text: Optional[str] = None,
+        result_ref: Optional[dict] = None,
+        idempotency_key: Optional[str] = None,
+):
+    """
+    Celery task saving an OCR result with the storage profile - given as `text` or as the reference of
+    an offloaded result. Failed uploads are retried with exponential backoff. A result saved already under
+    the same `idempotency_key` (e.g. a redelivered task) is not saved again.
+    """
+    done_key = STORAGE_DONE_PREFIX + idempotency_key if idempotency_key else None
+    if done_key and redis_client.get(done_key):
+        print(f"Result already stored ({idempotency_key}) - skipping")
+        return {'status': 'skipped', 'storage_profile': storage_profile, 'storage_filename': storage_filename}
+
+    if text is None:
+        text = load_result_text(result_ref)
+
+    StorageManager(storage_profile).save(file_name=storage_filename, content=text, dest_file_name=storage_filename)
+
+    if done_key:
+        redis_client.set(done_key, 1, ex=int(os.getenv('STORAGE_IDEMPOTENCY_TTL', 86400)))
+    return {'status': 'success', 'storage_profile': storage_profile, 'storage_filename': storage_filename}
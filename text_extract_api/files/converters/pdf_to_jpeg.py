@@ -5,12 +5,14 @@ from pdf2image import convert_from_bytes
 from text_extract_api.files.converters.converter import Converter
 from text_extract_api.files.file_formats.image import ImageFileFormat
 from text_extract_api.files.file_formats.pdf import PdfFileFormat
+from text_extract_api.metrics import RASTERIZATION_DURATION, timed
 
 class PdfToJpegConverter(Converter):
 
     @staticmethod
     def convert(file_format: PdfFileFormat) -> Iterator[Type["ImageFileFormat"]]:
-        pages = convert_from_bytes(file_format.binary)
+        with timed(RASTERIZATION_DURATION, mime_type=file_format.mime_type):
+            pages = convert_from_bytes(file_format.binary)
         if not pages:
             raise ValueError("No pages found in the PDF.")
         for i, page in enumerate(pages, start=1):
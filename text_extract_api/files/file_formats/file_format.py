@@ -1,9 +1,14 @@
 import base64
+import time
 from hashlib import md5
 from typing import Type, Iterator, Optional, Dict, Callable, List, TypedDict
 
 import magic
 
+from text_extract_api.metrics import MIME_SNIFF_DURATION
+from text_extract_api.stages import record_stage
+from text_extract_api.tracing import span
+
 
 class FileFormatDict(TypedDict):
     filename: str
@@ -166,7 +171,11 @@ class FileFormat:
         if target_format not in converters:
             raise ValueError(f"Cannot convert to {target_format}. Conversion not supported.")
 
-        return list(converters[target_format](self))
+        started = time.perf_counter()
+        with span('convert', source_mime_type=self.mime_type, target_format=target_format.__name__):
+            converted = list(converters[target_format](self))
+        record_stage('convert', time.perf_counter() - started)
+        return converted
 
     @staticmethod
     def convertible_to() -> Dict[Type["FileFormat"], Callable[[Type["FileFormat"]], Iterator[Type["Converter"]]]]:
@@ -205,6 +214,7 @@ class FileFormat:
         raise ValueError(f"No matching FileFormat class for mime type: {mime_type}")
 
     @staticmethod
+    @MIME_SNIFF_DURATION.time()
     def _guess_mime_type(binary_data: Optional[bytes] = None, filename: Optional[str] = None) -> str:
         mime = magic.Magic(mime=True)
         if binary_data:
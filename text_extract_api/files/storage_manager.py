@@ -1,12 +1,17 @@
+import glob
 import os
+import threading
 from enum import Enum
+from typing import Dict, NamedTuple, Optional, Tuple
 
 import yaml
 
 from text_extract_api.files.storage_strategies.aws_s3 import AWSS3StorageStrategy
 from text_extract_api.files.storage_strategies.google_drive import GoogleDriveStorageStrategy
 from text_extract_api.files.storage_strategies.local_filesystem import LocalFilesystemStorageStrategy
-from text_extract_api.files.storage_strategies.storage_strategy import StorageStrategy
+from text_extract_api.files.storage_strategies.storage_strategy import DEFAULT_CHUNK_SIZE, StorageStrategy
+from text_extract_api.metrics import STORAGE_SAVE_DURATION, timed
+from text_extract_api.tracing import span
 
 
 class StorageStrategy(Enum):
@@ -15,24 +20,84 @@ class StorageStrategy(Enum):
     AWS_S3 = "aws_s3"
 
 
+def storage_profile_path(profile_name: str) -> str:
+    return os.path.join(os.getenv('STORAGE_PROFILE_PATH', '/storage_profiles'), f'{profile_name}.yaml')
+
+
+def create_storage_strategy(profile: dict):
+    strategy = StorageStrategy(profile['strategy'])
+    if strategy == StorageStrategy.LOCAL_FILESYSTEM:
+        return LocalFilesystemStorageStrategy(profile)
+    elif strategy == StorageStrategy.GOOGLE_DRIVE:
+        return GoogleDriveStorageStrategy(profile)
+    elif strategy == StorageStrategy.AWS_S3:
+        return AWSS3StorageStrategy(profile)
+    else:
+        raise ValueError(f"Unknown storage strategy '{strategy}'")
+
+
+class _ProfileEntry(NamedTuple):
+    mtime: float
+    profile: dict
+    strategy: object
+
+
+class StorageProfileRegistry:
+    """
+    Process-wide cache of parsed storage profiles and their strategies. The strategies - and so their
+    backend clients (S3 client, Drive service) and bucket validation - are created once per profile and
+    rebuilt only when the profile file is modified.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, _ProfileEntry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, profile_name: str) -> Tuple[dict, object]:
+        profile_path = os.path.abspath(storage_profile_path(profile_name))
+        mtime = os.stat(profile_path).st_mtime
+        entry = self._entries.get(profile_path)
+        if entry is None or entry.mtime != mtime:
+            with self._lock:
+                entry = self._entries.get(profile_path)
+                if entry is None or entry.mtime != mtime:
+                    with open(profile_path, 'r') as file:
+                        profile = yaml.safe_load(file)
+                    entry = _ProfileEntry(mtime, profile, create_storage_strategy(profile))
+                    self._entries[profile_path] = entry
+        return entry.profile, entry.strategy
+
+    def preload(self) -> Dict[str, Optional[str]]:
+        """
+        Creates the strategies of all profiles found in STORAGE_PROFILE_PATH - validating their settings and
+        connections up front. Returns the error of every profile failing to load (None for the loaded ones).
+        """
+        errors = {}
+        for profile_path in sorted(glob.glob(storage_profile_path('*'))):
+            profile_name = os.path.splitext(os.path.basename(profile_path))[0]
+            try:
+                self.get(profile_name)
+                errors[profile_name] = None
+            except Exception as e:
+                errors[profile_name] = str(e)
+        return errors
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+storage_profiles = StorageProfileRegistry()
+
+
 class StorageManager:
     def __init__(self, profile_name):
-        profile_path = os.path.join(os.getenv('STORAGE_PROFILE_PATH', '/storage_profiles'), f'{profile_name}.yaml')
-        with open(profile_path, 'r') as file:
-            self.profile = yaml.safe_load(file)
-
-        strategy = StorageStrategy(self.profile['strategy'])
-        if strategy == StorageStrategy.LOCAL_FILESYSTEM:
-            self.strategy = LocalFilesystemStorageStrategy(self.profile)
-        elif strategy == StorageStrategy.GOOGLE_DRIVE:
-            self.strategy = GoogleDriveStorageStrategy(self.profile)
-        elif strategy == StorageStrategy.AWS_S3:
-            self.strategy = AWSS3StorageStrategy(self.profile)
-        else:
-            raise ValueError(f"Unknown storage strategy '{strategy}'")
+        self.profile, self.strategy = storage_profiles.get(profile_name)
 
     def save(self, file_name, dest_file_name, content):
-        self.strategy.save(file_name, dest_file_name, content)
+        with timed(STORAGE_SAVE_DURATION, storage_strategy=self.profile['strategy']), \
+                span('storage.save', storage_strategy=self.profile['strategy'], key=dest_file_name):
+            self.strategy.save(file_name, dest_file_name, content)
 
     def load(self, file_name):
         return self.strategy.load(file_name)
@@ -40,5 +105,39 @@ class StorageManager:
     def list(self):
         return self.strategy.list()
 
+    def list_page(self, prefix='', page_size=1000, cursor=None):
+        return self.strategy.list_page(prefix, page_size, cursor)
+
+    def iter_list(self, prefix='', page_size=1000):
+        return self.strategy.iter_list(prefix, page_size)
+
     def delete(self, file_name):
         self.strategy.delete(file_name)
+
+    def save_bytes(self, key, data):
+        with timed(STORAGE_SAVE_DURATION, storage_strategy=self.profile['strategy']), \
+                span('storage.save', storage_strategy=self.profile['strategy'], key=key):
+            self.strategy.save_bytes(key, data)
+
+    def load_bytes(self, key):
+        return self.strategy.load_bytes(key)
+
+    def save_stream(self, key, stream):
+        with timed(STORAGE_SAVE_DURATION, storage_strategy=self.profile['strategy']), \
+                span('storage.save', storage_strategy=self.profile['strategy'], key=key):
+            self.strategy.save_stream(key, stream)
+
+    def load_stream(self, key, chunk_size=DEFAULT_CHUNK_SIZE, start=0, length=None):
+        return self.strategy.load_stream(key, chunk_size, start, length)
+
+    def stat(self, key):
+        return self.strategy.stat(key)
+
+    def local_path(self, key):
+        return self.strategy.local_path(key)
+
+    def load_range(self, key, start, length):
+        return self.strategy.load_range(key, start, length)
+
+    def delete_bytes(self, key):
+        self.strategy.delete_bytes(key)
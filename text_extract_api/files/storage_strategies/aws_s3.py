@@ -1,7 +1,13 @@
+import io
+import os
+
 import boto3
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import EndpointConnectionError, ClientError
 
-from text_extract_api.files.storage_strategies.storage_strategy import StorageStrategy
+from text_extract_api.files.storage_strategies.storage_strategy import DEFAULT_CHUNK_SIZE, StorageStrategy, as_readable
 
 
 class AWSS3StorageStrategy(StorageStrategy):
@@ -12,13 +18,27 @@ class AWSS3StorageStrategy(StorageStrategy):
         self.region = self.resolve_placeholder(context['settings'].get('region'))
         self.access_key = self.resolve_placeholder(context['settings'].get('access_key'))
         self.secret_access_key = self.resolve_placeholder(context['settings'].get('secret_access_key'))
+        self.endpoint_url = self.resolve_placeholder(context['settings'].get('endpoint_url'))
+        # Data larger than multipart_threshold is uploaded in parts of multipart_chunksize, concurrently
+        self.transfer_config = TransferConfig(
+            multipart_threshold=int(context['settings'].get('multipart_threshold', 8 * 1024 * 1024)),
+            multipart_chunksize=int(context['settings'].get('multipart_chunksize', 8 * 1024 * 1024)),
+            max_concurrency=int(context['settings'].get('max_concurrency', 8)),
+        )
 
+        # The client is thread-safe and shared by all the requests using the profile (see StorageProfileRegistry)
         try:
             self.s3_client = boto3.client(
                 's3',
                 aws_access_key_id=self.access_key,
                 aws_secret_access_key=self.secret_access_key,
-                region_name=self.region
+                region_name=self.region,
+                endpoint_url=self.endpoint_url,
+                config=Config(
+                    max_pool_connections=int(context['settings'].get(
+                        'max_pool_connections', os.getenv('AWS_S3_MAX_POOL_CONNECTIONS', 32))),
+                    retries={'max_attempts': 3, 'mode': 'standard'}
+                )
             )
             self.s3_client.head_bucket(Bucket=self.bucket_name)
         except EndpointConnectionError as e:
@@ -39,12 +59,9 @@ class AWSS3StorageStrategy(StorageStrategy):
         formatted_file_name = self.format_file_name(file_name, dest_file_name)
 
         try:
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=formatted_file_name,
-                Body=content.encode('utf-8')
-            )
-        except ClientError as e:
+            self.s3_client.upload_fileobj(io.BytesIO(content.encode('utf-8')), self.bucket_name, formatted_file_name,
+                                          Config=self.transfer_config)
+        except (ClientError, S3UploadFailedError) as e:
             raise RuntimeError(
                 f"{str(e)}\n"
                 f"Error saving file '{file_name}' as '{formatted_file_name}' to bucket '{self.bucket_name}'."
@@ -64,9 +81,28 @@ class AWSS3StorageStrategy(StorageStrategy):
             ) from e
 
     def list(self):
+        return list(self.iter_list())
+
+    def list_page(self, prefix='', page_size=1000, cursor=None):
+        params = {'Bucket': self.bucket_name, 'Prefix': prefix, 'MaxKeys': page_size}
+        if cursor:
+            params['ContinuationToken'] = cursor
         try:
-            response = self.s3_client.list_objects_v2(Bucket=self.bucket_name)
-            return [item['Key'] for item in response.get('Contents', [])]
+            response = self.s3_client.list_objects_v2(**params)
+        except ClientError as e:
+            raise RuntimeError(
+                f"{str(e)}\n"
+                f"Error listing objects in bucket '{self.bucket_name}'."
+            ) from e
+        return [item['Key'] for item in response.get('Contents', [])], response.get('NextContinuationToken')
+
+    def iter_list(self, prefix='', page_size=1000):
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        try:
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix,
+                                           PaginationConfig={'PageSize': page_size}):
+                for item in page.get('Contents', []):
+                    yield item['Key']
         except ClientError as e:
             raise RuntimeError(
                 f"{str(e)}\n"
@@ -81,3 +117,80 @@ class AWSS3StorageStrategy(StorageStrategy):
                 f"{str(e)}\n"
                 f"Error deleting file '{file_name}' from bucket '{self.bucket_name}'."
             ) from e
+
+    def save_bytes(self, key, data):
+        try:
+            self.s3_client.put_object(Bucket=self.bucket_name, Key=key, Body=data)
+        except ClientError as e:
+            raise RuntimeError(
+                f"{str(e)}\n"
+                f"Error saving '{key}' to bucket '{self.bucket_name}'."
+            ) from e
+
+    def load_bytes(self, key):
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+            return response['Body'].read()
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchKey':
+                return None
+            raise RuntimeError(
+                f"{str(e)}\n"
+                f"Error loading '{key}' from bucket '{self.bucket_name}'."
+            ) from e
+
+    def save_stream(self, key, stream):
+        try:
+            self.s3_client.upload_fileobj(as_readable(stream), self.bucket_name, key, Config=self.transfer_config)
+        except (ClientError, S3UploadFailedError) as e:
+            raise RuntimeError(
+                f"{str(e)}\n"
+                f"Error saving '{key}' to bucket '{self.bucket_name}'."
+            ) from e
+
+    def load_stream(self, key, chunk_size=DEFAULT_CHUNK_SIZE, start=0, length=None):
+        params = {'Bucket': self.bucket_name, 'Key': key}
+        if start or length is not None:
+            params['Range'] = f"bytes={start}-{start + length - 1 if length is not None else ''}"
+        try:
+            response = self.s3_client.get_object(**params)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchKey':
+                return None
+            raise RuntimeError(
+                f"{str(e)}\n"
+                f"Error loading '{key}' from bucket '{self.bucket_name}'."
+            ) from e
+        return response['Body'].iter_chunks(chunk_size)
+
+    def stat(self, key):
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise RuntimeError(
+                f"{str(e)}\n"
+                f"Error reading '{key}' metadata from bucket '{self.bucket_name}'."
+            ) from e
+        # binary/octet-stream is the S3 default - the content type was not set
+        content_type = response.get('ContentType')
+        return {'size': response['ContentLength'], 'etag': response['ETag'],
+                'content_type': content_type if content_type != 'binary/octet-stream' else None,
+                'last_modified': response['LastModified'].timestamp()}
+
+    def load_range(self, key, start, length):
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key,
+                                                 Range=f"bytes={start}-{start + length - 1}")
+            return response['Body'].read()
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchKey':
+                return None
+            raise RuntimeError(
+                f"{str(e)}\n"
+                f"Error loading '{key}' from bucket '{self.bucket_name}'."
+            ) from e
+
+    def delete_bytes(self, key):
+        self.delete(key)
@@ -1,15 +1,74 @@
 import io
 import os
+import threading
+from datetime import datetime
 
+import httplib2
 from google.oauth2.service_account import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload, MediaFileUpload
+from googleapiclient.http import MediaIoBaseDownload, MediaIoBaseUpload, MediaUpload
 
 
 ## Note - this code is using Service Accounts for authentication which are separate accounts other than
 ## your Google account. You can create a service account and download the JSON key file to use it for
 ## how to enable GDrive API: https://developers.google.com/drive/api/quickstart/python?hl=pl
-from text_extract_api.files.storage_strategies.storage_strategy import StorageStrategy
+from text_extract_api.files.storage_strategies.storage_strategy import DEFAULT_CHUNK_SIZE, StorageStrategy, as_readable
+
+# Resumable upload chunks must be multiples of 256 KB
+UPLOAD_CHUNK_SIZE = int(os.getenv('GOOGLE_DRIVE_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)) // (256 * 1024) * (256 * 1024)
+
+
+class StreamMediaUpload(MediaUpload):
+    """
+    Resumable media upload of a non-seekable stream of unknown size. Only the chunk being uploaded is kept
+    in memory - the upload requests chunks in order, re-requesting the last one when it was not accepted.
+    """
+
+    def __init__(self, stream, mimetype='application/octet-stream', chunksize=UPLOAD_CHUNK_SIZE):
+        super().__init__()
+        self._stream = as_readable(stream)
+        self._mimetype = mimetype
+        self._chunksize = chunksize
+        self._buffer = b''
+        self._buffer_start = 0
+
+    def chunksize(self):
+        return self._chunksize
+
+    def mimetype(self):
+        return self._mimetype
+
+    def size(self):
+        return None
+
+    def resumable(self):
+        return True
+
+    def has_stream(self):
+        return False
+
+    def getbytes(self, begin, length):
+        if begin < self._buffer_start:
+            raise ValueError("Stream media upload can not rewind to already uploaded data")
+        skip = begin - self._buffer_start - len(self._buffer)
+        while skip > 0:
+            data = self._stream.read(min(skip, self._chunksize))
+            if not data:
+                break
+            skip -= len(data)
+        self._buffer = self._buffer[begin - self._buffer_start:]
+        self._buffer_start = begin
+        while len(self._buffer) < length:
+            data = self._stream.read(length - len(self._buffer))
+            if not data:
+                break
+            self._buffer += data
+        return self._buffer[:length]
+
+    def to_json(self):
+        raise NotImplementedError("Stream media uploads can not be serialized")
+
 
 class GoogleDriveStorageStrategy(StorageStrategy):
     def __init__(self, context):
@@ -18,14 +77,27 @@ class GoogleDriveStorageStrategy(StorageStrategy):
             context['settings']['service_account_file'],
             scopes=['https://www.googleapis.com/auth/drive']
         )
-        self.service = build('drive', 'v3', credentials=self.credentials)
+        # Built once per profile (see StorageProfileRegistry). httplib2 is not thread-safe, so the
+        # requests are executed with a per-thread authorized connection
+        self.service = build('drive', 'v3', credentials=self.credentials, cache_discovery=False)
         self.folder_id = context['settings']['folder_id']
+        self._local = threading.local()
 
-    def save(self, file_name, dest_file_name, content):
-        # Save content to a temporary file
-        with open(file_name, 'wb') as temp_file:
-            temp_file.write(content.encode('utf-8'))  # Encode the string to bytes
+    def _http(self):
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = AuthorizedHttp(self.credentials, http=httplib2.Http())
+        return http
+
+    def _execute(self, request):
+        return request.execute(http=self._http())
+
+    def _media_request(self, file_id):
+        request = self.service.files().get_media(fileId=file_id)
+        request.http = self._http()
+        return request
 
+    def save(self, file_name, dest_file_name, content):
         file_metadata = {
             'name': self.format_file_name(file_name, dest_file_name),
         }
@@ -33,24 +105,29 @@ class GoogleDriveStorageStrategy(StorageStrategy):
             file_metadata['parents'] = [self.folder_id]
 
         print(file_metadata)
-        media = MediaFileUpload(file_name, resumable=True)
-        file = self.service.files().create(body=file_metadata, media_body=media, fields='id').execute()
+        # Uploaded from memory - no temporary file is written
+        media = MediaIoBaseUpload(io.BytesIO(content.encode('utf-8')), mimetype='text/plain',
+                                  chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
+        file = self._upload(self.service.files().create(body=file_metadata, media_body=media, fields='id'))
         print(f"File ID: {file.get('id')}")
 
-        # Remove the temporary file
-        os.remove(file_name)
+    def _upload(self, request):
+        response = None
+        while response is None:
+            _, response = request.next_chunk(http=self._http())
+        return response
 
     def load(self, file_name):
         query = f"name = '{file_name}'"
         if self.folder_id:
             query += f" and '{self.folder_id}' in parents"
-        results = self.service.files().list(q=query, spaces='drive', fields='files(id, name)').execute()
+        results = self._execute(self.service.files().list(q=query, spaces='drive', fields='files(id, name)'))
         items = results.get('files', [])
         if not items:
             print('No files found.')
             return None
         file_id = items[0]['id']
-        request = self.service.files().get_media(fileId=file_id)
+        request = self._media_request(file_id)
         fh = io.BytesIO()
         downloader = MediaIoBaseDownload(fh, request)
         done = False
@@ -61,22 +138,97 @@ class GoogleDriveStorageStrategy(StorageStrategy):
         return fh.read()
 
     def list(self):
-        query = ""  # "mimeType='application/vnd.google-apps.file'"
+        return list(self.iter_list())
+
+    def list_page(self, prefix='', page_size=1000, cursor=None):
+        conditions = []  # "mimeType='application/vnd.google-apps.file'"
         if self.folder_id:
-            query = f"'{self.folder_id}' in parents"
-        results = self.service.files().list(q=query, spaces='drive', fields='files(id, name)').execute()
-        items = results.get('files', [])
-        return [item['name'] for item in items]
+            conditions.append(f"'{self.folder_id}' in parents")
+        if prefix:
+            # Drive matches `name contains` against the prefixes of the name (and of its words) - filtered below
+            conditions.append("name contains '{}'".format(prefix.replace('\\', '\\\\').replace("'", "\\'")))
+        results = self._execute(self.service.files().list(
+            q=' and '.join(conditions), spaces='drive', pageSize=min(page_size, 1000), pageToken=cursor,
+            orderBy='name', fields='nextPageToken, files(id, name)'))
+        names = [item['name'] for item in results.get('files', [])]
+        return [name for name in names if name.startswith(prefix)], results.get('nextPageToken')
 
     def delete(self, file_name):
         query = f"name = '{file_name}'"
         if self.folder_id:
             query += f" and '{self.folder_id}' in parents"
-        results = self.service.files().list(q=query, spaces='drive', fields='files(id, name)').execute()
+        results = self._execute(self.service.files().list(q=query, spaces='drive', fields='files(id, name)'))
         items = results.get('files', [])
         if not items:
             print('No files found.')
             return
         file_id = items[0]['id']
-        self.service.files().delete(fileId=file_id).execute()
+        self._execute(self.service.files().delete(fileId=file_id))
         print(f"File {file_name} deleted.")
+
+    def save_bytes(self, key, data):
+        file_metadata = {'name': key}
+        if self.folder_id:
+            file_metadata['parents'] = [self.folder_id]
+        media = MediaIoBaseUpload(io.BytesIO(data), mimetype='application/octet-stream',
+                                  chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
+        self._upload(self.service.files().create(body=file_metadata, media_body=media, fields='id'))
+
+    def load_bytes(self, key):
+        return self.load(key)
+
+    def save_stream(self, key, stream):
+        file_metadata = {'name': key}
+        if self.folder_id:
+            file_metadata['parents'] = [self.folder_id]
+        self._upload(self.service.files().create(body=file_metadata, media_body=StreamMediaUpload(stream),
+                                                 fields='id'))
+
+    def load_stream(self, key, chunk_size=DEFAULT_CHUNK_SIZE, start=0, length=None):
+        if start or length is not None:
+            return super().load_stream(key, chunk_size, start, length)
+        query = f"name = '{key}'"
+        if self.folder_id:
+            query += f" and '{self.folder_id}' in parents"
+        items = self._execute(self.service.files().list(q=query, spaces='drive', fields='files(id, name)')).get('files', [])
+        if not items:
+            return None
+        return self._download_chunks(items[0]['id'], chunk_size)
+
+    def stat(self, key):
+        query = f"name = '{key}'"
+        if self.folder_id:
+            query += f" and '{self.folder_id}' in parents"
+        items = self._execute(self.service.files().list(
+            q=query, spaces='drive', fields='files(id, name, size, md5Checksum, mimeType, modifiedTime)')).get('files', [])
+        if not items:
+            return None
+        item = items[0]
+        return {'size': int(item.get('size', 0)), 'etag': f'"{item.get("md5Checksum") or item["id"]}"',
+                'content_type': item.get('mimeType'),
+                'last_modified': datetime.fromisoformat(item['modifiedTime'].replace('Z', '+00:00')).timestamp()
+                if item.get('modifiedTime') else None}
+
+    def _download_chunks(self, file_id, chunk_size):
+        buffer = io.BytesIO()
+        downloader = MediaIoBaseDownload(buffer, self._media_request(file_id), chunksize=chunk_size)
+        done = False
+        while not done:
+            _, done = downloader.next_chunk()
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    def load_range(self, key, start, length):
+        query = f"name = '{key}'"
+        if self.folder_id:
+            query += f" and '{self.folder_id}' in parents"
+        items = self._execute(self.service.files().list(q=query, spaces='drive', fields='files(id, name)')).get('files', [])
+        if not items:
+            return None
+        request = self._media_request(items[0]['id'])
+        request.headers['Range'] = f"bytes={start}-{start + length - 1}"
+        return request.execute()
+
+    def delete_bytes(self, key):
+        self.delete(key)
@@ -1,7 +1,9 @@
 import os
+import uuid
 from datetime import datetime
+from itertools import islice
 
-from text_extract_api.files.storage_strategies.storage_strategy import StorageStrategy
+from text_extract_api.files.storage_strategies.storage_strategy import DEFAULT_CHUNK_SIZE, StorageStrategy, iter_chunks
 
 def resolve_path(path):
     return os.path.abspath(os.path.expanduser(path))
@@ -28,6 +30,16 @@ class LocalFilesystemStorageStrategy(StorageStrategy):
             raise ValueError("Path traversal detected")
         return full_path
 
+    def _resolve_key(self, key):
+        # Keys might contain sub directories (e.g. results/<task id>.md.gz) but must stay within base directory
+        if '..' in key or key.startswith('/') or '\\' in key:
+            raise ValueError("Path traversal detected")
+
+        full_path = os.path.abspath(os.path.join(self.base_directory, key))
+        if not full_path.startswith(self.base_directory + os.sep):
+            raise ValueError("Path traversal detected")
+        return full_path
+
     def _get_subfolder_path(self, file_name):
         if not self.subfolder_names_format:
             return self.base_directory
@@ -46,11 +58,106 @@ class LocalFilesystemStorageStrategy(StorageStrategy):
             return file.read()
 
     def list(self):
-        return [
-            os.path.relpath(os.path.join(root, f), self.base_directory)
-            for root, _, files in os.walk(self.base_directory)
-            for f in files
-        ]
+        return list(self.iter_list())
+
+    def list_page(self, prefix='', page_size=1000, cursor=None):
+        # The cursor is the last name returned - names are listed in a stable (sorted) order
+        names = list(islice(self._iter_names(self.base_directory, [], prefix, cursor.split('/') if cursor else None),
+                            page_size + 1))
+        return names[:page_size], (names[page_size - 1] if len(names) > page_size else None)
+
+    def iter_list(self, prefix='', page_size=1000):
+        return self._iter_names(self.base_directory, [], prefix, None)
+
+    def _iter_names(self, directory, parts, prefix, after):
+        """
+        Walks the tree with os.scandir in sorted order, yielding the names (relative paths) starting with
+        `prefix` and following the `after` name (given as path parts). Directories which cannot contain such
+        names are not entered.
+        """
+        with os.scandir(directory) as scanner:
+            entries = sorted(scanner, key=lambda entry: entry.name)
+        for entry in entries:
+            entry_parts = parts + [entry.name]
+            name = '/'.join(entry_parts)
+            if entry.is_dir(follow_symlinks=False):
+                if after is not None and entry_parts < after[:len(entry_parts)]:
+                    continue
+                if name.startswith(prefix) or prefix.startswith(name + '/'):
+                    yield from self._iter_names(entry.path, entry_parts, prefix, after)
+            elif entry.is_file() and name.startswith(prefix) and (after is None or entry_parts > after):
+                yield name
 
     def delete(self, file_name):
         os.remove(self._sanitize_and_resolve(file_name))
+
+    def save_bytes(self, key, data):
+        path = self._resolve_key(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(data)
+
+    def load_bytes(self, key):
+        path = self._resolve_key(key)
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'rb') as file:
+            return file.read()
+
+    def save_stream(self, key, stream):
+        path = self._resolve_key(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and moved in place, so readers never see partial data
+        temp_path = f"{path}.{uuid.uuid4().hex}.part"
+        try:
+            with open(temp_path, 'wb') as file:
+                for chunk in iter_chunks(stream):
+                    file.write(chunk)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def load_stream(self, key, chunk_size=DEFAULT_CHUNK_SIZE, start=0, length=None):
+        path = self._resolve_key(key)
+        if not os.path.isfile(path):
+            return None
+        return self._read_chunks(path, chunk_size, start, length)
+
+    @staticmethod
+    def _read_chunks(path, chunk_size, start, length):
+        with open(path, 'rb') as file:
+            file.seek(start)
+            remaining = length
+            while remaining is None or remaining > 0:
+                chunk = file.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    return
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def stat(self, key):
+        path = self._resolve_key(key)
+        if not os.path.isfile(path):
+            return None
+        stat_result = os.stat(path)
+        return {'size': stat_result.st_size, 'etag': f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"',
+                'content_type': None, 'last_modified': stat_result.st_mtime}
+
+    def local_path(self, key):
+        path = self._resolve_key(key)
+        return path if os.path.isfile(path) else None
+
+    def load_range(self, key, start, length):
+        path = self._resolve_key(key)
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'rb') as file:
+            file.seek(start)
+            return file.read(length)
+
+    def delete_bytes(self, key):
+        path = self._resolve_key(key)
+        if os.path.isfile(path):
+            os.remove(path)
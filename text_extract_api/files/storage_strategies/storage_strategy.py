@@ -1,8 +1,55 @@
+import hashlib
+import io
 import os
 from datetime import datetime
 from pathlib import Path
 from string import Template
 
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class IteratorReader(io.RawIOBase):
+    """
+    Read-only, non-seekable file-like object over an iterator of byte chunks.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            try:
+                self._pending = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def as_readable(stream):
+    """
+    Returns `stream` if it is a file-like object already, otherwise wraps the iterator of byte chunks.
+    """
+    if hasattr(stream, 'read'):
+        return stream
+    return io.BufferedReader(IteratorReader(stream), DEFAULT_CHUNK_SIZE)
+
+
+def iter_chunks(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Returns an iterator of byte chunks over a file-like object or an iterator of byte chunks.
+    """
+    if not hasattr(stream, 'read'):
+        return iter(stream)
+    return iter(lambda: stream.read(chunk_size), b'')
+
+
 class StorageStrategy:
     def __init__(self, context):
         self.context = context
@@ -19,6 +66,92 @@ class StorageStrategy:
     def delete(self, file_name):
         raise NotImplementedError("Subclasses must implement this method")
 
+    def list_page(self, prefix='', page_size=1000, cursor=None):
+        """
+        Returns a page of up to `page_size` file names starting with `prefix` and the cursor of the next page
+        (None on the last page). Cursors are opaque - pass back the one returned by the previous call.
+        Backends override it with native pagination; by default the full `list` is paginated.
+        """
+        names = [name for name in self.list() if name.startswith(prefix)]
+        start = int(cursor) if cursor else 0
+        end = start + page_size
+        return names[start:end], (str(end) if end < len(names) else None)
+
+    def iter_list(self, prefix='', page_size=1000):
+        """
+        Yields all the file names starting with `prefix`, fetching them page by page.
+        """
+        cursor = None
+        while True:
+            names, cursor = self.list_page(prefix, page_size, cursor)
+            yield from names
+            if not cursor:
+                return
+
+    def save_bytes(self, key, data):
+        """
+        Saves binary data under `key` as is - no file name formatting is applied.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def load_bytes(self, key):
+        """
+        Loads binary data saved with `save_bytes`; returns None when the key does not exist.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def delete_bytes(self, key):
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def save_stream(self, key, stream):
+        """
+        Saves data read from `stream` - a binary file-like object or an iterator of byte chunks - under `key`.
+        Backends override it to upload the data without buffering it whole; by default it is joined in memory.
+        """
+        self.save_bytes(key, b''.join(iter_chunks(stream)))
+
+    def load_stream(self, key, chunk_size=DEFAULT_CHUNK_SIZE, start=0, length=None):
+        """
+        Returns an iterator of byte chunks of the data saved under `key` - or of `length` bytes of it,
+        beginning at `start` - or None when the key does not exist.
+        """
+        if length is not None:
+            data = self.load_range(key, start, length)
+        else:
+            data = self.load_bytes(key)
+            data = data[start:] if data is not None and start else data
+        if data is None:
+            return None
+        return (data[offset:offset + chunk_size] for offset in range(0, len(data), chunk_size))
+
+    def stat(self, key):
+        """
+        Returns the `size`, `etag`, `content_type` and `last_modified` (timestamp) of the data saved under
+        `key` or None when the key does not exist. `content_type` and `last_modified` might be None.
+        """
+        data = self.load_bytes(key)
+        if data is None:
+            return None
+        return {'size': len(data), 'etag': f'"{hashlib.md5(data).hexdigest()}"', 'content_type': None,
+                'last_modified': None}
+
+    def local_path(self, key):
+        """
+        Returns the path of the local file holding the data saved under `key` - for backends keeping the
+        data in local files, which might then be sent by the server directly. None by default.
+        """
+        return None
+
+    def load_range(self, key, start, length):
+        """
+        Loads `length` bytes starting at `start` of the data saved with `save_bytes`.
+        Backends supporting ranged reads override it; by default the whole data is loaded.
+        """
+        data = self.load_bytes(key)
+        if data is None:
+            return None
+        return data[start:start + length]
+
     def format_file_name(self, file_name, format_string):
         return format_string.format(file_fullname=file_name,  # file_name with path
                                     file_name=Path(file_name).stem,  # file_name without path
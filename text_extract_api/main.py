@@ -1,16 +1,25 @@
+import asyncio
+import json
 import os
 import pathlib
 import sys
 import time
 import logging
+import mimetypes
 import traceback
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from urllib.parse import quote
 
+import httpx
+import msgpack
 import ollama
-import redis
+import redis.asyncio
+from celery import states
 from celery.result import AsyncResult
-from fastapi import FastAPI, Form, UploadFile, File, HTTPException
+from fastapi import FastAPI, Form, UploadFile, File, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field, field_validator
 
 # Configure logging
@@ -20,11 +29,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+from text_extract_api.cache import cache_key, cache_stats, count_lookup, invalidate
 from text_extract_api.celery_app import app as celery_app
+from text_extract_api.compression import CompressionMiddleware
+from text_extract_api.concurrency import iterate_blocking, run_blocking
+from text_extract_api.extract.model_warmup import keep_alive, worker_readiness_async
+from text_extract_api.extract.result_formats import FORMAT_MEDIA_TYPES, markdown_to_text, negotiate_format
+from text_extract_api.extract.result_store import (
+    find_pages, iter_result_text, load_index, load_result_text, read_pages, read_text_range
+)
 from text_extract_api.extract.strategies.strategy import Strategy
 from text_extract_api.extract.tasks import ocr_task
 from text_extract_api.files.file_formats.file_format import FileFormat, FileField
-from text_extract_api.files.storage_manager import StorageManager
+from text_extract_api.files.storage_manager import StorageManager, storage_profiles
+from text_extract_api.metrics import QUEUE_DEPTH, UPLOAD_SIZE, render_metrics
+from text_extract_api.result_waiter import create_result_waiter, result_backend_client
+from text_extract_api.tracing import inject_headers, setup_tracing, traced
 
 # Define base path as text_extract_api - required for keeping absolute namespaces
 sys.path.insert(0, str(pathlib.Path(__file__).parent.resolve()))
@@ -38,7 +58,26 @@ def storage_profile_exists(profile_name: str) -> bool:
         return os.path.isfile(sub_profile_path)
     return True
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Storage backends (clients, bucket validation) are set up once - not on the first request using them
+    for profile_name, error in (await run_blocking(storage_profiles.preload, pool='storage')).items():
+        if error:
+            logger.warning(f"Storage profile '{profile_name}' is not available: {error}")
+        else:
+            logger.info(f"Storage profile '{profile_name}' loaded")
+    yield
+    await http_client.aclose()
+    await redis_client.aclose()
+    if broker_client is not None:
+        await broker_client.aclose()
+    if result_waiter is not None:
+        await result_waiter.aclose()
+    if backend_client is not None:
+        await backend_client.aclose()
+
+app = FastAPI(lifespan=lifespan)
+setup_tracing('text-extract-api')
 
 # Add CORS middleware
 app.add_middleware(
@@ -49,12 +88,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses (brotli or gzip, as accepted by the client) above the size threshold
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv('RESPONSE_COMPRESSION_MIN_SIZE', 1024)),
+    gzip_level=int(os.getenv('RESPONSE_GZIP_LEVEL', 6)),
+    brotli_quality=int(os.getenv('RESPONSE_BROTLI_QUALITY', 4)),
+)
+
 # Connect to Redis
 redis_url = os.getenv('REDIS_CACHE_URL')
 if not redis_url:
     logger.error("REDIS_CACHE_URL environment variable is not set!")
     raise ValueError("REDIS_CACHE_URL environment variable must be set")
-redis_client = redis.StrictRedis.from_url(redis_url)
+redis_client = redis.asyncio.Redis.from_url(redis_url, max_connections=int(os.getenv('REDIS_MAX_CONNECTIONS', 64)))
+
+# Shared connection pools of the request path - the requests never block the event loop on I/O
+http_client = httpx.AsyncClient(timeout=5, limits=httpx.Limits(max_connections=int(os.getenv('HTTP_MAX_CONNECTIONS', 64))))
+ollama_client = ollama.AsyncClient(host=os.getenv('OLLAMA_HOST'))
+broker_url = os.getenv('CELERY_BROKER_URL', '')
+broker_client = redis.asyncio.Redis.from_url(broker_url) if broker_url.startswith(('redis://', 'rediss://')) else None
+# When the result backend is Redis, task states are read in bulk and long-polling requests
+# (`/ocr/result/{task_id}?wait=`) wait for the states it publishes
+backend_client = result_backend_client()
+result_waiter = create_result_waiter(celery_app, backend_client)
+RESULT_MAX_WAIT = float(os.getenv('RESULT_MAX_WAIT', 60))
+BULK_RESULTS_MAX_IDS = int(os.getenv('BULK_RESULTS_MAX_IDS', 1000))
+BULK_RESULTS_BATCH_SIZE = int(os.getenv('BULK_RESULTS_BATCH_SIZE', 100))
 
 # Log startup configuration
 logger.info("=== Text Extract API Starting ===")
@@ -66,6 +126,27 @@ logger.info(f"App Environment: {os.getenv('APP_ENV', 'Not Set')}")
 logger.info(f"Storage Profile Path: {os.getenv('STORAGE_PROFILE_PATH', 'Not Set')}")
 logger.info("=================================")
 
+def metric_queues() -> list:
+    queues = [celery_app.conf.task_default_queue, os.getenv('STORAGE_QUEUE')]
+    return [queue for queue in dict.fromkeys(queues) if queue]
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics of the API - and, when the broker is Redis, the depth of the Celery queues.
+    The workers serve their own metrics on WORKER_METRICS_PORT.
+    """
+    if broker_client is not None:
+        for queue in metric_queues():
+            try:
+                QUEUE_DEPTH.labels(queue).set(await broker_client.llen(queue))
+            except Exception as e:
+                logger.warning(f"Failed to read the depth of the '{queue}' queue: {e}")
+    body, content_type = await run_blocking(render_metrics)
+    return Response(body, media_type=content_type)
+
+
 @app.get("/")
 async def root():
     """Root endpoint to check if the API is running"""
@@ -84,7 +165,7 @@ async def health_check():
     
     # Check Redis connection
     try:
-        redis_client.ping()
+        await redis_client.ping()
         health_status["redis"] = "healthy"
         logger.info("Redis health check: healthy")
     except Exception as e:
@@ -95,8 +176,7 @@ async def health_check():
     # Check Ollama connection
     try:
         ollama_host = os.getenv('OLLAMA_HOST', 'http://ollama:11434')
-        import requests
-        response = requests.get(f"{ollama_host}/api/version", timeout=5)
+        response = await http_client.get(f"{ollama_host}/api/version")
         if response.status_code == 200:
             health_status["ollama"] = "healthy"
             logger.info("Ollama health check: healthy")
@@ -111,8 +191,7 @@ async def health_check():
     
     # Check Celery workers
     try:
-        inspect = celery_app.control.inspect()
-        active_workers = inspect.active()
+        active_workers = await run_blocking(celery_app.control.inspect().active)
         if active_workers:
             health_status["celery"] = "healthy"
             logger.info(f"Celery health check: healthy, active workers: {list(active_workers.keys())}")
@@ -129,13 +208,23 @@ async def health_check():
     overall_healthy = all(status == "healthy" for status in health_status.values())
     
     logger.info(f"Overall health status: {'healthy' if overall_healthy else 'degraded'}")
+
+    # Model warm-up readiness reported by the workers on startup
+    try:
+        workers_readiness = await worker_readiness_async(redis_client)
+    except Exception as e:
+        logger.error(f"Worker readiness check failed: {str(e)}")
+        workers_readiness = {}
     
     return {
         "status": "healthy" if overall_healthy else "degraded",
-        "services": health_status
+        "services": health_status,
+        "models_ready": bool(workers_readiness) and all(w.get('ready') for w in workers_readiness.values()),
+        "workers": workers_readiness
     }
 
 @app.post("/ocr")
+@traced('ocr_endpoint')
 async def ocr_endpoint(
         strategy: str = Form(...),
         prompt: str = Form(None),
@@ -144,7 +233,9 @@ async def ocr_endpoint(
         ocr_cache: bool = Form(...),
         storage_profile: str = Form('default'),
         storage_filename: str = Form(None),
-        language: str = Form('en')
+        language: str = Form('en'),
+        llm_chunked: bool = Form(False),
+        reduce_prompt: str = Form(None)
 ):
     """
     Endpoint to extract text from an uploaded PDF, Image or Office file using different OCR strategies.
@@ -156,7 +247,8 @@ async def ocr_endpoint(
         # Validate input
         try:
             OcrFormRequest(strategy=strategy, prompt=prompt, model=model, ocr_cache=ocr_cache,
-                           storage_profile=storage_profile, storage_filename=storage_filename, language=language)
+                           storage_profile=storage_profile, storage_filename=storage_filename, language=language,
+                           llm_chunked=llm_chunked, reduce_prompt=reduce_prompt)
         except ValueError as e:
             logger.error(f"Validation error: {str(e)}")
             raise HTTPException(status_code=400, detail=str(e))
@@ -164,12 +256,13 @@ async def ocr_endpoint(
         filename = storage_filename if storage_filename else file.filename
         file_binary = await file.read()
         file_format = FileFormat.from_binary(file_binary, filename, file.content_type)
+        UPLOAD_SIZE.labels(file_format.mime_type).observe(len(file_binary))
 
         logger.info(f"Processing Document {file_format.filename} with strategy: {strategy}, ocr_cache: {ocr_cache}, model: {model}, storage_profile: {storage_profile}, storage_filename: {storage_filename}, language: {language}, will be saved as: {filename}")
 
         # Test Redis connection before creating task
         try:
-            redis_client.ping()
+            await redis_client.ping()
             logger.info("Redis connection successful")
         except Exception as redis_error:
             logger.error(f"Redis connection failed: {str(redis_error)}")
@@ -177,8 +270,7 @@ async def ocr_endpoint(
 
         # Test Celery connection
         try:
-            inspect = celery_app.control.inspect()
-            active_workers = inspect.active()
+            active_workers = await run_blocking(celery_app.control.inspect().active)
             if not active_workers:
                 logger.warning("No active Celery workers found")
             else:
@@ -189,9 +281,11 @@ async def ocr_endpoint(
 
         # Asynchronous processing using Celery
         try:
-            task = ocr_task.apply_async(
+            task = await run_blocking(
+                ocr_task.apply_async,
                 args=[file_format.binary, strategy, file_format.filename, file_format.hash, ocr_cache, prompt, model, language,
-                      storage_profile, storage_filename])
+                      storage_profile, storage_filename, llm_chunked, reduce_prompt],
+                headers={'enqueued_at': time.time(), **inject_headers()})
             logger.info(f"Task created successfully with ID: {task.id}")
             return {"task_id": task.id}
         except Exception as task_error:
@@ -217,14 +311,17 @@ async def ocr_upload_endpoint(
         ocr_cache: bool = Form(...),
         storage_profile: str = Form('default'),
         storage_filename: str = Form(None),
-        language: str = Form('en')
+        language: str = Form('en'),
+        llm_chunked: bool = Form(False),
+        reduce_prompt: str = Form(None)
 ):
     """
     Alias endpoint to extract text from an uploaded PDF/Office/Image file using different OCR strategies.
     Supports both synchronous and asynchronous processing.
     """
     logger.info(f"OCR upload request received via /ocr/upload endpoint")
-    return await ocr_endpoint(strategy, prompt, model, file, ocr_cache, storage_profile, storage_filename, language)
+    return await ocr_endpoint(strategy, prompt, model, file, ocr_cache, storage_profile, storage_filename, language,
+                              llm_chunked, reduce_prompt)
 
 
 class OllamaGenerateRequest(BaseModel):
@@ -244,10 +341,12 @@ class OcrRequest(BaseModel):
     storage_profile: Optional[str] = Field('default', description="Storage profile to use")
     storage_filename: Optional[str] = Field(None, description="Storage filename to use")
     language: Optional[str] = Field('en', description="Language to use for OCR")
+    llm_chunked: bool = Field(False, description="Process the prompt over text chunks concurrently (for long documents)")
+    reduce_prompt: Optional[str] = Field(None, description="Prompt combining the chunk outputs when llm_chunked is enabled")
 
     @field_validator('strategy')
     def validate_strategy(cls, v):
-        Strategy.get_strategy(v)
+        Strategy.validate_strategy_name(v)
         return v
 
     @field_validator('storage_profile')
@@ -265,10 +364,12 @@ class OcrFormRequest(BaseModel):
     storage_profile: Optional[str] = Field('default', description="Storage profile to use")
     storage_filename: Optional[str] = Field(None, description="Storage filename to use")
     language: Optional[str] = Field('en', description="Language to use for OCR")
+    llm_chunked: bool = Field(False, description="Process the prompt over text chunks concurrently (for long documents)")
+    reduce_prompt: Optional[str] = Field(None, description="Prompt combining the chunk outputs when llm_chunked is enabled")
 
     @field_validator('strategy')
     def validate_strategy(cls, v):
-        Strategy.get_strategy(v)
+        Strategy.validate_strategy_name(v)
         return v
 
     @field_validator('storage_profile')
@@ -279,6 +380,7 @@ class OcrFormRequest(BaseModel):
 
 
 @app.post("/ocr/request")
+@traced('ocr_request_endpoint')
 async def ocr_request_endpoint(request: OcrRequest):
     """
     Endpoint to extract text from an uploaded PDF/Office/Image file using different OCR strategies.
@@ -291,54 +393,384 @@ async def ocr_request_endpoint(request: OcrRequest):
         file = FileFormat.from_base64(request.file, request.storage_filename)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    UPLOAD_SIZE.labels(file.mime_type).observe(len(file.binary))
 
     print(
         f"Processing {file.mime_type} with strategy: {request.strategy}, ocr_cache: {request.ocr_cache}, model: {request.model}, storage_profile: {request.storage_profile}, storage_filename: {request.storage_filename}, language: {request.language}")
 
     # Asynchronous processing using Celery
-    task = ocr_task.apply_async(
+    task = await run_blocking(
+        ocr_task.apply_async,
         args=[file.binary, request.strategy, file.filename, file.hash, request.ocr_cache, request.prompt,
-              request.model, request.language, request.storage_profile, request.storage_filename])
+              request.model, request.language, request.storage_profile, request.storage_filename,
+              request.llm_chunked, request.reduce_prompt],
+        headers={'enqueued_at': time.time(), **inject_headers()})
     return {"task_id": task.id}
 
 
 @app.get("/ocr/result/{task_id}")
-async def ocr_status(task_id: str):
+async def ocr_status(task_id: str, request: Request, format: Optional[str] = None,
+                     wait: float = Query(0, ge=0, description="Seconds to wait for the task to end")):
     """
     Endpoint to get the status of an OCR task using task_id.
+    A completed result might be returned as `markdown`, `text`, `docling` (JSON) or `msgpack` - chosen by
+    the `format` parameter or negotiated by the `Accept` header; `json` is the default.
+    With `wait`, the request is held until the task ends or `wait` seconds (up to RESULT_MAX_WAIT) pass.
+    """
+    if wait:
+        state, info = await wait_for_task_state(task_id, min(wait, RESULT_MAX_WAIT))
+    else:
+        state, info = await run_blocking(fetch_task_state, task_id)
+
+    if state == 'PENDING':
+        return {"state": state, "status": "Task is pending..."}
+    elif state == 'PROGRESS':
+        task_info = info
+        if task_info.get('start_time'):
+            task_info['elapsed_time'] = time.time() - int(task_info.get('start_time'))
+        return {"state": state, "status": info.get("status"), "info": task_info}
+    elif state == 'SUCCESS':
+        result = info
+        available = ['json']
+        if isinstance(result, dict):
+            available += ['markdown', 'text', 'msgpack'] + list(result.get('formats') or {})
+        try:
+            response_format = negotiate_format(format, request.headers.get('accept'), available)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if response_format is None:
+            raise HTTPException(status_code=406, detail="The requested format is not available for this result")
+        if response_format != 'json':
+            return await format_result(task_id, state, result, response_format)
+
+        if isinstance(result, dict) and result.get('result_ref'):
+            return StreamingResponse(
+                iterate_blocking(stream_offloaded_result(state, "Task completed successfully.", result), pool='storage'),
+                media_type="application/json")
+        return {"state": state, "status": "Task completed successfully.", "result": result}
+    else:
+        return {"state": state, "status": str(info)}
+
+
+def fetch_task_state(task_id: str) -> tuple:
+    """
+    Reads the task state and info (the result, once completed) from the Celery result backend - blocking.
     """
     task = AsyncResult(task_id, app=celery_app)
+    return task.state, task.info
+
 
-    if task.state == 'PENDING':
-        return {"state": task.state, "status": "Task is pending..."}
-    elif task.state == 'PROGRESS':
-        task_info = task.info
+async def wait_for_task_state(task_id: str, timeout: float) -> tuple:
+    """
+    Reads the task state once the task ended or `timeout` seconds passed. Subscribed to the state updates of
+    the Redis result backend - other backends (or a failed subscription) are polled with backoff.
+    """
+    deadline = time.monotonic() + timeout
+    if result_waiter is not None:
+        try:
+            async with result_waiter.subscribe(task_id) as ended:
+                state, info = await run_blocking(fetch_task_state, task_id)
+                while state not in states.READY_STATES and deadline > time.monotonic():
+                    try:
+                        await asyncio.wait_for(ended.wait(), deadline - time.monotonic())
+                    except asyncio.TimeoutError:
+                        break
+                    ended.clear()
+                    state, info = await run_blocking(fetch_task_state, task_id)
+                return state, info
+        except redis.RedisError as e:
+            logger.warning(f"Failed to subscribe to the state of task {task_id} - polling it: {e}")
+
+    delay = 0.1
+    state, info = await run_blocking(fetch_task_state, task_id)
+    while state not in states.READY_STATES and deadline > time.monotonic():
+        await asyncio.sleep(min(delay, deadline - time.monotonic()))
+        delay = min(delay * 2, 1.0)
+        state, info = await run_blocking(fetch_task_state, task_id)
+    return state, info
+
+
+class BulkResultsRequest(BaseModel):
+    task_ids: List[str] = Field(..., min_length=1, max_length=BULK_RESULTS_MAX_IDS,
+                                description="Task IDs returned by the OCR endpoints")
+    include_pending_info: bool = Field(True, description="Return the status and progress of the tasks not "
+                                                         "completed yet - only their state otherwise")
+
+
+@app.post("/ocr/results")
+async def ocr_results(bulk_request: BulkResultsRequest, request: Request, format: Optional[str] = None):
+    """
+    Endpoint to get the states and results of many OCR tasks at once - in the order of `task_ids`.
+    Results offloaded to the storage are returned as references (`result_ref`), without their text.
+    With `format=ndjson` (or `Accept: application/x-ndjson`) the tasks are streamed as JSON lines,
+    read from the result backend in batches.
+    """
+    if format not in (None, 'json', 'ndjson'):
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'. Available formats: json, ndjson")
+    task_ids = bulk_request.task_ids
+    batches = [task_ids[start:start + BULK_RESULTS_BATCH_SIZE]
+               for start in range(0, len(task_ids), BULK_RESULTS_BATCH_SIZE)]
+
+    if format == 'ndjson' or (format is None and 'application/x-ndjson' in request.headers.get('accept', '')):
+        async def lines():
+            for batch in batches:
+                for task_id, (state, info) in zip(batch, await read_task_states(batch)):
+                    yield json.dumps(task_state_body(task_id, state, info, bulk_request.include_pending_info),
+                                     default=str) + '\n'
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    task_states = await read_task_states(task_ids)
+    return {"results": [task_state_body(task_id, state, info, bulk_request.include_pending_info)
+                        for task_id, (state, info) in zip(task_ids, task_states)]}
+
+
+async def read_task_states(task_ids: List[str]) -> List[tuple]:
+    """
+    Reads the (state, info) of the tasks like `fetch_task_state` - from the Redis result backend by MGETs of
+    BULK_RESULTS_BATCH_SIZE keys sent in one pipeline, from other backends task by task.
+    """
+    if backend_client is None:
+        return list(await asyncio.gather(*(run_blocking(fetch_task_state, task_id) for task_id in task_ids)))
+
+    keys = [celery_app.backend.get_key_for_task(task_id) for task_id in task_ids]
+    async with backend_client.pipeline(transaction=False) as pipe:
+        for start in range(0, len(keys), BULK_RESULTS_BATCH_SIZE):
+            pipe.mget(keys[start:start + BULK_RESULTS_BATCH_SIZE])
+        values = [value for batch in await pipe.execute() for value in batch]
+    return await run_blocking(decode_task_states, values)
+
+
+def decode_task_states(values: List[Optional[bytes]]) -> List[tuple]:
+    """
+    Decodes the task metas read from the result backend - a missing one is a pending task, as for AsyncResult.
+    """
+    task_states = []
+    for value in values:
+        if value is None:
+            task_states.append((states.PENDING, None))
+        else:
+            meta = celery_app.backend.decode_result(value)
+            task_states.append((meta['status'], meta['result']))
+    return task_states
+
+
+def task_state_body(task_id: str, state: str, info, include_pending_info: bool = True) -> dict:
+    """
+    A task in the bulk results - the JSON response of `/ocr/result/{task_id}` with the task id.
+    """
+    body = {"task_id": task_id, "state": state}
+    if state == 'SUCCESS':
+        body.update(status="Task completed successfully.", result=info)
+    elif state not in states.READY_STATES and not include_pending_info:
+        pass
+    elif state == 'PENDING':
+        body.update(status="Task is pending...")
+    elif state == 'PROGRESS' and isinstance(info, dict):
+        task_info = dict(info)
         if task_info.get('start_time'):
             task_info['elapsed_time'] = time.time() - int(task_info.get('start_time'))
-        return {"state": task.state, "status": task.info.get("status"), "info": task_info}
-    elif task.state == 'SUCCESS':
-        return {"state": task.state, "status": "Task completed successfully.", "result": task.result}
+        body.update(status=info.get("status"), info=task_info)
     else:
-        return {"state": task.state, "status": str(task.info)}
+        body.update(status=str(info))
+    return body
+
+
+def stream_text(reference):
+    return iterate_blocking((chunk.encode('utf-8') for chunk in iter_result_text(reference)), pool='storage')
+
+
+async def format_result(task_id: str, state: str, result: dict, response_format: str) -> Response:
+    """
+    Renders a completed result in `response_format`. Formats derived from the text are rendered on first
+    request and cached per result for RESULT_FORMAT_CACHE_TTL seconds.
+    """
+    media_type = FORMAT_MEDIA_TYPES[response_format]
+    reference = result.get('result_ref')
+
+    if response_format == 'docling':
+        return StreamingResponse(stream_text(result['formats']['docling']), media_type=media_type)
+    if response_format == 'markdown':
+        if reference:
+            return StreamingResponse(stream_text(reference), media_type=media_type + "; charset=utf-8")
+        return Response(result.get('extracted_text', ''), media_type=media_type + "; charset=utf-8")
+
+    format_key = cache_key('format', task_id, response_format)
+    body = await redis_client.get(format_key)
+    await count_lookup(redis_client, 'format', body is not None)
+    if body is None:
+        text = await run_blocking(load_result_text, reference, pool='storage') if reference \
+            else result.get('extracted_text', '')
+        if response_format == 'text':
+            body = (await run_blocking(markdown_to_text, text)).encode('utf-8')
+        else:
+            body = msgpack.packb({"state": state, "status": "Task completed successfully.",
+                                  "result": dict(result, extracted_text=text)})
+        await redis_client.set(format_key, body, ex=int(os.getenv('RESULT_FORMAT_CACHE_TTL', 3600)))
+    if response_format == 'text':
+        media_type += "; charset=utf-8"
+    return Response(body, media_type=media_type)
+
+
+def stream_offloaded_result(state: str, status: str, result: dict):
+    """
+    Streams the JSON response of a result kept in the storage layer. The text is read from the
+    reference and emitted as the `result.extracted_text` field, chunk by chunk.
+    """
+    items = [f'{json.dumps(key)}: {json.dumps(value)}' for key, value in result.items() if key != 'extracted_text']
+    items.append('"extracted_text": "')
+    yield f'{{"state": {json.dumps(state)}, "status": {json.dumps(status)}, "result": {{' + ', '.join(items)
+    for chunk in iter_result_text(result['result_ref']):
+        yield json.dumps(chunk, ensure_ascii=False)[1:-1]
+    yield '"}}'
+
+
+async def completed_task_result(task_id: str) -> dict:
+    state, result = await run_blocking(fetch_task_state, task_id)
+    if state != 'SUCCESS':
+        raise HTTPException(status_code=409, detail=f"Task {task_id} is not completed (state: {state})")
+    return result
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[tuple]:
+    """
+    Parses a single `bytes=` range into inclusive (start, end) offsets. Returns None when the whole
+    content should be sent (no or multiple ranges) and raises 416 for unsatisfiable ranges.
+    """
+    if not range_header or not range_header.startswith('bytes=') or ',' in range_header:
+        return None
+    start, _, end = range_header[len('bytes='):].strip().partition('-')
+    try:
+        if not start:
+            start, end = max(0, size - int(end)), size - 1
+        else:
+            start, end = int(start), min(int(end) if end else size - 1, size - 1)
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+@app.get("/ocr/result/{task_id}/pages")
+async def ocr_result_pages(task_id: str, start: int = 1, count: int = 10):
+    """
+    Endpoint to get `count` pages of a completed OCR task result, beginning with the page number `start`.
+    Results without a page structure (e.g. transformed by LLM) are returned as a single page.
+    """
+    result = await completed_task_result(task_id)
+    reference = result.get('result_ref')
+
+    if reference:
+        index = await run_blocking(load_index, reference, pool='storage')
+        page_index = index['pages']
+        pages = await run_blocking(read_pages, reference, index, start, count, pool='storage') if page_index else None
+    else:
+        page_index = result.get('pages')
+        pages = None
+        if page_index:
+            first, last = find_pages(page_index, start, count)
+            pages = [
+                {'page_no': page['page_no'], 'last_page_no': page['last_page_no'],
+                 'text': result['extracted_text'][page['start']:page['end']]}
+                for page in page_index[first:last]
+            ]
+
+    if pages is None:
+        page_index = [None]
+        pages = []
+        if start <= 1 and count > 0:
+            text = await run_blocking(load_result_text, reference, pool='storage') if reference \
+                else result.get('extracted_text', '')
+            pages = [{'page_no': 1, 'last_page_no': None, 'text': text}]
+
+    return {"task_id": task_id, "start": start, "count": len(pages), "total_pages": len(page_index), "pages": pages}
+
+
+@app.get("/ocr/result/{task_id}/text")
+async def ocr_result_text(task_id: str, request: Request):
+    """
+    Endpoint to get the text of a completed OCR task result as markdown. Supports single `Range` requests.
+    """
+    result = await completed_task_result(task_id)
+    reference = result.get('result_ref')
+    data = None if reference else result.get('extracted_text', '').encode('utf-8')
+    size = reference['size'] if reference else len(data)
+    headers = {"Accept-Ranges": "bytes"}
+    media_type = "text/markdown; charset=utf-8"
+
+    byte_range = parse_range_header(request.headers.get('range'), size)
+    if byte_range is None:
+        if reference:
+            headers["Content-Length"] = str(size)
+            return StreamingResponse(stream_text(reference), media_type=media_type, headers=headers)
+        return Response(data, media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    if reference:
+        index = await run_blocking(load_index, reference, pool='storage')
+        body = await run_blocking(read_text_range, reference, index, start, end, pool='storage')
+    else:
+        body = data[start:end + 1]
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(body, status_code=206, media_type=media_type, headers=headers)
 
 
 @app.post("/ocr/clear_cache")
 async def clear_ocr_cache():
     """
-    Endpoint to clear the OCR result cache in Redis.
+    Endpoint to clear the OCR result cache in Redis - the cache keys only, other keys in the database are kept.
     """
-    redis_client.flushdb()
-    return {"status": "OCR cache cleared"}
+    removed = await invalidate(redis_client)
+    return {"status": "OCR cache cleared", "removed": removed}
+
+
+@app.delete("/ocr/cache")
+async def invalidate_ocr_cache(namespace: Optional[str] = None, strategy: Optional[str] = None,
+                               file_hash: Optional[str] = None, min_idle_seconds: Optional[int] = None):
+    """
+    Endpoint to invalidate part of the cache: a namespace (`ocr`, `llm`, `format`), the OCR results of
+    a strategy and/or a file hash, or entries idle for at least `min_idle_seconds`.
+    """
+    try:
+        removed = await invalidate(redis_client, namespace, strategy, file_hash, min_idle_seconds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "Cache invalidated", "removed": removed}
+
+
+@app.get("/ocr/cache/stats")
+async def ocr_cache_stats(sample_size: int = 10000, top: int = 10):
+    """
+    Endpoint to get the cache statistics: key counts, memory and hit ratios per namespace, and the largest keys.
+    """
+    return await cache_stats(redis_client, max(0, sample_size), max(0, min(top, 100)))
 
 
 @app.get("/storage/list")
-async def list_files(storage_profile: str = 'default'):
+async def list_files(request: Request, storage_profile: str = 'default', prefix: str = '',
+                     page_size: Optional[int] = None, cursor: Optional[str] = None):
     """
     Endpoint to list files using the selected storage profile.
+    With `page_size` (or `cursor`) a single page is returned along with the `next_cursor`. With the
+    `Accept: application/x-ndjson` header all the files are streamed as they are listed, one JSON per line.
     """
-    storage_manager = StorageManager(storage_profile)
-    files = storage_manager.list()
-    return {"files": files}
+    storage_manager = await run_blocking(StorageManager, storage_profile, pool='storage')
+
+    if 'application/x-ndjson' in request.headers.get('accept', ''):
+        def stream_names():
+            for name in storage_manager.iter_list(prefix, page_size or 1000):
+                yield json.dumps({"name": name}) + "\n"
+
+        return StreamingResponse(iterate_blocking(stream_names(), pool='storage'), media_type="application/x-ndjson")
+
+    if page_size or cursor:
+        files, next_cursor = await run_blocking(storage_manager.list_page, prefix, max(1, min(page_size or 1000, 1000)),
+                                                cursor, pool='storage')
+        return {"files": files, "next_cursor": next_cursor}
+
+    return {"files": await run_blocking(lambda: list(storage_manager.iter_list(prefix)), pool='storage')}
 
 
 @app.get("/storage/load")
@@ -346,18 +778,71 @@ async def load_file(file_name: str, storage_profile: str = 'default'):
     """
     Endpoint to load a file using the selected storage profile.
     """
-    storage_manager = StorageManager(storage_profile)
-    content = storage_manager.load(file_name)
+    storage_manager = await run_blocking(StorageManager, storage_profile, pool='storage')
+    content = await run_blocking(storage_manager.load, file_name, pool='storage')
     return {"content": content}
 
 
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return etag.removeprefix('W/') in [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+
+
+@app.get("/storage/download")
+async def download_file(request: Request, file_name: str, storage_profile: str = 'default'):
+    """
+    Endpoint to download a file (as listed by /storage/list) using the selected storage profile.
+    The file is streamed from the storage as is. Supports single `Range` requests and `If-None-Match` revalidation.
+    """
+    storage_manager = await run_blocking(StorageManager, storage_profile, pool='storage')
+    try:
+        stat = await run_blocking(storage_manager.stat, file_name, pool='storage')
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if stat is None:
+        raise HTTPException(status_code=404, detail=f"File {file_name} not found")
+
+    headers = {
+        "ETag": stat['etag'],
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename*=utf-8''{quote(os.path.basename(file_name))}",
+    }
+    if etag_matches(request.headers.get('if-none-match'), stat['etag']):
+        return Response(status_code=304, headers={"ETag": stat['etag']})
+
+    media_type = stat['content_type'] or mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+
+    local_path = await run_blocking(storage_manager.local_path, file_name, pool='storage')
+    if local_path:
+        # Sent by the server from the file (`pathsend` where supported) - Range requests included
+        return FileResponse(local_path, media_type=media_type, headers=headers)
+
+    byte_range = parse_range_header(request.headers.get('range'), stat['size'])
+    start, end = byte_range or (0, stat['size'] - 1)
+    chunks = await run_blocking(storage_manager.load_stream, file_name, start=start, length=end - start + 1,
+                                pool='storage') if byte_range \
+        else await run_blocking(storage_manager.load_stream, file_name, pool='storage')
+    if chunks is None:
+        raise HTTPException(status_code=404, detail=f"File {file_name} not found")
+
+    chunks = iterate_blocking(chunks, pool='storage')
+    headers["Content-Length"] = str(end - start + 1)
+    if byte_range is None:
+        return StreamingResponse(chunks, media_type=media_type, headers=headers)
+    headers["Content-Range"] = f"bytes {start}-{end}/{stat['size']}"
+    return StreamingResponse(chunks, status_code=206, media_type=media_type, headers=headers)
+
+
 @app.delete("/storage/delete")
 async def delete_file(file_name: str, storage_profile: str = 'default'):
     """
     Endpoint to delete a file using the selected storage profile.
     """
-    storage_manager = StorageManager(storage_profile)
-    storage_manager.delete(file_name)
+    storage_manager = await run_blocking(StorageManager, storage_profile, pool='storage')
+    await run_blocking(storage_manager.delete, file_name, pool='storage')
     return {"status": f"File {file_name} deleted successfully"}
 
 
@@ -375,7 +860,7 @@ async def generate_llama(request: OllamaGenerateRequest):
         raise HTTPException(status_code=400, detail="No prompt provided")
 
     try:
-        response = ollama.generate(request.model, request.prompt)
+        response = await ollama_client.generate(request.model, request.prompt, keep_alive=keep_alive())
     except ollama.ResponseError as e:
         print('Error:', e.error)
         if e.status_code == 404:
@@ -0,0 +1,80 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+    start_http_server
+)
+
+# Prometheus metrics of the API and the workers. With several processes (uvicorn workers, prefork Celery
+# pool) set PROMETHEUS_MULTIPROC_DIR to a directory shared by the processes of one host - the metrics are
+# then written there and aggregated on scrape.
+
+SIZE_BUCKETS = tuple(2 ** exponent * 1024 for exponent in range(4, 19, 2))  # 16KB .. 256MB
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+UPLOAD_SIZE = Histogram('text_extract_upload_size_bytes', 'Size of the uploaded documents',
+                        ['mime_type'], buckets=SIZE_BUCKETS)
+MIME_SNIFF_DURATION = Histogram('text_extract_mime_sniff_seconds', 'Time spent guessing the MIME type of a file',
+                                buckets=DURATION_BUCKETS)
+RASTERIZATION_DURATION = Histogram('text_extract_rasterization_seconds', 'Time spent rendering documents to images',
+                                   ['mime_type'], buckets=DURATION_BUCKETS)
+PAGE_OCR_DURATION = Histogram('text_extract_page_ocr_seconds', 'OCR time of a single page (or page range)',
+                              ['strategy', 'model', 'mime_type'], buckets=DURATION_BUCKETS)
+LLM_TRANSFORM_DURATION = Histogram('text_extract_llm_transform_seconds', 'Time spent transforming the text by LLM',
+                                   ['strategy', 'model', 'mime_type'], buckets=DURATION_BUCKETS)
+STORAGE_SAVE_DURATION = Histogram('text_extract_storage_save_seconds', 'Time spent saving to the storage',
+                                  ['storage_strategy'], buckets=DURATION_BUCKETS)
+QUEUE_WAIT_DURATION = Histogram('text_extract_queue_wait_seconds', 'Time the OCR tasks waited in the queue',
+                                ['strategy'], buckets=DURATION_BUCKETS)
+TASK_LATENCY = Histogram('text_extract_task_latency_seconds', 'End-to-end latency of the OCR tasks, from enqueueing',
+                         ['strategy', 'model', 'mime_type'], buckets=DURATION_BUCKETS)
+
+TASKS_IN_FLIGHT = Gauge('text_extract_tasks_in_flight', 'Tasks being executed by the workers', ['task'],
+                        multiprocess_mode='livesum')
+QUEUE_DEPTH = Gauge('text_extract_queue_depth', 'Messages waiting in the broker queues', ['queue'],
+                    multiprocess_mode='max')
+CACHE_LOOKUPS = Counter('text_extract_cache_lookups_total', 'Cache lookups by namespace and result (hit/miss)',
+                        ['namespace', 'result'])
+ENGINE_ERRORS = Counter('text_extract_engine_errors_total', 'Failed requests to the OCR/LLM engines',
+                        ['engine', 'model'])
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """
+    Observes the time spent within the block in `histogram` - labeled by `labels`, if any.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        (histogram.labels(**labels) if labels else histogram).observe(time.perf_counter() - started)
+
+
+def registry():
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(multiprocess_registry)
+        return multiprocess_registry
+    return REGISTRY
+
+
+def render_metrics():
+    """
+    Returns the metrics in the Prometheus text format and its content type.
+    """
+    return generate_latest(registry()), CONTENT_TYPE_LATEST
+
+
+def start_exporter(port: int) -> None:
+    """
+    Serves the metrics over HTTP on `port` in a background thread - used by the Celery workers.
+    """
+    start_http_server(port, registry=registry())
+
+
+def mark_process_dead(pid: int) -> None:
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+
+import redis.asyncio
+from celery import Celery, states
+
+logger = logging.getLogger(__name__)
+
+
+class ResultWaiter:
+    """
+    Waits for Celery tasks to end without polling: the Redis result backend publishes every state stored
+    to the channel named by the result key (`celery-task-meta-{task_id}`). All the waiting requests share
+    one subscriber connection, subscribed to the channels of the tasks waited for.
+    """
+
+    def __init__(self, client: redis.asyncio.Redis, channel_of: Callable[[str], bytes]):
+        self._client = client
+        self._channel_of = channel_of
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._waiters: Dict[bytes, Set[asyncio.Event]] = {}
+        self._subscriptions: Dict[bytes, asyncio.Future] = {}
+
+    @asynccontextmanager
+    async def subscribe(self, task_id: str) -> AsyncIterator[asyncio.Event]:
+        """
+        Yields an event set when the task publishes a terminal state (or a state that could not be decoded).
+        The channel is subscribed before yielding, so a state read afterwards can not miss an update.
+        """
+        channel = self._channel_of(task_id)
+        event = asyncio.Event()
+        self._waiters.setdefault(channel, set()).add(event)
+        try:
+            if channel not in self._subscriptions:
+                self._subscriptions[channel] = asyncio.ensure_future(self._subscribe(channel))
+            await asyncio.shield(self._subscriptions[channel])
+            yield event
+        finally:
+            waiters = self._waiters.get(channel, set())
+            waiters.discard(event)
+            if not waiters:
+                self._waiters.pop(channel, None)
+                subscription = self._subscriptions.pop(channel, None)
+                if subscription is not None and subscription.done() and not subscription.exception():
+                    try:
+                        await self._pubsub.unsubscribe(channel)
+                    except Exception as e:
+                        logger.warning(f"Failed to unsubscribe from {channel!r}: {e}")
+
+    async def _subscribe(self, channel: bytes) -> None:
+        if self._pubsub is None:
+            self._pubsub = self._client.pubsub()
+        await self._pubsub.subscribe(channel)
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read())
+
+    async def _read(self) -> None:
+        try:
+            while self._waiters:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message and message['type'] == 'message':
+                    self._dispatch(message['channel'], message['data'])
+        except Exception as e:
+            logger.warning(f"Task state subscription failed: {e}")
+            # The waiting requests read the state again; the next ones subscribe over a new connection
+            pubsub, self._pubsub = self._pubsub, None
+            self._subscriptions.clear()
+            for waiters in self._waiters.values():
+                for event in waiters:
+                    event.set()
+            await pubsub.aclose()
+
+    def _dispatch(self, channel: bytes, data: bytes) -> None:
+        try:
+            status = json.loads(data).get('status')
+        except (ValueError, AttributeError):
+            status = None  # e.g. another result serializer - the waiting request reads the state itself
+        if status is None or status in states.READY_STATES:
+            for event in self._waiters.get(channel, ()):
+                event.set()
+
+    async def aclose(self) -> None:
+        """
+        Closes the subscriber connection - the client is left open.
+        """
+        if self._reader is not None:
+            self._reader.cancel()
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+
+
+def result_backend_client() -> Optional[redis.asyncio.Redis]:
+    """
+    Async client of the Redis result backend - None for other backends.
+    """
+    backend_url = os.getenv('CELERY_RESULT_BACKEND', '')
+    if not backend_url.startswith(('redis://', 'rediss://')):
+        return None
+    return redis.asyncio.Redis.from_url(backend_url, max_connections=int(os.getenv('REDIS_MAX_CONNECTIONS', 64)))
+
+
+def create_result_waiter(celery_app: Celery, client: Optional[redis.asyncio.Redis]) -> Optional[ResultWaiter]:
+    """
+    Returns a waiter for the Redis result backend - None for other backends, which are polled instead.
+    """
+    return ResultWaiter(client, celery_app.backend.get_key_for_task) if client is not None else None
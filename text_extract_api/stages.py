@@ -0,0 +1,20 @@
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+# Records a stage duration (stage name, seconds) to the timeline of the running task - set by
+# text_extract_api.extract.profiling; kept here so low-level modules (e.g. the file formats) record their stages
+# without importing the task code.
+_stage_recorder: ContextVar[Optional[Callable[[str, float], None]]] = ContextVar('stage_recorder', default=None)
+
+
+def set_stage_recorder(recorder: Optional[Callable[[str, float], None]]) -> None:
+    _stage_recorder.set(recorder)
+
+
+def record_stage(stage: str, duration: float) -> None:
+    """
+    Adds `duration` seconds to the `stage` of the running task - ignored when no task is running.
+    """
+    recorder = _stage_recorder.get()
+    if recorder is not None:
+        recorder(stage, duration)
@@ -0,0 +1,140 @@
+import asyncio
+import functools
+import os
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+try:
+    from opentelemetry import context, propagate, trace
+except ImportError:  # tracing is optional - see the `tracing` extra
+    context = propagate = trace = None
+
+# Trace context is passed to the Celery tasks in the message headers (W3C Trace Context)
+TRACE_HEADERS = ('traceparent', 'tracestate')
+
+_configured = False
+_task_spans: Dict[str, tuple] = {}
+
+
+def tracing_exporter() -> str:
+    return os.getenv('TRACING_EXPORTER', 'none').lower()
+
+
+def setup_tracing(service_name: str) -> bool:
+    """
+    Sets up the span export of this process, as configured by TRACING_EXPORTER: `otlp` (OTLP over HTTP,
+    to OTEL_EXPORTER_OTLP_ENDPOINT), `file` (one JSON span per line, appended to TRACING_FILE) or `console`.
+    Returns False when tracing is disabled (the default) or the OpenTelemetry SDK is not installed.
+    """
+    global _configured
+    exporter_name = tracing_exporter()
+    if _configured or exporter_name == 'none':
+        return _configured
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+    except ImportError:
+        print("Tracing is enabled, but the OpenTelemetry SDK is not installed - pip install .[tracing]")
+        return False
+
+    provider = TracerProvider(resource=Resource.create({'service.name': os.getenv('OTEL_SERVICE_NAME', service_name)}))
+    if exporter_name == 'otlp':
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    elif exporter_name == 'file':
+        # Written span by span - the file is shared by the processes of the API and of the workers
+        trace_file = open(os.getenv('TRACING_FILE', 'traces.jsonl'), 'a')
+        provider.add_span_processor(SimpleSpanProcessor(
+            ConsoleSpanExporter(out=trace_file, formatter=lambda span: span.to_json(indent=None) + '\n')))
+    elif exporter_name == 'console':
+        provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter()))
+    else:
+        raise ValueError(f"Unknown TRACING_EXPORTER '{exporter_name}'. Available: none, otlp, file, console")
+
+    trace.set_tracer_provider(provider)
+    _configured = True
+    return True
+
+
+def _attributes(attributes: dict) -> dict:
+    return {name: value for name, value in attributes.items() if value is not None}
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Runs the block within a child span of the current span. A no-op when OpenTelemetry is not installed.
+    """
+    if trace is None:
+        yield None
+        return
+    with trace.get_tracer(__name__).start_as_current_span(name, attributes=_attributes(attributes)) as current:
+        yield current
+
+
+def traced(name: str):
+    """
+    Decorator running the (sync or async) function within a span.
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_span(name: str, started_at: Optional[float], duration: Optional[float], **attributes) -> None:
+    """
+    Adds a child span of the current span for work already done - e.g. a page extracted by a strategy -
+    from its start time and duration (in seconds).
+    """
+    if trace is None or started_at is None or duration is None:
+        return
+    recorded = trace.get_tracer(__name__).start_span(name, start_time=int(started_at * 1e9),
+                                                     attributes=_attributes(attributes))
+    recorded.end(end_time=int((started_at + duration) * 1e9))
+
+
+def inject_headers() -> Dict[str, str]:
+    """
+    Headers passing the current trace context on to a Celery task.
+    """
+    carrier = {}
+    if propagate is not None:
+        propagate.inject(carrier)
+    return carrier
+
+
+def start_task_span(task_id: str, name: str, request) -> None:
+    """
+    Starts the span of a Celery task - a child of the span which enqueued it - and makes it current
+    for the task. Ended by `end_task_span`.
+    """
+    if trace is None:
+        return
+    parent = propagate.extract({header: request.get(header) for header in TRACE_HEADERS if request.get(header)})
+    task_span = trace.get_tracer(__name__).start_span(name, context=parent, kind=trace.SpanKind.CONSUMER,
+                                                      attributes={'celery.task_id': task_id})
+    _task_spans[task_id] = (task_span, context.attach(trace.set_span_in_context(task_span)))
+
+
+def end_task_span(task_id: str, state: Optional[str] = None) -> None:
+    task_span, token = _task_spans.pop(task_id, (None, None))
+    if task_span is None:
+        return
+    if state:
+        task_span.set_attribute('celery.state', state)
+        if state == 'FAILURE':
+            task_span.set_status(trace.StatusCode.ERROR)
+    context.detach(token)
+    task_span.end()